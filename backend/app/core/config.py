@@ -1,12 +1,70 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 from pathlib import Path
+from typing import Dict
 
 class Settings(BaseSettings):
     app_name: str = "Gaming Analytics API"
     openai_api_key: str
     openai_model: str = "gpt-4-1106-preview"
+    # Connection pool of the shared OpenAI client
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_seconds: float = 60.0
+    openai_timeout_seconds: float = 60.0
+    openai_max_retries: int = 2
     data_dir: str = str(Path(__file__).parent.parent.parent / "data")
+    default_dataset: str = "sales_and_rating_cleaned"
+    # Execution engine for db_search tasks: "pandas" (CSVOperations) or "duckdb"
+    query_engine: str = "pandas"
+    duckdb_path: str = str(Path(__file__).parent.parent.parent / "data" / "gaming.duckdb")
+    duckdb_pool_size: int = 4
+    # Worker processes that run generated pandas code under a timeout and CPU and memory limits.
+    # 0 runs it on a thread in the server, guarded only by the AST check and restricted
+    # builtins, so a runaway or oversized query stalls or takes down the whole server.
+    sandbox_workers: int = 2
+    sandbox_timeout_seconds: float = 30.0
+    sandbox_cpu_seconds: int = 20
+    sandbox_memory_mb: int = 2048
+    # Persistent cache of the code generated for db_search questions
+    codegen_cache_enabled: bool = True
+    codegen_cache_path: str = str(Path(__file__).parent.parent.parent / "data" / "codegen_cache.sqlite3")
+    codegen_cache_max_entries: int = 10_000
+    codegen_cache_similarity: float = 0.8
+    # In-memory cache of decomposition plans by normalized query
+    decomposer_cache_size: int = 1024
+    decomposer_cache_ttl_seconds: float = 3600.0
+    # In-memory cache of guardrail input verdicts by normalized query
+    guardrail_cache_size: int = 4096
+    guardrail_cache_ttl_seconds: float = 3600.0
+    # Draft the answer and its citations in one call instead of a separate CitationAdder pass
+    conversation_single_pass: bool = False
+    # SQLite checkpoints of running workflows, an interrupted request resumes from its last step
+    checkpoint_enabled: bool = True
+    checkpoint_path: str = str(Path(__file__).parent.parent.parent / "data" / "checkpoints.sqlite3")
+    checkpoint_ttl_seconds: float = 86400.0
+    checkpoint_batch_size: int = 32
+    checkpoint_flush_interval_seconds: float = 0.5
+    # Persistent chat history, the most recent messages are also kept in memory
+    chat_history_path: str = str(Path(__file__).parent.parent.parent / "data" / "chat_history.sqlite3")
+    chat_history_recent_size: int = 256
+    chat_history_max_messages: int = 100_000
+    chat_history_page_size: int = 50
+    chat_history_max_page_size: int = 200
+    # Logging: default level, levels and records per second by component prefix, e.g. {"router": 20}
+    log_level: str = "INFO"
+    log_component_levels: Dict[str, str] = {}
+    log_rate_limits: Dict[str, float] = {"router": 20.0, "db_search/executor": 20.0}
+    log_max_field_chars: int = 2000
+    log_max_message_chars: int = 4000
+    # Per-stage latency spans as OTLP/JSON lines: "file" (tracing_path), "stdout" or "none"
+    tracing_exporter: str = "none"
+    tracing_path: str = str(Path(__file__).parent.parent.parent / "logs" / "traces.jsonl")
+    tracing_max_bytes: int = 10 * 1024 * 1024
+    tracing_backup_count: int = 5
+    # In-memory CheckpointService entries
+    checkpoint_cache_size: int = 1024
+    checkpoint_cache_ttl_seconds: float = 3600.0
 
 @lru_cache()
 def get_settings():
@@ -3,6 +3,8 @@ from typing import Optional
 from app.services.guardrail import GuardrailService
 from app.workflows.main import AgentWorkflow
 from app.services.checkpoint import CheckpointService
+from app.services.checkpointer import get_checkpointer
+from app.core.config import get_settings
 # Global instances
 guardrail: Optional[GuardrailService] = None
 workflow: Optional[AgentWorkflow] = None
@@ -15,7 +17,8 @@ def init_globals():
         guardrail = GuardrailService()
     
     if workflow is None:
-        workflow = AgentWorkflow()
+        settings = get_settings()
+        workflow = AgentWorkflow(checkpointer=get_checkpointer() if settings.checkpoint_enabled else None)
     if checkpoint is None:
         checkpoint = CheckpointService()
         
@@ -0,0 +1,87 @@
+import httpx
+from functools import lru_cache
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from .config import get_settings
+from .tracing import Span, start_span
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # HTTP/2 needs the h2 package, fall back to HTTP/1.1 keep-alive
+    HTTP2_AVAILABLE = False
+
+class _TracedStream(httpx.AsyncByteStream):
+    """Response body that ends the request's span once it has been read or closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, span: Span):
+        self._stream = stream
+        self._span = span
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._span.end()
+
+class TracingAsyncClient(httpx.AsyncClient):
+    """HTTP client that records every request as an "llm.request" span, streamed bodies included."""
+
+    async def send(self, request: httpx.Request, *args, **kwargs) -> httpx.Response:
+        span = start_span("llm.request", **{
+            "http.method": request.method,
+            "http.url": str(request.url.copy_with(query=None)),
+            "server.address": request.url.host
+        })
+        try:
+            response = await super().send(request, *args, **kwargs)
+        except BaseException as e:
+            span.record_error(e)
+            span.end()
+            raise
+        span.set_attribute("http.status_code", response.status_code)
+        if response.is_closed:
+            span.end()
+        else:
+            response.stream = _TracedStream(response.stream, span)
+        return response
+
+@lru_cache()
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP connection pool used for every LLM call.
+    
+    Connections are kept alive and reused across requests, so LLM calls skip the TLS
+    handshake and concurrent requests multiplex over the same pool.
+    """
+    settings = get_settings()
+    return TracingAsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_seconds
+        ),
+        timeout=httpx.Timeout(settings.openai_timeout_seconds, connect=10.0)
+    )
+
+@lru_cache()
+def get_openai_client() -> AsyncOpenAI:
+    """Get the OpenAI client shared by every workflow node and service."""
+    settings = get_settings()
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        http_client=get_http_client(),
+        max_retries=settings.openai_max_retries
+    )
+
+async def close_http_client() -> None:
+    """Close the pooled connections, called on shutdown."""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
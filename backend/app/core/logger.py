@@ -1,18 +1,114 @@
+import atexit
+import gzip
+import hashlib
 import logging
 import json
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 from pythonjsonlogger import jsonlogger
+from .tracing import get_correlation_id
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = Path(__file__).parent.parent.parent / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Messages and extras can be passed as callables, they are only evaluated if the record is kept
+Message = Union[str, Callable[[], str]]
+Extras = Union[Dict[str, Any], Callable[[], Dict[str, Any]], None]
+
+# Longest list and dict kept item by item in a summary
+MAX_SUMMARY_ITEMS = 20
+
+def summarize(value: Any, max_chars: int) -> Any:
+    """
+    Make a value cheap to log, passing small values through and summarizing large ones.
+
+    Long strings are cut to `max_chars` and keep their length and hash, frames and arrays are
+    reduced to their shape and columns, long collections to their size and first items.
+
+    Args:
+        value: Value to log
+        max_chars: Longest string kept as is
+
+    Returns:
+        A JSON-friendly value no larger than a few times `max_chars`
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return {
+            "truncated": value[:max_chars],
+            "length": len(value),
+            "sha1": hashlib.sha1(value.encode("utf-8", "replace")).hexdigest()
+        }
+    # pandas and numpy objects are recognised by shape so neither has to be imported here
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple):
+        summary = {"type": type(value).__name__, "shape": list(shape)}
+        columns = getattr(value, "columns", None)
+        if columns is not None:
+            summary["columns"] = [str(column) for column in list(columns)[:MAX_SUMMARY_ITEMS]]
+        elif getattr(value, "dtype", None) is not None:
+            summary["dtype"] = str(value.dtype)
+        return summary
+    if isinstance(value, dict):
+        items = list(value.items())
+        summary = {str(key): summarize(item, max_chars) for key, item in items[:MAX_SUMMARY_ITEMS]}
+        if len(items) > MAX_SUMMARY_ITEMS:
+            summary["..."] = f"{len(items) - MAX_SUMMARY_ITEMS} more keys"
+        return summary
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+        if len(items) <= MAX_SUMMARY_ITEMS:
+            return [summarize(item, max_chars) for item in items]
+        return {
+            "type": type(value).__name__,
+            "length": len(items),
+            "head": [summarize(item, max_chars) for item in items[:5]]
+        }
+    return summarize(str(value), max_chars)
+
+def _to_level(level: Union[int, str]) -> int:
+    """Turn a level name such as "warning" into its number."""
+    if isinstance(level, int):
+        return level
+    number = logging.getLevelName(level.upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return number
+
+def _orjson_dumps(obj: Any, default: Any = None, **kwargs: Any) -> str:
+    """json.dumps-compatible wrapper around orjson, objects it cannot encode fall back to str()."""
+    return orjson.dumps(
+        obj,
+        default=default or str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
+    def __init__(self, *args: Any, **kwargs: Any):
+        if orjson is not None:
+            kwargs.setdefault("json_serializer", _orjson_dumps)
+            kwargs.setdefault("json_default", str)
+        super().__init__(*args, **kwargs)
+
     def add_fields(self, log_record: Dict[str, Any], record: logging.LogRecord, message_dict: Dict[str, Any]) -> None:
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-        log_record['timestamp'] = datetime.utcnow().isoformat()
+        log_record['timestamp'] = datetime.utcfromtimestamp(record.created).isoformat()
         log_record['level'] = record.levelname
         
         # Add correlation_id if available in extras
@@ -27,45 +123,232 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         if hasattr(record, 'extras'):
             log_record['extras'] = record.extras
 
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Size-rotated log file whose rotated copies are gzipped, e.g. app.log.1.gz."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str) -> None:
+        with open(source, "rb") as plain, gzip.open(dest, "wb") as compressed:
+            shutil.copyfileobj(plain, compressed)
+        os.remove(source)
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the writer falls behind.
+
+    The last `reserved` slots of the queue are kept for warnings and errors, so info and
+    debug records are dropped first and a burst of them cannot crowd out a failure. No
+    record ever waits for room. How many records were dropped is written into the extras
+    of the next record that gets through.
+    """
+
+    def __init__(self, log_queue: queue.Queue, reserved: int = 0):
+        super().__init__(log_queue)
+        self.reserved = reserved
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Handler.handle holds the handler lock, so the count cannot change under us
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self.queue.maxsize - self.reserved:
+            self.dropped += 1
+            return
+        if self.dropped:
+            record.extras = {**(getattr(record, "extras", None) or {}), "dropped": self.dropped}
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.dropped = 0
+
+class DrainingQueueListener(QueueListener):
+    """Queue listener whose stop waits for room in a full queue instead of failing."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
 class CustomLogger:
-    def __init__(self, name: str = "app"):
+    """
+    Structured JSON logger that never writes to disk on the calling thread.
+
+    Records are put on a bounded queue and formatted and written by a background listener,
+    so the event loop only pays for creating the record. The log file rotates by size and
+    rotated files are compressed by the listener as well.
+    """
+
+    def __init__(
+        self,
+        name: str = "app",
+        log_dir: Path = LOGS_DIR,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10_000,
+        warning_reserve: int = 1_000
+    ):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
-        
-        # Create file handler
-        log_file = LOGS_DIR / "app.log"
-        file_handler = logging.FileHandler(log_file)
-        
+        self.level = logging.INFO
+        self.component_levels: Dict[str, int] = {}
+        self.max_field_chars = 2000
+        self.max_message_chars = 4000
+        self.rate_limits: Dict[str, float] = {}
+        # Records per component prefix: (tokens left, last refill, records suppressed since)
+        self._buckets: Dict[str, Tuple[float, float, int]] = {}
+        self._levels: Dict[str, int] = {}
+        self._rate_lock = threading.Lock()
+
+        # Create file handler, only the listener thread ever touches it
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.file_handler = CompressingRotatingFileHandler(str(log_dir / "app.log"), max_bytes, backup_count)
+
         # Create formatter
         formatter = CustomJsonFormatter(
             '%(timestamp)s %(level)s %(name)s %(message)s'
         )
-        file_handler.setFormatter(formatter)
-        
+        self.file_handler.setFormatter(formatter)
+
+        # Callers only enqueue, the listener formats and writes
+        self.queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size + warning_reserve), warning_reserve)
+        self.listener = DrainingQueueListener(self.queue_handler.queue, self.file_handler, respect_handler_level=True)
+        self.listener.start()
+        self._stopped = False
+        atexit.register(self.shutdown)
+
         # Add handler to logger
-        self.logger.addHandler(file_handler)
-    
-    def _log(self, level: int, message: str, component: str, extras: Optional[Dict[str, Any]] = None, correlation_id: Optional[str] = None) -> None:
+        self.logger.addHandler(self.queue_handler)
+
+    def configure(
+        self,
+        level: Optional[Union[int, str]] = None,
+        component_levels: Optional[Dict[str, Union[int, str]]] = None,
+        max_field_chars: Optional[int] = None,
+        max_message_chars: Optional[int] = None,
+        rate_limits: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        Set what gets logged and how much of it, arguments left as None keep their value.
+
+        Args:
+            level: Level of components without one of their own
+            component_levels: Level per component prefix, e.g. {"router": "WARNING"} also
+                covers "router/process"
+            max_field_chars: Longest string kept as is in extras, longer ones are summarized
+            max_message_chars: Longest message kept as is
+            rate_limits: Records per second kept per component prefix, info and debug records
+                over the limit are dropped and counted in the next record that is kept
+        """
+        if level is not None:
+            self.level = _to_level(level)
+        if component_levels is not None:
+            self.component_levels = {
+                component: _to_level(value)
+                for component, value in component_levels.items()
+            }
+        if max_field_chars is not None:
+            self.max_field_chars = max_field_chars
+        if max_message_chars is not None:
+            self.max_message_chars = max_message_chars
+        if rate_limits is not None:
+            self.rate_limits = dict(rate_limits)
+        with self._rate_lock:
+            self._buckets.clear()
+        self._levels = {}
+        self.logger.setLevel(min([self.level, *self.component_levels.values()]))
+
+    def _match(self, component: str, settings: Dict[str, Any]) -> Optional[str]:
+        """Find the longest prefix of a component, split on "/", that has a setting."""
+        parts = component.split("/")
+        for end in range(len(parts), 0, -1):
+            prefix = "/".join(parts[:end])
+            if prefix in settings:
+                return prefix
+        return None
+
+    def _level_for(self, component: str) -> int:
+        level = self._levels.get(component)
+        if level is None:
+            prefix = self._match(component, self.component_levels)
+            level = self.component_levels[prefix] if prefix is not None else self.level
+            self._levels[component] = level
+        return level
+
+    def _admit(self, level: int, component: str) -> Optional[int]:
+        """
+        Apply the rate limit of a component.
+
+        Returns:
+            None if the record has to be dropped, otherwise how many were dropped before it
+        """
+        if level >= logging.WARNING or not self.rate_limits:
+            return 0
+        prefix = self._match(component, self.rate_limits)
+        if prefix is None:
+            return 0
+        rate = self.rate_limits[prefix]
+        now = time.monotonic()
+        with self._rate_lock:
+            tokens, last, suppressed = self._buckets.get(prefix, (rate, now, 0))
+            tokens = min(rate, tokens + (now - last) * rate)
+            if tokens < 1:
+                self._buckets[prefix] = (tokens, now, suppressed + 1)
+                return None
+            self._buckets[prefix] = (tokens - 1, now, 0)
+            return suppressed
+
+    def shutdown(self) -> None:
+        """Write every queued record and close the log file."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        self.file_handler.close()
+
+    def _log(self, level: int, message: Message, component: str, extras: Extras = None, correlation_id: Optional[str] = None) -> None:
         """Internal method to handle logging with extra parameters."""
+        if level < self._level_for(component):
+            return
+        suppressed = self._admit(level, component)
+        if suppressed is None:
+            return
+        
+        # Only records that are kept pay for building their message and extras
+        if callable(message):
+            message = message()
+        if len(message) > self.max_message_chars:
+            message = message[:self.max_message_chars] + f"... ({len(message)} chars)"
+        if callable(extras):
+            extras = extras()
+        extras = {str(key): summarize(value, self.max_field_chars) for key, value in (extras or {}).items()}
+        if suppressed:
+            extras["suppressed"] = suppressed
+        correlation_id = correlation_id or get_correlation_id()
+        
         extra = {
             'component': component,
-            'extras': extras or {},
+            'extras': extras,
         }
         if correlation_id:
             extra['correlation_id'] = correlation_id
             
         self.logger.log(level, message, extra=extra)
     
-    def info(self, message: str, component: str, extras: Optional[Dict[str, Any]] = None, correlation_id: Optional[str] = None) -> None:
+    def info(self, message: Message, component: str, extras: Extras = None, correlation_id: Optional[str] = None) -> None:
         self._log(logging.INFO, message, component, extras, correlation_id)
     
-    def error(self, message: str, component: str, extras: Optional[Dict[str, Any]] = None, correlation_id: Optional[str] = None) -> None:
+    def error(self, message: Message, component: str, extras: Extras = None, correlation_id: Optional[str] = None) -> None:
         self._log(logging.ERROR, message, component, extras, correlation_id)
     
-    def debug(self, message: str, component: str, extras: Optional[Dict[str, Any]] = None, correlation_id: Optional[str] = None) -> None:
+    def debug(self, message: Message, component: str, extras: Extras = None, correlation_id: Optional[str] = None) -> None:
         self._log(logging.DEBUG, message, component, extras, correlation_id)
     
-    def warning(self, message: str, component: str, extras: Optional[Dict[str, Any]] = None, correlation_id: Optional[str] = None) -> None:
+    def warning(self, message: Message, component: str, extras: Extras = None, correlation_id: Optional[str] = None) -> None:
         self._log(logging.WARNING, message, component, extras, correlation_id)
 
 # Create a global logger instance
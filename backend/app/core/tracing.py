@@ -0,0 +1,261 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Union
+
+# Correlation ID of the request being handled, set by CorrelationMiddleware
+correlation_id_var: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+SERVICE_NAME = "ps-backend"
+
+def get_correlation_id() -> Optional[str]:
+    """Correlation ID of the current request, None outside of one."""
+    return correlation_id_var.get()
+
+def _trace_id(correlation_id: Optional[str]) -> str:
+    """
+    Derive the trace ID from the correlation ID, so every span of a request shares it.
+
+    A UUID correlation ID maps directly onto the 16 bytes of an OpenTelemetry trace ID.
+    """
+    if correlation_id is None:
+        return uuid.uuid4().hex
+    try:
+        return uuid.UUID(correlation_id).hex
+    except ValueError:
+        return hashlib.sha256(correlation_id.encode()).hexdigest()[:32]
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Encode one attribute the way OTLP/JSON does."""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+class Span:
+    """One timed operation, nested under the span that was current when it started."""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = 1):
+        parent = _current_span.get()
+        correlation_id = get_correlation_id()
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else _trace_id(correlation_id)
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        if correlation_id is not None:
+            self.attributes["correlation_id"] = correlation_id
+        self.status_code = 0
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status_code = 2
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        """Stop the clock and hand the span to the exporter, only the first call counts."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.status_code == 0:
+            self.status_code = 1
+        if tracer.exporter is not None:
+            tracer.exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span as an OTLP/JSON span object."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+class RotatingOutput:
+    """Text file rotated by size like the log file, e.g. traces.jsonl.1, for the span exporter to write to."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.handler.terminator = ""
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, text: str) -> None:
+        self.handler.emit(logging.makeLogRecord({"msg": text}))
+
+    def flush(self) -> None:
+        self.handler.flush()
+
+    def close(self) -> None:
+        self.handler.close()
+
+class SpanExporter:
+    """
+    Writes finished spans as OTLP/JSON lines from a background thread.
+
+    Each line is a complete ExportTraceServiceRequest, the format the OpenTelemetry
+    Collector's otlpjsonfile receiver reads, so the file can be shipped to any backend.
+    """
+
+    def __init__(self, output: Union[TextIO, RotatingOutput], close_output: bool = False):
+        self.output = output
+        self.close_output = close_output
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _write(self) -> None:
+        resource = {"attributes": [_attribute("service.name", SERVICE_NAME)]}
+        while True:
+            span = self._queue.get()
+            if span is None:
+                break
+            batch: List[Span] = [span]
+            # Drain whatever else is waiting so a burst of spans becomes one write
+            while len(batch) < 512:
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if span is None:
+                    self._queue.put(None)
+                    break
+                batch.append(span)
+            for span in batch:
+                line = {"resourceSpans": [{
+                    "resource": resource,
+                    "scopeSpans": [{"scope": {"name": "app"}, "spans": [span.to_otlp()]}]
+                }]}
+                self.output.write(json.dumps(line) + "\n")
+            self.output.flush()
+
+    def shutdown(self) -> None:
+        """Write every queued span and stop."""
+        self._queue.put(None)
+        self._thread.join()
+        if self.close_output:
+            self.output.close()
+
+class Tracer:
+    """Holder of the exporter, spans are still timed but not exported while it is None."""
+
+    def __init__(self):
+        self.exporter: Optional[SpanExporter] = None
+
+    def configure(
+        self,
+        exporter: str = "none",
+        path: Optional[str] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5
+    ) -> None:
+        """
+        Choose where spans go.
+
+        Args:
+            exporter: "file" to append to `path`, "stdout", or "none" to drop spans
+            path: File the "file" exporter appends to
+            max_bytes: Size at which the "file" exporter rotates `path`
+            backup_count: Rotated files the "file" exporter keeps
+
+        Raises:
+            ValueError: If the exporter is unknown or "file" is missing its path
+        """
+        self.shutdown()
+        if exporter == "none":
+            return
+        if exporter == "stdout":
+            self.exporter = SpanExporter(sys.stdout)
+        elif exporter == "file":
+            if not path:
+                raise ValueError("The file span exporter needs a path")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.exporter = SpanExporter(RotatingOutput(path, max_bytes, backup_count), close_output=True)
+        else:
+            raise ValueError(f"Unknown span exporter: {exporter}")
+
+    def shutdown(self) -> None:
+        exporter, self.exporter = self.exporter, None
+        if exporter is not None:
+            exporter.shutdown()
+
+tracer = Tracer()
+
+def start_span(name: str, **attributes: Any) -> Span:
+    """Start a span without making it current, for work that ends outside the calling frame."""
+    return Span(name, attributes)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a span nested under the current one."""
+    current = Span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function or coroutine function so every call is a span.
+
+    Args:
+        name: Span name, defaults to the function's qualified name
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -3,6 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from .middleware.correlation import CorrelationMiddleware
 from .core.logger import logger
 from .core.globals import init_globals
+from .core.config import get_settings
+from .core.llm import close_http_client
+from .core.tracing import tracer
+from .services.csv_operations import enable_copy_on_write
+from .services.sandbox_pool import get_sandbox_pool
+from .services.checkpointer import get_checkpointer
+import asyncio
 
 # Create FastAPI app
 app = FastAPI(
@@ -27,8 +34,39 @@ app.add_middleware(CorrelationMiddleware)
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on application startup."""
+    settings = get_settings()
+    logger.configure(
+        level=settings.log_level,
+        component_levels=settings.log_component_levels,
+        max_field_chars=settings.log_max_field_chars,
+        max_message_chars=settings.log_max_message_chars,
+        rate_limits=settings.log_rate_limits
+    )
+    tracer.configure(
+        settings.tracing_exporter,
+        settings.tracing_path,
+        max_bytes=settings.tracing_max_bytes,
+        backup_count=settings.tracing_backup_count
+    )
+    # Searches share the loaded frames through shallow copies, which is only safe with copy-on-write
+    enable_copy_on_write()
     init_globals()
     logger.info("Global services initialized successfully", "main")
+    
+    # Start the sandbox workers and load the dataset in each before the first query
+    if settings.sandbox_workers > 0:
+        await asyncio.to_thread(get_sandbox_pool().warm_up, settings.default_dataset)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the sandbox workers, flush checkpoints and close pooled LLM connections."""
+    settings = get_settings()
+    if settings.sandbox_workers > 0:
+        get_sandbox_pool().close()
+    if settings.checkpoint_enabled:
+        get_checkpointer().close()
+    await close_http_client()
+    tracer.shutdown()
 
 
 
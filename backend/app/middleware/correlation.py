@@ -2,6 +2,7 @@ import uuid
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from app.core.tracing import correlation_id_var, span
 
 class CorrelationMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
@@ -17,8 +18,17 @@ class CorrelationMiddleware(BaseHTTPMiddleware):
         # Add correlation ID to request state
         request.state.correlation_id = correlation_id
         
-        # Process the request
-        response = await call_next(request)
+        # Process the request, everything it starts inherits the correlation ID and the span
+        token = correlation_id_var.set(correlation_id)
+        try:
+            with span(f"{request.method} {request.url.path}", **{
+                "http.method": request.method,
+                "http.route": request.url.path
+            }) as request_span:
+                response = await call_next(request)
+                request_span.set_attribute("http.status_code", response.status_code)
+        finally:
+            correlation_id_var.reset(token)
         
         # Add correlation ID to response headers
         response.headers[self.correlation_id_header] = correlation_id
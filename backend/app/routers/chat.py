@@ -1,17 +1,100 @@
 import uuid
-from fastapi import APIRouter, Request, Depends
+import json
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+from functools import lru_cache
+from fastapi import APIRouter, Request, Depends, Query
+from fastapi.responses import StreamingResponse
 from ..schemas.chat import ChatMessageRequest, ChatMessageResponse, ChatHistoryResponse
 from ..schemas.decomposer import TaskGraph
 from ..services.decomposer import DecomposerService
+from ..services.chat_history import get_chat_history_store
+from ..core.config import get_settings
 from ..core.globals import get_guardrail, get_workflow
 from ..core.logger import logger
+from ..schemas.state import AgentState
 router = APIRouter()
- 
-chat_history: list[ChatMessageResponse] = []
 
-async def get_decomposer_service():
+REJECTED_ANSWER = "I apologize, I couldn't process your request."
+
+@lru_cache()
+def get_decomposer_service() -> DecomposerService:
+    """Get the decomposer shared by every request, it holds no per-request state."""
     return DecomposerService()
 
+async def decompose_if_allowed(query: str, decomposer: DecomposerService) -> Optional[TaskGraph]:
+    """
+    Decompose a query while the input guardrail checks it.
+    
+    Almost every query is accepted, so the decomposition starts speculatively alongside the
+    guardrail instead of after it, and is cancelled if the guardrail rejects the query.
+    
+    Returns:
+        The task graph, or None if the guardrail rejected the query
+    """
+    decomposition = asyncio.create_task(decomposer.decompose_query(query))
+    try:
+        allowed = await get_guardrail().check_input_query(query)
+    except BaseException:
+        decomposition.cancel()
+        await asyncio.gather(decomposition, return_exceptions=True)
+        raise
+    
+    if not allowed:
+        decomposition.cancel()
+        await asyncio.gather(decomposition, return_exceptions=True)
+        logger.info("Speculative decomposition discarded", "chat_router/decompose_if_allowed")
+        return None
+    return await decomposition
+
+def rejected_response(chat_message: ChatMessageRequest, thread_id: str) -> ChatMessageResponse:
+    """Response sent when a message does not pass the input guardrail."""
+    return ChatMessageResponse(
+        id=str(uuid.uuid4()),
+        message=chat_message.message,
+        response=REJECTED_ANSWER,
+        task_graph=None,
+        thread_id=thread_id
+    )
+
+def workflow_input(chat_message: ChatMessageRequest, task_graph: TaskGraph) -> Dict[str, Any]:
+    """Initial workflow state for a decomposed message."""
+    return {
+        "task_graph_id": str(uuid.uuid4()),
+        "task_graph": task_graph,
+        "max_retries": 2,
+        "query_engine": chat_message.engine
+    }
+
+async def final_response(chat_message: ChatMessageRequest, final_state: AgentState, thread_id: str) -> ChatMessageResponse:
+    """Check the final answer against the output guardrail and record the exchange in the history."""
+    answer = await get_guardrail().check_output_query(chat_message.message, final_state)
+    if answer.get("status") == "VALID":
+        logger.info(
+            "Final answer",
+            "chat_router/process_message",
+            extras=lambda: {"task_graph_id": final_state.task_graph_id, "answer": final_state.final_answer}
+        )
+        final_answer = final_state.final_answer
+    else:
+        final_answer = REJECTED_ANSWER
+    
+    response = ChatMessageResponse(
+        id=str(uuid.uuid4()),
+        message=chat_message.message,
+        response=final_answer,
+        task_graph=final_state.task_graph,
+        thread_id=thread_id
+    )
+    
+    # Store in chat history
+    await asyncio.to_thread(get_chat_history_store().append, thread_id, response)
+    return response
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.post("/message", response_model=ChatMessageResponse)
 async def process_message(
     request: Request, 
@@ -20,49 +103,32 @@ async def process_message(
 ) -> ChatMessageResponse:
     """Process a chat message using the workflow"""
     correlation_id = getattr(request.state, 'correlation_id', str(uuid.uuid4()))
+    thread_id = chat_message.thread_id or correlation_id
     
     try:
         # Decompose the message into tasks
         config = {"configurable": {"thread_id": correlation_id}}
-        if not get_guardrail().check_input_query(chat_message.message):
-            return ChatMessageResponse(
-                id=str(uuid.uuid4()),
-                message=chat_message.message,
-                response="I apologize, I couldn't process your request.",
-                task_graph=None
-            )
-        task_graph = await decomposer.decompose_query(chat_message.message)
-        logger.info(f"Initial task graph: {task_graph}", "chat_router/process_message")
-        
-        # Create workflow input
-        workflow_input = {
-            "task_graph_id": str(uuid.uuid4()),
-            "task_graph": task_graph,
-            "max_retries": 2
-        }
+        task_graph = await decompose_if_allowed(chat_message.message, decomposer)
+        if task_graph is None:
+            return rejected_response(chat_message, thread_id)
+        logger.info(
+            "Initial task graph",
+            "chat_router/process_message",
+            extras=lambda: {"tasks": [(task.id, task.subgraph_type.value) for task in task_graph.tasks]}
+        )
         
         # Run workflow
-        final_state = await get_workflow().run_agent(workflow_input, config)
-        logger.info(f"Final state: check completed tasks {final_state}", "chat_router/process_message")
-        
-        # Extract final answer from conversation results
-        final_answer = final_state.final_answer
-        answer = get_guardrail().check_output_query(chat_message.message, final_state)
-        if answer.get("status") == "VALID":
-            logger.info(f"Final answer: {final_state}", "chat_router/process_message")
-            final_answer = final_state.final_answer
-        else:
-            final_answer = "I apologize, I couldn't process your request."
-        # Create response
-        response = ChatMessageResponse(
-            id=str(uuid.uuid4()),
-            message=chat_message.message,
-            response=final_answer,
-            task_graph=final_state.task_graph
+        final_state = await get_workflow().run_agent(workflow_input(chat_message, task_graph), config)
+        logger.info(
+            "Final state",
+            "chat_router/process_message",
+            extras=lambda: {
+                "completed_tasks": {task_id: task.status.value for task_id, task in final_state.completed_tasks.items()},
+                "evidence": len(final_state.collected_evidence)
+            }
         )
         
-        # Store in chat history
-        chat_history.append(response)
+        response = await final_response(chat_message, final_state, thread_id)
         
         logger.info(
             message="Chat message processed successfully",
@@ -82,17 +148,94 @@ async def process_message(
         raise
 
 @router.get("/history", response_model=ChatHistoryResponse)
-async def get_chat_history(request: Request) -> ChatHistoryResponse:
+async def get_chat_history(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Messages per page, defaults to the configured page size"),
+    cursor: Optional[int] = Query(None, ge=1, description="next_cursor of the previous page"),
+    thread_id: Optional[str] = Query(None, description="Only return messages of this conversation")
+) -> ChatHistoryResponse:
     """
-    Retrieve chat history
+    Retrieve one page of chat history, newest page first and oldest message first within a page.
     """
     correlation_id = getattr(request.state, 'correlation_id', None)
+    settings = get_settings()
+    limit = min(limit or settings.chat_history_page_size, settings.chat_history_max_page_size)
+    
+    messages, next_cursor = await asyncio.to_thread(
+        get_chat_history_store().page, limit, cursor, thread_id
+    )
     
     logger.info(
         message="Retrieving chat history",
         component="chat_router",
-        extras={"history_length": len(chat_history)},
+        extras={"page_length": len(messages), "cursor": cursor, "thread_id": thread_id},
         correlation_id=correlation_id
     )
     
-    return ChatHistoryResponse(messages=chat_history)
\ No newline at end of file
+    return ChatHistoryResponse(messages=messages, next_cursor=next_cursor)
+
+@router.post("/stream")
+async def stream_message(
+    request: Request,
+    chat_message: ChatMessageRequest,
+    decomposer: DecomposerService = Depends(get_decomposer_service)
+) -> StreamingResponse:
+    """
+    Process a chat message, streaming progress and the answer as server-sent events.
+    
+    Events, in order: "plan" with the decomposed tasks, "task_started" and "task_finished"
+    as the router moves through them, "token" for each piece of the drafted answer, then
+    "answer" with the final response after the output guardrail, and "done". The answer
+    event is authoritative, it replaces the streamed tokens if citations were added or the
+    output guardrail rejected the draft. Failures are reported as an "error" event.
+    """
+    correlation_id = getattr(request.state, 'correlation_id', str(uuid.uuid4()))
+    thread_id = chat_message.thread_id or correlation_id
+    config = {"configurable": {"thread_id": correlation_id}}
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            task_graph = await decompose_if_allowed(chat_message.message, decomposer)
+            if task_graph is None:
+                yield sse_event("answer", rejected_response(chat_message, thread_id).model_dump(mode="json"))
+                yield sse_event("done", {})
+                return
+            
+            yield sse_event("plan", {
+                "tasks": [
+                    {"task_id": task.id, "task_type": task.subgraph_type.value, "description": task.description}
+                    for task in task_graph.tasks
+                ]
+            })
+            
+            final_state = None
+            async for event in get_workflow().stream_agent(workflow_input(chat_message, task_graph), config):
+                if event["event"] == "final_state":
+                    final_state = event["state"]
+                else:
+                    yield sse_event(event["event"], {key: value for key, value in event.items() if key != "event"})
+            
+            response = await final_response(chat_message, final_state, thread_id)
+            yield sse_event("answer", response.model_dump(mode="json"))
+            yield sse_event("done", {})
+            
+            logger.info(
+                message="Chat message streamed successfully",
+                component="chat_router",
+                extras={"correlation_id": correlation_id}
+            )
+        except Exception as e:
+            logger.error(
+                message="Error streaming chat message",
+                component="chat_router",
+                extras={"error": str(e)},
+                correlation_id=correlation_id
+            )
+            yield sse_event("error", {"error": "I apologize, something went wrong while processing your request."})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
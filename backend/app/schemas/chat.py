@@ -2,18 +2,22 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from .decomposer import TaskGraph
+from .helpers import QueryEngine
 
 class ChatMessageBase(BaseModel):
     message: str = Field(..., description="The content of the chat message")
     
 class ChatMessageRequest(ChatMessageBase):
-    pass
+    engine: Optional[QueryEngine] = Field(None, description="Execution engine for database searches, defaults to the configured engine")
+    thread_id: Optional[str] = Field(None, description="Conversation the message belongs to, defaults to the request's correlation ID")
 
 class ChatMessageResponse(ChatMessageBase):
     id: str = Field(..., description="Unique identifier for the message")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Time when the message was processed")
     response: str = Field(..., description="Response from the backend")
     task_graph: Optional[TaskGraph] = Field(None, description="Task graph generated from the message")
+    thread_id: Optional[str] = Field(None, description="Conversation the message belongs to")
 
 class ChatHistoryResponse(BaseModel):
-    messages: List[ChatMessageResponse] = Field(default_factory=list, description="List of chat messages")
\ No newline at end of file
+    messages: List[ChatMessageResponse] = Field(default_factory=list, description="List of chat messages, oldest first")
+    next_cursor: Optional[int] = Field(None, description="Cursor of the next older page, None on the last page")
\ No newline at end of file
@@ -20,6 +20,10 @@ class ExecutionStatus(str, Enum):
     SAFE = "safe"
     VALID = "valid"
 
+class QueryEngine(str, Enum):
+    PANDAS = "pandas"
+    DUCKDB = "duckdb"
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
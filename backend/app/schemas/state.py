@@ -3,7 +3,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from enum import Enum
 from app.schemas.decomposer import TaskGraph, TaskNode
-from app.schemas.helpers import SubgraphType, ExecutionStatus, TaskStatus
+from app.schemas.helpers import SubgraphType, ExecutionStatus, TaskStatus, QueryEngine
 
 
 class TaskExecutionState(BaseModel):
@@ -17,6 +17,10 @@ class AgentState(BaseModel):
     task_graph_id: str = Field(..., description="Unique identifier for the task graph")
     task_graph: TaskGraph = Field(..., description="Task graph")
     current_task: Optional[TaskExecutionState] = Field(default=None, description="Current task being executed")
+    parallel_tasks: List[TaskExecutionState] = Field(
+        default_factory=list,
+        description="Independent tasks the router scheduled to run concurrently"
+    )
     completed_tasks: Dict[str, TaskExecutionState] = Field(
         default_factory=dict, 
         description="Map of task_id to execution state for completed tasks"
@@ -26,6 +30,7 @@ class AgentState(BaseModel):
         description="Evidence collected during task execution for final response"
     )
     max_retries: int = Field(default=3, description="Maximum number of retries per task")
+    query_engine: Optional[QueryEngine] = Field(default=None, description="Execution engine requested for db_search tasks")
     start_time: datetime = Field(default_factory=datetime.utcnow)
     last_updated: datetime = Field(default_factory=datetime.utcnow)
     db_search_used: bool = Field(default=False, description="Whether the database search was used")
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Measures and dimensions of the common analytic questions
+CUBE_MEASURES = ["Total Sales", "NA Sales", "PAL Sales", "Japan Sales", "Other Sales", "Critic Score"]
+CUBE_DIMENSIONS = ["Console", "Publisher", "Developer", "Release Year"]
+CUBE_ROLLUPS: List[Tuple[str, ...]] = [
+    ("Console",),
+    ("Publisher",),
+    ("Developer",),
+    ("Release Year",),
+    ("Console", "Release Year"),
+    ("Publisher", "Console"),
+]
+CUBE_AGGREGATIONS = ["sum", "mean", "count", "size"]
+
+# Above this share of changed rows a full rebuild is cheaper than applying deltas
+INCREMENTAL_REFRESH_LIMIT = 0.25
+# Below this many rows a full rebuild is faster than the fixed cost of applying deltas
+INCREMENTAL_REFRESH_MIN_ROWS = 50_000
+
+class Rollup:
+    """Additive partial aggregates of every measure for one grouping."""
+
+    def __init__(self, sums: pd.DataFrame, counts: pd.DataFrame, rows: pd.Series):
+        self.sums = sums
+        self.counts = counts
+        self.rows = rows
+
+    @classmethod
+    def build(cls, work: pd.DataFrame, keys: Tuple[str, ...], measures: List[str]) -> "Rollup":
+        grouped = work.groupby(list(keys), sort=True, dropna=True)
+        return cls(grouped[measures].sum(), grouped[measures].count(), grouped.size())
+
+    def apply_delta(self, removed: "Rollup", added: "Rollup") -> "Rollup":
+        """New rollup with the contributions of removed rows taken out and added rows put in."""
+        delta_rows = added.rows.sub(removed.rows, fill_value=0).astype("int64")
+        delta_sums = added.sums.sub(removed.sums, fill_value=0)
+        delta_counts = added.counts.sub(removed.counts, fill_value=0).astype("int64")
+        keys = delta_rows.index
+        
+        # Only groups touched by the delta are written, groups seen for the first time are added empty
+        missing = keys.difference(self.rows.index)
+        if len(missing):
+            rows = pd.concat([self.rows, pd.Series(0, index=missing, dtype="int64")]).sort_index()
+            sums = pd.concat([self.sums, pd.DataFrame(0.0, index=missing, columns=self.sums.columns)]).sort_index()
+            counts = pd.concat([self.counts, pd.DataFrame(0, index=missing, columns=self.counts.columns)]).sort_index()
+        else:
+            rows, sums, counts = self.rows.copy(), self.sums.copy(), self.counts.copy()
+        rows.loc[keys] += delta_rows
+        sums.loc[keys] += delta_sums
+        counts.loc[keys] += delta_counts
+        
+        # Sums of groups left without values are exactly zero, not float residue
+        sums.loc[keys] = sums.loc[keys].mask(counts.loc[keys] == 0, 0.0)
+        dead = keys[(rows.loc[keys] <= 0).to_numpy()]
+        if len(dead):
+            rows, sums, counts = rows.drop(dead), sums.drop(dead), counts.drop(dead)
+        return Rollup(sums, counts, rows)
+
+class AggregateCube:
+    """Materialized rollups of the sales and score measures, answering group-by questions without a scan."""
+
+    def __init__(self, rollups: Dict[Tuple[str, ...], Rollup], measures: List[str]):
+        self._rollups = rollups
+        self.measures = measures
+
+    @staticmethod
+    def _work_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Dimensions as plain values and measures as float64 so partial sums stay exact enough to combine."""
+        work = pd.DataFrame(index=df.index)
+        for dim in CUBE_DIMENSIONS:
+            if dim == "Release Year":
+                if "Release Date" in df.columns:
+                    work[dim] = df["Release Date"].dt.year.astype("Int64")
+            elif dim in df.columns:
+                work[dim] = df[dim].astype(object)
+        for measure in CUBE_MEASURES:
+            if measure in df.columns:
+                work[measure] = df[measure].astype("float64")
+        return work
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "AggregateCube":
+        """Compute every rollup from a frame."""
+        work = cls._work_frame(df)
+        measures = [m for m in CUBE_MEASURES if m in work.columns]
+        rollups = {
+            keys: Rollup.build(work, keys, measures)
+            for keys in CUBE_ROLLUPS if all(key in work.columns for key in keys)
+        }
+        return cls(rollups, measures)
+
+    def refreshed(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> "AggregateCube":
+        """
+        Cube for a frame derived from old_df, applying only the changed rows when possible.
+        
+        Args:
+            old_df: Frame this cube was built from
+            new_df: Frame after the update
+            
+        Returns:
+            This cube if nothing it covers changed, otherwise a new cube
+        """
+        if len(old_df) != len(new_df) or not old_df.index.equals(new_df.index):
+            return AggregateCube.build(new_df)
+        
+        changed = self._changed_rows(old_df, new_df)
+        if changed is None:
+            return AggregateCube.build(new_df)
+        if not changed.any():
+            return self
+        if len(new_df) < INCREMENTAL_REFRESH_MIN_ROWS or changed.mean() > INCREMENTAL_REFRESH_LIMIT:
+            return AggregateCube.build(new_df)
+        
+        # Only the changed rows are re-aggregated, once as they were and once as they are
+        old_work = self._work_frame(old_df[changed])
+        new_work = self._work_frame(new_df[changed])
+        rollups = {}
+        for keys, rollup in self._rollups.items():
+            removed = Rollup.build(old_work, keys, self.measures)
+            added = Rollup.build(new_work, keys, self.measures)
+            rollups[keys] = rollup.apply_delta(removed, added)
+        return AggregateCube(rollups, self.measures)
+
+    @staticmethod
+    def _changed_rows(old_df: pd.DataFrame, new_df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Mask of rows whose cube columns differ, or None if the cube columns themselves changed."""
+        sources = ["Release Date"] + [dim for dim in CUBE_DIMENSIONS if dim != "Release Year"] + CUBE_MEASURES
+        changed = np.zeros(len(new_df), dtype=bool)
+        for col in sources:
+            if (col in old_df.columns) != (col in new_df.columns):
+                return None
+            if col not in new_df.columns:
+                continue
+            old, new = old_df[col], new_df[col]
+            if old.equals(new):
+                continue
+            if isinstance(old.dtype, pd.CategoricalDtype) or isinstance(new.dtype, pd.CategoricalDtype):
+                # Categoricals with different categories cannot be compared directly
+                old, new = old.astype(object), new.astype(object)
+            differs = (old != new) & ~(old.isna() & new.isna())
+            changed |= differs.to_numpy(dtype=bool)
+        return changed
+
+    def rollup(self, measure: str, agg: str = "sum", by: Union[str, Sequence[str]] = "Console") -> pd.Series:
+        """
+        Aggregate a measure by one or more dimensions from the precomputed rollups.
+        
+        Args:
+            measure: Measure column, e.g. "Total Sales"
+            agg: One of "sum", "mean", "count" (non-missing values) or "size" (rows)
+            by: Dimension or tuple of dimensions, "Release Year" is the year of "Release Date"
+            
+        Returns:
+            Series indexed by the dimension values, like df.groupby(by)[measure].agg()
+            
+        Raises:
+            ValueError: If the measure, aggregation or grouping is not materialized
+        """
+        keys = (by,) if isinstance(by, str) else tuple(by)
+        rollup = self._rollups.get(keys)
+        if rollup is None:
+            raise ValueError(f"No rollup for {keys}. Available: {list(self._rollups)}")
+        if measure not in self.measures:
+            raise ValueError(f"Measure is not in the cube: {measure}. Available: {self.measures}")
+        
+        if agg == "sum":
+            result = rollup.sums[measure].copy()
+        elif agg == "count":
+            result = rollup.counts[measure].copy()
+        elif agg == "mean":
+            counts = rollup.counts[measure]
+            result = rollup.sums[measure].where(counts > 0) / counts.where(counts > 0)
+        elif agg == "size":
+            result = rollup.rows.copy()
+        else:
+            raise ValueError(f"Unsupported aggregation: {agg}. Available: {CUBE_AGGREGATIONS}")
+        result.name = measure
+        return result
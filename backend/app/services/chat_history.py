@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from ..core.config import get_settings
+from ..schemas.chat import ChatMessageResponse
+
+class ChatHistoryStore:
+    """
+    Persistent chat history with the most recent messages kept in memory.
+
+    Every message is appended to SQLite under an increasing sequence number, which doubles as
+    the pagination cursor. The last `recent_size` messages are also held in a ring buffer, so
+    the first pages of `/history` are served without touching the database. Only the newest
+    `max_messages` messages are retained.
+    """
+
+    def __init__(self, path: str, recent_size: int = 256, max_messages: int = 100_000):
+        """Open or create the history database and load the most recent messages."""
+        self.path = Path(path)
+        self.recent_size = recent_size
+        self.max_messages = max_messages
+        self.memory_reads = 0
+        self.database_reads = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chat_history (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chat_history_thread ON chat_history (thread_id, seq);
+        """)
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT seq, thread_id, message FROM chat_history ORDER BY seq DESC LIMIT ?", (recent_size,)
+        ).fetchall()
+        self._recent: Deque[Tuple[int, str, ChatMessageResponse]] = deque(
+            ((seq, thread_id, ChatMessageResponse.model_validate_json(message)) for seq, thread_id, message in reversed(rows)),
+            maxlen=recent_size
+        )
+        # Sequence number of the oldest message still stored, anything before it is gone
+        first = self._conn.execute("SELECT MIN(seq) FROM chat_history").fetchone()[0]
+        self._first_seq = first if first is not None else 1
+
+    def append(self, thread_id: str, message: ChatMessageResponse) -> int:
+        """
+        Record a message.
+
+        Args:
+            thread_id: Conversation the message belongs to
+            message: Processed message and its response
+
+        Returns:
+            Sequence number of the message
+        """
+        with self._lock:
+            with self._conn:
+                seq = self._conn.execute(
+                    "INSERT INTO chat_history (thread_id, message) VALUES (?, ?)",
+                    (thread_id, message.model_dump_json())
+                ).lastrowid
+                if seq - self._first_seq >= self.max_messages:
+                    self._first_seq = seq - self.max_messages + 1
+                    self._conn.execute("DELETE FROM chat_history WHERE seq < ?", (self._first_seq,))
+            self._recent.append((seq, thread_id, message))
+        return seq
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+        thread_id: Optional[str] = None
+    ) -> Tuple[List[ChatMessageResponse], Optional[int]]:
+        """
+        Get one page of history, walking back from the newest message.
+
+        Args:
+            limit: Maximum number of messages to return
+            cursor: Only return messages older than this cursor, as returned for the previous page
+            thread_id: Only return messages of this conversation
+
+        Returns:
+            Tuple of (messages in chronological order, cursor of the next older page or None)
+        """
+        with self._lock:
+            rows = self._page_from_memory(limit, cursor, thread_id)
+            if rows is None:
+                self.database_reads += 1
+                conditions, params = [], []
+                if cursor is not None:
+                    conditions.append("seq < ?")
+                    params.append(cursor)
+                if thread_id is not None:
+                    conditions.append("thread_id = ?")
+                    params.append(thread_id)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                rows = [
+                    (seq, ChatMessageResponse.model_validate_json(message))
+                    for seq, message in self._conn.execute(
+                        f"SELECT seq, message FROM chat_history {where} ORDER BY seq DESC LIMIT ?",
+                        params + [limit + 1]
+                    )
+                ]
+            else:
+                self.memory_reads += 1
+
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [message for _, message in reversed(rows[:limit])], next_cursor
+
+    def _page_from_memory(
+        self,
+        limit: int,
+        cursor: Optional[int],
+        thread_id: Optional[str]
+    ) -> Optional[List[Tuple[int, ChatMessageResponse]]]:
+        """
+        Serve a page from the ring buffer, newest first with one extra row to detect more pages.
+
+        Returns:
+            The rows, or None if the page may include messages no longer in the buffer
+        """
+        rows = []
+        for seq, message_thread, message in reversed(self._recent):
+            if cursor is not None and seq >= cursor:
+                continue
+            if thread_id is not None and message_thread != thread_id:
+                continue
+            rows.append((seq, message))
+            if len(rows) > limit:
+                return rows
+        # Short of a full page, the buffer only has the answer if it starts at the oldest message
+        if self._recent and self._recent[0][0] <= self._first_seq:
+            return rows
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM chat_history").fetchone()[0]
+            return {
+                "size": size,
+                "recent": len(self._recent),
+                "memory_reads": self.memory_reads,
+                "database_reads": self.database_reads
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@lru_cache()
+def get_chat_history_store() -> ChatHistoryStore:
+    """Get the process-wide chat history store."""
+    settings = get_settings()
+    return ChatHistoryStore(
+        settings.chat_history_path,
+        recent_size=settings.chat_history_recent_size,
+        max_messages=settings.chat_history_max_messages
+    )
@@ -1,27 +1,38 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from .query_cache import TTLCache
+from ..core.config import get_settings
 
 class CheckpointService:
-    def __init__(self):
-        self.state_checkpoint = {}
-        self.message_checkpoint = {}
+    """
+    In-memory states and messages by ID, bounded in size and age.
+
+    Workflow checkpoints themselves live in the SQLite checkpointer, this only holds small
+    per-request values and forgets the least recently used or expired ones.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        if max_entries is None or ttl_seconds is None:
+            settings = get_settings()
+            max_entries = settings.checkpoint_cache_size if max_entries is None else max_entries
+            ttl_seconds = settings.checkpoint_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.state_checkpoint = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.message_checkpoint = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
 
     def save_state(self, state: Dict[str, Any]):
-        self.state_checkpoint[state["task_graph_id"]] = state
+        self.state_checkpoint.put(state["task_graph_id"], state)
 
-    def get_state(self, task_graph_id: str) -> Dict[str, Any]:
-        return self.state_checkpoint.get(task_graph_id, None)
+    def get_state(self, task_graph_id: str) -> Optional[Dict[str, Any]]:
+        return self.state_checkpoint.get(task_graph_id)[1]
 
     def clear_state(self, task_graph_id: str):
-        self.state_checkpoint[task_graph_id] = None
+        self.state_checkpoint.pop(task_graph_id)
 
     def save_message(self, checkpoint_id: str, message: Dict[str, Any]):
-        if self.message_checkpoint.get(checkpoint_id) is not None:
-            self.message_checkpoint[checkpoint_id].append(message)
-        else:
-            self.message_checkpoint[checkpoint_id] = [message]
+        found, messages = self.message_checkpoint.get(checkpoint_id)
+        self.message_checkpoint.put(checkpoint_id, (messages if found else []) + [message])
 
-    def get_message(self, id: str) -> Dict[str, Any]:
-        return self.message_checkpoint.get(id, None)
+    def get_message(self, id: str) -> Optional[List[Dict[str, Any]]]:
+        return self.message_checkpoint.get(id)[1]
 
     def clear_message(self, id: str):
-        self.message_checkpoint[id] = None
\ No newline at end of file
+        self.message_checkpoint.pop(id)
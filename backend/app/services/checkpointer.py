@@ -0,0 +1,367 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from ..core.config import get_settings
+from ..core.logger import logger
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer that keeps workflow checkpoints in SQLite.
+
+    Checkpoints are buffered in memory and written in one transaction once `batch_size` of them
+    are pending, or by a background thread every `flush_interval_seconds`, so a workflow step
+    never waits on the disk. Reads flush first and always see every checkpoint put before them.
+    Threads whose last checkpoint is older than `ttl_seconds` are deleted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400.0,
+        batch_size: int = 32,
+        flush_interval_seconds: float = 0.5
+    ):
+        """Open or create the checkpoint database and start the flusher thread."""
+        # Task results may hold objects msgpack cannot encode, e.g. rows returned by a search
+        super().__init__(serde=JsonPlusSerializer(pickle_fallback=True))
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._checkpoints: List[Tuple[Any, ...]] = []
+        self._writes: List[Tuple[bool, Tuple[Any, ...]]] = []
+        self._lock = threading.RLock()
+        self._last_eviction = time.monotonic()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                checkpoint_type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (thread_id, created_at);
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                value_type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+        """)
+        self._conn.commit()
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="checkpoint-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+                if time.monotonic() - self._last_eviction >= min(self.ttl_seconds, 60.0):
+                    self.evict_expired()
+            except sqlite3.Error as e:
+                logger.error(
+                    message="Failed to flush checkpoints",
+                    component="checkpointer",
+                    extras={"error": str(e)}
+                )
+
+    def flush(self) -> None:
+        """Write every buffered checkpoint and write in one transaction."""
+        with self._lock:
+            if not self._checkpoints and not self._writes:
+                return
+            # The buffers are only emptied once the transaction commits, a failed flush is retried
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                    "parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._checkpoints
+                )
+                for replace, row in self._writes:
+                    self._conn.execute(
+                        f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO writes (thread_id, checkpoint_ns, "
+                        "checkpoint_id, task_id, idx, channel, value_type, value, task_path) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        row
+                    )
+            self._checkpoints = []
+            self._writes = []
+
+    def _flush_if_full(self) -> None:
+        if len(self._checkpoints) + len(self._writes) >= self.batch_size:
+            self.flush()
+
+    def evict_expired(self) -> int:
+        """
+        Delete the threads whose last checkpoint is older than the TTL.
+
+        Returns:
+            Number of threads deleted
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._last_eviction = time.monotonic()
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)
+            )]
+            with self._conn:
+                for thread_id in expired:
+                    self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                    self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        if expired:
+            logger.info(
+                message="Evicted expired checkpoints",
+                component="checkpointer",
+                extras={"threads": len(expired)}
+            )
+        return len(expired)
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple[Any, ...]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata = row
+        writes = self._conn.execute(
+            "SELECT task_id, channel, value_type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id
+            }},
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id
+                }}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ]
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Get a checkpoint of a thread.
+
+        Args:
+            config: Config naming the thread, and optionally the checkpoint ID
+
+        Returns:
+            The requested checkpoint, the latest one if no ID is given, or None
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        with self._lock:
+            self.flush()
+            if checkpoint_id:
+                row = self._conn.execute(query + " AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self._conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, optionally of one thread and matching metadata values."""
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, "
+                f"checkpoint, metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params
+            ).fetchall()
+            results = []
+            for row in rows:
+                found = self._tuple(row[0], row[1], row[2:])
+                if filter and not all(found.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                results.append(found)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        """Buffer a checkpoint, returning the config that points at it."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._checkpoints.append((
+                thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                checkpoint_type, serialized, metadata_type, serialized_metadata, time.time()
+            ))
+            self._flush_if_full()
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        """Buffer the writes a task made on top of a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes, e.g. errors and interrupts, replace earlier ones, regular writes are kept once
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, serialized = self.serde.dumps_typed(value)
+            rows.append((replace, (
+                thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                channel, value_type, serialized, task_path
+            )))
+        with self._lock:
+            self._writes.extend(rows)
+            self._flush_if_full()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread."""
+        with self._lock:
+            self.flush()
+            with self._conn:
+                self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    # Buffered puts only touch memory, but a full buffer or a read goes to disk
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for result in results:
+            yield result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            threads, checkpoints = self._conn.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*) FROM checkpoints"
+            ).fetchone()
+            return {
+                "threads": threads,
+                "checkpoints": checkpoints,
+                "pending": len(self._checkpoints) + len(self._writes)
+            }
+
+    def close(self) -> None:
+        """Stop the flusher thread and write what is still buffered."""
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+@lru_cache()
+def get_checkpointer() -> SQLiteCheckpointer:
+    """Get the process-wide workflow checkpointer."""
+    settings = get_settings()
+    return SQLiteCheckpointer(
+        settings.checkpoint_path,
+        ttl_seconds=settings.checkpoint_ttl_seconds,
+        batch_size=settings.checkpoint_batch_size,
+        flush_interval_seconds=settings.checkpoint_flush_interval_seconds
+    )
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ..core.config import get_settings
+from ..core.logger import logger
+
+# Filler words that never change what a question asks for, near-duplicate matching ignores them
+STOPWORDS = frozenset({
+    "a", "an", "the", "me", "my", "i", "you", "we", "us", "please", "can", "could", "would",
+    "will", "show", "list", "give", "tell", "find", "get", "display", "return", "what", "which",
+    "are", "is", "was", "were", "be", "do", "does", "of", "for", "in", "on", "to", "and", "all",
+    "there", "some", "any", "about", "that", "this", "these", "those", "with", "from", "by"
+})
+
+# Comparison symbols NFKC leaves alone, spelled the ASCII way
+COMPARISON_SYMBOLS = str.maketrans({"≤": "<=", "≥": ">=", "≠": "!="})
+COMPARISON_OPERATOR = re.compile(r"[<>!=]=|[<>=]")
+
+# Words that give the numbers around them their meaning, their order matters as much as the numbers'
+COMPARISON_WORDS = frozenset({
+    "more", "less", "greater", "fewer", "than", "above", "below", "over", "under", "least", "most",
+    "before", "after", "since", "until", "between", "top", "bottom", "highest", "lowest", "not"
+})
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase a question and reduce it to words, numbers and comparison operators separated
+    by single spaces, so "score > 8" and "score < 8" stay different questions.
+    """
+    query = unicodedata.normalize("NFKC", query).lower().translate(COMPARISON_SYMBOLS)
+    query = COMPARISON_OPERATOR.sub(lambda m: f" {m.group(0)} ", query)
+    query = re.sub(r"[^\w.<>!=]+|!(?!=)|(?<!\d)\.|\.(?!\d)", " ", query)
+    return " ".join(query.split())
+
+def _stem(token: str) -> str:
+    """Strip a plural 's' so "games" and "game" count as the same word."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and not token[-2].isdigit():
+        return token[:-1]
+    return token
+
+def _content_tokens(normalized: str) -> List[str]:
+    return [_stem(token) for token in normalized.split() if token not in STOPWORDS]
+
+def _anchors(normalized: str) -> List[str]:
+    """Numbers, comparison operators and comparison words of a normalized question, in order."""
+    return [
+        token for token in normalized.split()
+        if token in COMPARISON_WORDS or COMPARISON_OPERATOR.fullmatch(token) or token[0].isdigit()
+    ]
+
+def query_signature(normalized: str) -> str:
+    """
+    Describe what a question asks for, regardless of filler words and the order of other words.
+
+    Two questions are only ever matched as near-duplicates if their signatures are equal. The
+    signature holds every content word, so questions that differ in an entity ("Sony" vs
+    "Nintendo") or a number ("top 5" vs "top 10") never match. It also holds the numbers and
+    comparisons in order, so "more than 5 ... less than 2" never matches "more than 2 ... less
+    than 5", nor "after 2010" matches "before 2010".
+    """
+    return " ".join(sorted(set(_content_tokens(normalized)))) + " | " + " ".join(_anchors(normalized))
+
+def similarity(a: str, b: str) -> float:
+    """
+    Cosine similarity of the words and word pairs of two normalized questions.
+
+    Word pairs keep order significant, "Sony outsold Nintendo" and "Nintendo outsold Sony"
+    share every word but not a single pair.
+    """
+    def features(normalized: str) -> Counter:
+        tokens = _content_tokens(normalized)
+        return Counter(tokens) + Counter(zip(tokens, tokens[1:]))
+
+    fa, fb = features(a), features(b)
+    dot = sum(count * fb[feature] for feature, count in fa.items())
+    norm = math.sqrt(sum(c * c for c in fa.values())) * math.sqrt(sum(c * c for c in fb.values()))
+    return dot / norm if norm else 0.0
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def _params_hash(params: Optional[Dict[str, Any]]) -> str:
+    return _hash(json.dumps(params or {}, sort_keys=True, default=str))
+
+def codegen_fingerprint(*parts: Any) -> str:
+    """Hash everything generated code depends on besides the question, e.g. prompts, model and schema."""
+    return _hash(json.dumps(parts, sort_keys=True, default=str))
+
+class CodegenCache:
+    """
+    Persistent cache from natural-language questions to the code generated for them.
+
+    Entries are keyed by the normalized question, the task parameters and a fingerprint of the
+    prompts and dataset schema. A lookup first tries the exact question, then near-duplicates
+    with the same signature whose similarity reaches the threshold.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, similarity_threshold: float = 0.8):
+        """Open or create the cache database."""
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS codegen_cache (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                query TEXT NOT NULL,
+                code TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS codegen_cache_signature
+                ON codegen_cache (namespace, fingerprint, params_hash, signature);
+            CREATE INDEX IF NOT EXISTS codegen_cache_last_used ON codegen_cache (last_used);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _key(namespace: str, fingerprint: str, normalized: str, params_hash: str) -> str:
+        return _hash("\0".join((namespace, fingerprint, params_hash, normalized)))
+
+    def get(self, namespace: str, fingerprint: str, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look up the code generated for a question.
+
+        Args:
+            namespace: Kind of code, e.g. the query engine it was generated for
+            fingerprint: Current fingerprint of the prompts and schema
+            query: Natural-language question
+            params: Task parameters the code was generated with
+
+        Returns:
+            The cached code, or None on a miss
+        """
+        normalized = normalize_query(query)
+        params_hash = _params_hash(params)
+        key = self._key(namespace, fingerprint, normalized, params_hash)
+        with self._lock:
+            row = self._conn.execute("SELECT code FROM codegen_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self._touch(key)
+                return row[0]
+
+            candidates = self._conn.execute(
+                "SELECT key, query, code FROM codegen_cache "
+                "WHERE namespace = ? AND fingerprint = ? AND params_hash = ? AND signature = ?",
+                (namespace, fingerprint, params_hash, query_signature(normalized))
+            ).fetchall()
+            scored = [(similarity(normalized, candidate[1]), candidate) for candidate in candidates]
+            score, best = max(scored, key=lambda s: s[0], default=(0.0, None))
+            if best is not None and score >= self.similarity_threshold:
+                self.near_hits += 1
+                self._touch(best[0])
+                return best[2]
+
+            self.misses += 1
+            return None
+
+    def _touch(self, key: str) -> None:
+        self._conn.execute(
+            "UPDATE codegen_cache SET hits = hits + 1, last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+
+    def put(self, namespace: str, fingerprint: str, query: str, params: Optional[Dict[str, Any]], code: str) -> None:
+        """Store code that ran successfully for a question, evicting the least recently used entries."""
+        normalized = normalize_query(query)
+        params_hash = _params_hash(params)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO codegen_cache "
+                "(key, namespace, fingerprint, params_hash, signature, query, code, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET code = excluded.code, last_used = excluded.last_used",
+                (
+                    self._key(namespace, fingerprint, normalized, params_hash), namespace, fingerprint,
+                    params_hash, query_signature(normalized), normalized, code, now, now
+                )
+            )
+            self._conn.execute(
+                "DELETE FROM codegen_cache WHERE key IN ("
+                "SELECT key FROM codegen_cache ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def invalidate(self, namespace: str, fingerprint: str, query: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Drop every entry that could be served for a question, e.g. after its code failed."""
+        normalized = normalize_query(query)
+        params_hash = _params_hash(params)
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM codegen_cache WHERE namespace = ? AND fingerprint = ? AND params_hash = ? AND signature = ?",
+                (namespace, fingerprint, params_hash, query_signature(normalized))
+            )
+            self._conn.commit()
+
+    def purge_stale(self, namespace: str, fingerprint: str) -> int:
+        """
+        Delete the entries of a namespace generated under another prompt or schema.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM codegen_cache WHERE namespace = ? AND fingerprint != ?", (namespace, fingerprint)
+            ).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(
+                message="Purged stale generated code",
+                component="codegen_cache",
+                extras={"namespace": namespace, "entries": deleted}
+            )
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM codegen_cache").fetchone()[0]
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            "size": size
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@lru_cache()
+def get_codegen_cache() -> CodegenCache:
+    """Get the process-wide code generation cache."""
+    settings = get_settings()
+    return CodegenCache(
+        settings.codegen_cache_path,
+        max_entries=settings.codegen_cache_max_entries,
+        similarity_threshold=settings.codegen_cache_similarity
+    )
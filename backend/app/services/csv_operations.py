@@ -2,15 +2,83 @@ import pandas as pd
 import numpy as np
 import ast
 import re
+import os
+import json
+import hashlib
+import threading
+from types import CodeType
 from typing import Dict, Any, Optional, List, Union
 from pathlib import Path
 from ..core.logger import logger
+from ..core.tracing import traced
+from .query_cache import CompiledCode, CompiledCodeCache, ResultCache, normalize_code
+from .indexes import DatasetIndexes
+from .aggregates import AggregateCube
+from .delta_log import DeltaLog
+from .snapshots import DatasetSnapshot, SnapshotStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # The Parquet sidecar is optional, we fall back to parsing the CSV
+    pa = None
+    pq = None
+
+def enable_copy_on_write() -> None:
+    """
+    Turn on pandas copy-on-write for the whole process.
+    
+    Generated code and cached results are handed shallow copies of shared frames, columns are
+    only copied once something writes to them. Without copy-on-write those writes would reach
+    the shared frame. The option is global and not thread-safe to toggle, so it is set once at
+    startup by each process running searches, never scoped around single calls.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+# Declared schema for the games dataset, applied once at load time
+CATEGORICAL_COLUMNS = ["Console", "Publisher", "Developer"]
+FLOAT_COLUMNS = [
+    "Critic Score", "User Score", "VGChartz Score", "Total Sales", "Total Shipped",
+    "Japan Sales", "NA Sales", "PAL Sales", "Other Sales"
+]
+DATE_COLUMNS = ["Release Date", "Last Update"]
+DATE_FORMAT = "%d-%m-%Y"
+
+# Bump whenever the declared schema changes so stale sidecars are rebuilt
+SCHEMA_VERSION = 1
+SIDECAR_METADATA_KEY = b"csv_operations.source"
+
+# Delta log size at which it is folded back into the CSV in the background
+COMPACT_AFTER_ENTRIES = 100
+COMPACT_AFTER_BYTES = 1024 * 1024
 
 class CSVOperations:
-    def __init__(self, csv_path: str):
-        """Initialize with path to CSV file."""
+    def __init__(self, csv_path: str, read_only: bool = False):
+        """
+        Initialize with path to CSV file.
+        
+        Args:
+            csv_path: Path to the dataset CSV
+            read_only: Never write the CSV, its sidecar or its delta log, e.g. in sandbox workers
+                that load a dataset another process writes to
+        """
         self.csv_path = Path(csv_path)
-        self.df = self._load_csv()
+        self.read_only = read_only
+        self.sidecar_path = self.csv_path.with_suffix(".parquet")
+        self.delta_log = DeltaLog(self.csv_path.with_suffix(".wal"), read_only=read_only)
+        # Updates are serialized, compaction runs in the background on its own lock.
+        # Searches take no lock at all, they read from an immutable snapshot
+        self._write_lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+        df = self._replay_delta_log(self._load_csv())
+        self.snapshots = SnapshotStore(DatasetSnapshot(
+            version=0,
+            df=df,
+            indexes=DatasetIndexes(df),
+            cube=AggregateCube.build(df),
+            lsn=self.delta_log.last_lsn
+        ))
         
         # Security whitelist
         self.allowed_modules = {
@@ -21,15 +89,70 @@ class CSVOperations:
             'sum', 'min', 'max', 'abs', 'round', 'sorted', 'enumerate',
             'range', 'zip', 'any', 'all'
         }
+        # Restricted builtins are the same for every call, build them once
+        self._safe_builtins = {
+            name: func for name, func in __builtins__.items()
+            if isinstance(func, type) or name in self.allowed_functions
+        } if isinstance(__builtins__, dict) else {
+            name: getattr(__builtins__, name) for name in dir(__builtins__)
+            if not name.startswith('_') and (
+                isinstance(getattr(__builtins__, name), type) or 
+                name in self.allowed_functions
+            )
+        }
         
+        # Generated snippets repeat heavily, keep their compiled form and validation verdict
+        self.code_cache = CompiledCodeCache()
+        # Results of searches, keyed by dataset version so updates never serve stale data
+        self.result_cache = ResultCache()
+        
+    def snapshot(self) -> DatasetSnapshot:
+        """Pin the latest committed version of the dataset."""
+        return self.snapshots.current
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.snapshots.current.df
+
+    @property
+    def indexes(self) -> DatasetIndexes:
+        return self.snapshots.current.indexes
+
+    @property
+    def cube(self) -> AggregateCube:
+        return self.snapshots.current.cube
+
+    @property
+    def version(self) -> int:
+        """Bumped on every successful update so callers can tell dataset states apart."""
+        return self.snapshots.current.version
+
+    @traced("csv.load")
     def _load_csv(self) -> pd.DataFrame:
-        """Load CSV file and handle initial data cleaning."""
+        """
+        Load the typed DataFrame, reusing the Parquet sidecar while the CSV is unchanged.
+        
+        Returns:
+            DataFrame with the declared schema applied
+        """
         try:
-            df = pd.read_csv(self.csv_path)
+            fingerprint = self._source_fingerprint()
+            df = self._read_sidecar(fingerprint)
+            source = "sidecar"
+            if df is None:
+                df = self._read_typed_csv()
+                source = "csv"
+                if not self.read_only:
+                    self._write_sidecar(df, fingerprint)
             logger.info(
                 message="CSV file loaded successfully",
                 component="csv_operations",
-                extras={"rows": len(df), "columns": list(df.columns)}
+                extras={
+                    "rows": len(df),
+                    "columns": list(df.columns),
+                    "source": source,
+                    "memory_bytes": int(df.memory_usage(deep=True).sum())
+                }
             )
             return df
         except Exception as e:
@@ -40,21 +163,281 @@ class CSVOperations:
             )
             raise
 
-    def _validate_code(self, code: str) -> None:
+    def _read_typed_csv(self) -> pd.DataFrame:
+        """Parse the CSV applying the declared column types."""
+        columns = set(pd.read_csv(self.csv_path, nrows=0).columns)
+        dtypes = {col: "category" for col in CATEGORICAL_COLUMNS if col in columns}
+        dtypes.update({col: "float32" for col in FLOAT_COLUMNS if col in columns})
+        return pd.read_csv(
+            self.csv_path,
+            dtype=dtypes,
+            parse_dates=[col for col in DATE_COLUMNS if col in columns],
+            date_format=DATE_FORMAT
+        )
+
+    def _source_fingerprint(self, path: Optional[Path] = None) -> Dict[str, Any]:
+        """Describe the CSV file, or a file about to replace it, so a sidecar can be matched against it."""
+        stat = (path or self.csv_path).stat()
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size
+        }
+
+    def _source_hash(self, path: Optional[Path] = None) -> str:
+        """SHA-256 of the CSV contents, used when the mtime alone does not match."""
+        digest = hashlib.sha256()
+        with open(path or self.csv_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _matches_source(self, stored: Dict[str, Any], fingerprint: Dict[str, Any]) -> bool:
+        """Check whether a stored fingerprint describes the current CSV contents."""
+        if (stored.get("mtime_ns"), stored.get("size")) == (fingerprint["mtime_ns"], fingerprint["size"]):
+            return True
+        # The file was touched, it still matches if the contents are identical
+        return stored.get("size") == fingerprint["size"] and stored.get("sha256") == self._source_hash()
+
+    def _read_sidecar(self, fingerprint: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Read the Parquet sidecar if it was built from the current CSV.
+        
+        Args:
+            fingerprint: Current fingerprint of the CSV file
+            
+        Returns:
+            The typed DataFrame, or None if the sidecar is missing or stale
+        """
+        if pq is None or not self.sidecar_path.exists():
+            return None
+        try:
+            metadata = pq.read_schema(self.sidecar_path).metadata or {}
+            stored = json.loads(metadata.get(SIDECAR_METADATA_KEY, b"{}"))
+            if stored.get("schema_version") != fingerprint["schema_version"]:
+                return None
+            if not self._matches_source(stored, fingerprint):
+                return None
+            return pd.read_parquet(self.sidecar_path)
+        except Exception as e:
+            logger.warning(
+                message="Ignoring unreadable sidecar",
+                component="csv_operations",
+                extras={"path": str(self.sidecar_path), "error": str(e)}
+            )
+            return None
+
+    def _write_sidecar(self, df: pd.DataFrame, fingerprint: Dict[str, Any]) -> None:
+        """Persist the typed DataFrame next to the CSV, tagged with the CSV fingerprint."""
+        if pa is None:
+            return
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            source = dict(fingerprint, sha256=self._source_hash())
+            metadata = dict(table.schema.metadata or {})
+            metadata[SIDECAR_METADATA_KEY] = json.dumps(source).encode()
+            table = table.replace_schema_metadata(metadata)
+            
+            # Write to a temporary file first so readers never see a partial sidecar
+            tmp_path = self.sidecar_path.with_suffix(".parquet.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, self.sidecar_path)
+        except Exception as e:
+            logger.warning(
+                message="Could not write sidecar",
+                component="csv_operations",
+                extras={"path": str(self.sidecar_path), "error": str(e)}
+            )
+
+    def _replay_delta_log(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the changes committed since the CSV was last written.
+        
+        Args:
+            df: Frame loaded from the CSV or its sidecar
+            
+        Returns:
+            Frame with every logged change applied
+        """
+        header, entries = self.delta_log.read()
+        fingerprint = self._source_fingerprint()
+        pending = (header or {}).get("pending")
+        if pending is not None and self._matches_source(pending, fingerprint):
+            # A compaction crashed after replacing the CSV, which already holds the entries up to its lsn
+            entries = [entry for entry in entries if entry["lsn"] > pending["lsn"]]
+            if not self.read_only:
+                base = {key: value for key, value in pending.items() if key != "lsn"}
+                self.delta_log.reset(base, keep_after=pending["lsn"])
+        elif header is None or not self._matches_source(header.get("base", {}), fingerprint):
+            if self.read_only:
+                # The writer is between rewriting the CSV and resetting the log
+                return df
+            if entries:
+                # The CSV was replaced by something other than a compaction
+                logger.warning(
+                    message="Discarding delta log written for another version of the CSV",
+                    component="csv_operations",
+                    extras={"path": str(self.delta_log.path), "entries": len(entries)}
+                )
+            self.delta_log.reset(dict(fingerprint, sha256=self._source_hash()))
+            return df
+        
+        for entry in entries:
+            df = self._apply_changes(df, entry["changes"])
+        if entries:
+            logger.info(
+                message="Delta log replayed",
+                component="csv_operations",
+                extras={"entries": len(entries), "last_lsn": self.delta_log.last_lsn}
+            )
+        return df
+
+    @staticmethod
+    def _encode_value(value: Any) -> Any:
+        """Convert a cell value to JSON for the delta log."""
+        if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.isoformat()
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    @staticmethod
+    def _decode_values(values: List[Any], dtype: Any) -> List[Any]:
+        """Convert logged JSON values back to the dtype of their column."""
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return [pd.NaT if value is None else pd.Timestamp(value) for value in values]
+        if pd.api.types.is_float_dtype(dtype):
+            return [np.nan if value is None else float(value) for value in values]
+        return [np.nan if value is None else value for value in values]
+
+    def _diff(self, old: pd.DataFrame, new: pd.DataFrame) -> Optional[Dict[str, List[List[Any]]]]:
+        """
+        Cell-level changes turning old into new.
+        
+        Returns:
+            Mapping of column to [row positions, new values], or None if the change is structural
+            (rows, columns or dtypes changed) and cannot be expressed as cell updates
+        """
+        if list(old.columns) != list(new.columns) or not old.index.equals(new.index):
+            return None
+        
+        changes = {}
+        for col in new.columns:
+            before, after = old[col], new[col]
+            categorical = isinstance(before.dtype, pd.CategoricalDtype) and isinstance(after.dtype, pd.CategoricalDtype)
+            if before.dtype != after.dtype and not categorical:
+                return None
+            if before.equals(after):
+                continue
+            if categorical:
+                # Categoricals with different categories cannot be compared directly
+                before, after = before.astype(object), after.astype(object)
+            differs = (before != after) & ~(before.isna() & after.isna())
+            positions = np.flatnonzero(differs.to_numpy(dtype=bool))
+            if len(positions):
+                changes[col] = [
+                    positions.tolist(),
+                    [self._encode_value(value) for value in after.iloc[positions]]
+                ]
+        return changes
+
+    def _apply_changes(self, df: pd.DataFrame, changes: Dict[str, List[List[Any]]]) -> pd.DataFrame:
+        """Apply cell-level changes from the delta log to a frame, without touching the original."""
+        df = df.copy(deep=False)
+        for col, (positions, values) in changes.items():
+            series = df[col]
+            values = self._decode_values(values, series.dtype)
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                new_categories = {value for value in values if isinstance(value, str)} - set(series.cat.categories)
+                if new_categories:
+                    series = series.cat.add_categories(sorted(new_categories))
+            series = series.copy()
+            series.iloc[positions] = values
+            df[col] = series
+        return df
+
+    def _save_csv(self) -> None:
+        """Write the current DataFrame to the CSV and start the delta log over."""
+        self.compact()
+
+    @traced("csv.compact")
+    def compact(self) -> None:
+        """
+        Fold the delta log into the CSV and the sidecar.
+        
+        Updates may keep landing while the CSV is written, their entries stay in the log.
+        
+        Raises:
+            ValueError: If the dataset was opened read-only
+        """
+        if self.read_only:
+            raise ValueError(f"Dataset {self.csv_path.stem} is opened read-only")
+        with self._compact_lock:
+            # The snapshot holds exactly the changes up to its lsn, later ones stay in the log
+            snapshot = self.snapshot()
+            df, lsn = snapshot.df, snapshot.lsn
+            
+            # Write to a temporary file first so a crash never leaves a partial CSV
+            tmp_path = self.csv_path.with_suffix(".csv.tmp")
+            df.to_csv(tmp_path, index=False, date_format=DATE_FORMAT)
+            
+            # Announce the new CSV in the log before swapping it in: whichever file a crash leaves
+            # behind, replay finds a header describing it and knows which entries it still needs
+            header, _ = self.delta_log.read()
+            pending = dict(self._source_fingerprint(tmp_path), sha256=self._source_hash(tmp_path), lsn=lsn)
+            self.delta_log.reset(header["base"], keep_after=0, pending=pending)
+            os.replace(tmp_path, self.csv_path)
+            
+            fingerprint = self._source_fingerprint()
+            self._write_sidecar(df, fingerprint)
+            self.delta_log.reset(dict(fingerprint, sha256=self._source_hash()), keep_after=lsn)
+            
+            logger.info(
+                message="Delta log compacted",
+                component="csv_operations",
+                extras={"lsn": lsn, "remaining_entries": self.delta_log.entry_count}
+            )
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(
+                message="Error compacting delta log",
+                component="csv_operations",
+                extras={"error": str(e)}
+            )
+        finally:
+            self._compacting = False
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once the delta log has grown large enough."""
+        if self._compacting:
+            return
+        if self.delta_log.entry_count < COMPACT_AFTER_ENTRIES and self.delta_log.size_bytes() < COMPACT_AFTER_BYTES:
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact_in_background, name="csv-compaction", daemon=True).start()
+
+    def _validate_code(self, code: str, tree: Optional[ast.AST] = None) -> None:
         """
         Validate generated pandas code for security and syntax.
         
         Args:
             code: Generated pandas code to validate
+            tree: Already parsed AST of the code, parsed here if not given
             
         Raises:
             ValueError: If code fails validation
         """
-        try:
-            # Parse code into AST for analysis
-            tree = ast.parse(code)
-        except SyntaxError as e:
-            raise ValueError(f"Syntax error in generated code: {str(e)}")
+        if tree is None:
+            try:
+                # Parse code into AST for analysis
+                tree = ast.parse(code)
+            except SyntaxError as e:
+                raise ValueError(f"Syntax error in generated code: {str(e)}")
         
         # Security validation
         for node in ast.walk(tree):
@@ -93,33 +476,99 @@ class CSVOperations:
             if re.search(pattern, code, re.IGNORECASE):
                 raise ValueError(f"Dangerous pattern detected: {pattern}")
 
-    def _execute_pandas_code(self, code: str) -> Any:
+    def _compile(self, code: str, validate: bool = False) -> CodeType:
+        """
+        Compile generated code, reusing the cached code object for repeated snippets.
+        
+        Args:
+            code: Generated pandas code to compile
+            validate: Whether the security validation verdict must be enforced
+            
+        Returns:
+            Compiled code object ready for exec
+            
+        Raises:
+            ValueError: If the code has a syntax error or fails validation
+        """
+        entry = self.code_cache.get(code)
+        if entry is None:
+            normalized = normalize_code(code)
+            try:
+                # Parse once, the tree is shared by validation and compilation
+                tree = ast.parse(normalized)
+            except SyntaxError as e:
+                entry = CompiledCode(code=None, syntax_error=f"Syntax error in generated code: {str(e)}")
+            else:
+                try:
+                    self._validate_code(normalized, tree)
+                    validation_error = None
+                except ValueError as e:
+                    validation_error = str(e)
+                entry = CompiledCode(
+                    code=compile(tree, "<generated>", "exec"),
+                    validation_error=validation_error
+                )
+            self.code_cache.put(code, entry)
+        
+        if entry.syntax_error:
+            raise ValueError(entry.syntax_error)
+        if validate and entry.validation_error:
+            raise ValueError(entry.validation_error)
+        return entry.code
+
+    def _writable_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Shallow copy of the frame whose categorical columns accept values outside their categories."""
+        df = df.copy(deep=False)
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+        return df
+
+    def _restore_categoricals(self, base: pd.DataFrame, result: pd.DataFrame) -> pd.DataFrame:
+        """Turn categorical columns written by update code back into categoricals, keeping existing codes."""
+        result = result.copy(deep=False)
+        for col in CATEGORICAL_COLUMNS:
+            if col not in result.columns or result[col].dtype != object:
+                continue
+            current = base[col].dtype.categories if col in base.columns and isinstance(base[col].dtype, pd.CategoricalDtype) else pd.Index([])
+            added = pd.Index(result[col].dropna().unique()).difference(current)
+            result[col] = result[col].astype(pd.CategoricalDtype(current.append(added)))
+        return result
+
+    @traced("csv.execute_code")
+    def _execute_pandas_code(
+        self,
+        code: str,
+        compiled: Optional[CodeType] = None,
+        writable: bool = False,
+        snapshot: Optional[DatasetSnapshot] = None
+    ) -> Any:
         """
         Execute pandas code in a restricted environment.
         
         Args:
             code: Validated pandas code to execute
+            compiled: Compiled form of the code, compiled from the cache if not given
+            writable: Let the code write new values into categorical columns
+            snapshot: Dataset version to run against, the latest one if not given
             
         Returns:
             Result of code execution
         """
+        snapshot = snapshot or self.snapshot()
+        base, indexes, cube = snapshot.df, snapshot.indexes, snapshot.cube
+        
         # Create restricted global environment
         safe_globals = {
-            '__builtins__': {
-                name: func for name, func in __builtins__.items()
-                if isinstance(func, type) or name in self.allowed_functions
-            } if isinstance(__builtins__, dict) else {
-                name: getattr(__builtins__, name) for name in dir(__builtins__)
-                if not name.startswith('_') and (
-                    isinstance(getattr(__builtins__, name), type) or 
-                    name in self.allowed_functions
-                )
-            },
+            '__builtins__': self._safe_builtins,
             'pd': pd,
             'np': np,
             'pandas': pd,
             'numpy': np,
-            'df': self.df.copy(),  # Use a copy for safety
+            'df': self._writable_frame(base) if writable else base.copy(deep=False),  # Writes are isolated by copy-on-write
+            'lookup': lambda column, values, case=True: indexes.rows(base, column, values, case),
+            'contains': lambda column, text, case=False: indexes.rows_containing(base, column, text, case),
+            'rollup': cube.rollup,
             'len': len,
             'str': str,
             'int': int,
@@ -137,9 +586,12 @@ class CSVOperations:
         }
         
         try:
+            if compiled is None:
+                compiled = self._compile(code)
+            
             # Execute code with restricted globals
             local_vars = {}
-            exec(code, safe_globals, local_vars)
+            exec(compiled, safe_globals, local_vars)
             
             # Return the result (should be stored in 'result' variable)
             if 'result' not in local_vars:
@@ -150,6 +602,7 @@ class CSVOperations:
         except Exception as e:
             raise ValueError(f"Code execution failed: {str(e)}\nCode: {code}")
 
+    @traced("csv.search")
     def search(self, pandas_code: str) -> Any:
         """
         Execute pandas code for searching/querying the DataFrame.
@@ -161,18 +614,27 @@ class CSVOperations:
             Query results
         """
         try:
-            # Validate the code
-            # self._validate_code(pandas_code)
+            # Pin one version for the whole search, updates landing meanwhile are not seen
+            snapshot = self.snapshot()
             
-            # Execute the code
-            result = self._execute_pandas_code(pandas_code)
+            # Identical code on an unchanged dataset gives an identical result
+            found, result = self.result_cache.get(snapshot.version, pandas_code)
+            if not found:
+                # Validate the code
+                # self._validate_code(pandas_code)
+                
+                # Execute the code
+                result = self._execute_pandas_code(pandas_code, snapshot=snapshot)
+                self.result_cache.put(snapshot.version, pandas_code, result)
             
             logger.info(
                 message="Search completed successfully",
                 component="csv_operations",
                 extras={
                     "code": pandas_code,
-                    "result_type": type(result).__name__
+                    "result_type": type(result).__name__,
+                    "version": snapshot.version,
+                    "cached": found
                 }
             )
             
@@ -189,6 +651,7 @@ class CSVOperations:
             )
             raise
 
+    @traced("csv.update")
     def update(self, pandas_code: str) -> Any:
         """
         Execute pandas code for updating the DataFrame.
@@ -200,16 +663,43 @@ class CSVOperations:
             Update results
         """
         try:
-            # Validate the code
-            self._validate_code(pandas_code)
+            if self.read_only:
+                raise ValueError(f"Dataset {self.csv_path.stem} is opened read-only")
             
-            # Execute the code
-            result = self._execute_pandas_code(pandas_code)
+            # Validate the code, the verdict is cached with the compiled snippet
+            compiled = self._compile(pandas_code, validate=True)
             
-            # If execution was successful, save the updated DataFrame
-            if isinstance(result, pd.DataFrame):
-                self.df = result
-                self.df.to_csv(self.csv_path, index=False)
+            # Updates are serialized so each one builds on the version committed before it,
+            # searches keep reading their own snapshot meanwhile
+            with self._write_lock:
+                base = self.snapshot()
+                
+                # Execute the code
+                result = self._execute_pandas_code(pandas_code, compiled, writable=True, snapshot=base)
+                
+                # If execution was successful, commit the updated DataFrame as a new version
+                if isinstance(result, pd.DataFrame):
+                    result = self._restore_categoricals(base.df, result)
+                    changes = self._diff(base.df, result)
+                    if changes != {}:
+                        # Cell updates are made durable in the delta log before they become
+                        # visible, structural changes rewrite the CSV after the swap
+                        lsn = base.lsn if changes is None else self.delta_log.append(changes)
+                        
+                        # Only the indexes of columns the update changed are rebuilt
+                        self.snapshots.publish(DatasetSnapshot(
+                            version=base.version + 1,
+                            df=result,
+                            indexes=DatasetIndexes(result, previous=base.indexes),
+                            cube=base.cube.refreshed(base.df, result),
+                            lsn=lsn
+                        ))
+                        self.result_cache.invalidate_before(base.version + 1)
+                        
+                        if changes is None:
+                            self._save_csv()
+                        else:
+                            self._maybe_compact()
             
             logger.info(
                 message="Update completed successfully",
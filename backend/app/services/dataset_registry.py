@@ -0,0 +1,76 @@
+import threading
+import pandas as pd
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List
+from ..core.config import get_settings
+from ..core.logger import logger
+from .csv_operations import CSVOperations
+
+class DatasetRegistry:
+    """Process-wide registry of the CSV datasets under the data directory."""
+
+    def __init__(self, data_dir: str):
+        """Initialize with the directory holding the dataset CSV files."""
+        self.data_dir = Path(data_dir)
+        self._datasets: Dict[str, CSVOperations] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CSVOperations:
+        """
+        Get the shared handle for a dataset, loading it on first use.
+        
+        Args:
+            name: Dataset name, i.e. the CSV file name without extension
+            
+        Returns:
+            The CSVOperations instance shared by every caller
+            
+        Raises:
+            ValueError: If the dataset does not exist in the data directory
+        """
+        ops = self._datasets.get(name)
+        if ops is not None:
+            return ops
+
+        with self._lock:
+            # Another caller may have loaded it while we were waiting
+            ops = self._datasets.get(name)
+            if ops is None:
+                ops = CSVOperations(str(self._resolve(name)))
+                self._datasets[name] = ops
+                logger.info(
+                    message="Dataset registered",
+                    component="dataset_registry",
+                    extras={"dataset": name, "path": str(ops.csv_path)}
+                )
+        return ops
+
+    def _resolve(self, name: str) -> Path:
+        """Map a dataset name to its CSV file, refusing anything outside the data directory."""
+        if not name or Path(name).name != name:
+            raise ValueError(f"Invalid dataset name: {name}")
+        csv_path = self.data_dir / f"{name}.csv"
+        if not csv_path.exists():
+            raise ValueError(f"Unknown dataset: {name}")
+        return csv_path
+
+    def columns(self, name: str) -> List[str]:
+        """List the columns of a dataset, reading only the CSV header if it is not loaded."""
+        ops = self._datasets.get(name)
+        if ops is not None:
+            return list(ops.df.columns)
+        return list(pd.read_csv(self._resolve(name), nrows=0).columns)
+
+    def available(self) -> List[str]:
+        """List the dataset names that can be loaded."""
+        return sorted(path.stem for path in self.data_dir.glob("*.csv"))
+
+    def loaded(self) -> List[str]:
+        """List the dataset names that are currently loaded."""
+        return sorted(self._datasets)
+
+@lru_cache()
+def get_dataset_registry() -> DatasetRegistry:
+    """Get the process-wide dataset registry."""
+    return DatasetRegistry(get_settings().data_dir)
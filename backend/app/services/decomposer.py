@@ -1,17 +1,27 @@
+import copy
 import json
 import uuid
 from typing import List, Dict, Any
-import openai
+from openai import AsyncOpenAI
 from ..core.config import get_settings
+from ..core.llm import get_openai_client
 from ..schemas.decomposer import TaskNode, TaskGraph
 from ..schemas.helpers import SubgraphType, ExecutionStatus
 from ..core.logger import logger
+from ..core.tracing import traced
+from .query_cache import TTLCache, fold_query
 
 class DecomposerService:
-    def __init__(self):
+    def __init__(self, client: AsyncOpenAI = None):
         self.settings = get_settings()
-        self.client = openai.OpenAI(api_key=self.settings.openai_api_key)
-
+        self.client = client or get_openai_client()
+        # Many queries share a shape, reuse their plan instead of decomposing them again
+        self.plan_cache = TTLCache(
+            max_entries=self.settings.decomposer_cache_size,
+            ttl_seconds=self.settings.decomposer_cache_ttl_seconds
+        )
+
+    @traced("decomposer.decompose")
     async def decompose_query(self, query: str, context: Dict[str, Any] = None) -> TaskGraph:
         """
         Decompose a user query into a task graph using OpenAI's API.
@@ -93,9 +103,24 @@ Focus on accuracy and create logical task dependencies."""
         if context:
             user_message += f"Context: {context}\n"
 
+        cache_key = (fold_query(query), json.dumps(context, sort_keys=True, default=str) if context else None)
         try:
+            found, plan = self.plan_cache.get(cache_key)
+            if found:
+                task_graph = self._build_task_graph(query, copy.deepcopy(plan))
+                logger.info(
+                    message="Reused cached task plan",
+                    component="decomposer_service",
+                    extras={
+                        "query": query,
+                        "task_count": len(task_graph.tasks),
+                        "cache": self.plan_cache.stats()
+                    }
+                )
+                return task_graph
+
             # Call OpenAI API
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_message},
@@ -120,53 +145,17 @@ Focus on accuracy and create logical task dependencies."""
                 elif result.startswith("```"):
                     result = result.replace("```", "").strip()
                 result = json.loads(result)
-            parsed_tasks = result.get("tasks", [])
-
-            # Create task nodes
-            task_nodes: List[TaskNode] = []
-            task_id_map = {}  # Map to store task IDs
-
-            # First pass: Create tasks with IDs
-            ids = []
-            for task_data in parsed_tasks:
-                task_id = str(uuid.uuid4())
-                task_id_map[task_data["task_type"]] = task_id
-                ids.append(task_id)
-                task_node = TaskNode(
-                    id=task_id,
-                    title=task_data["task_type"],
-                    description=task_data["description"],
-                    estimated_complexity=task_data.get("estimated_complexity", 1),
-                    parameters=task_data.get("parameters", {}),
-                    dependencies=task_data.get("dependencies", []),
-                    subgraph_type=SubgraphType(task_data["task_type"]),
-                    status=ExecutionStatus.PENDING
-                )
-                task_nodes.append(task_node)
-            task_nodes.append(TaskNode(
-                id=str(uuid.uuid4()),
-                title="conversation",
-                description="Respond to the user's query",
-                estimated_complexity=1,
-                parameters={},
-                dependencies=ids,
-                subgraph_type=SubgraphType.CONVERSATION,
-                status=ExecutionStatus.PENDING
-            ))
-
-            # Create and return task graph
-            task_graph = TaskGraph(
-                id=str(uuid.uuid4()),
-                query=query,
-                tasks=task_nodes
-            )
+            task_graph = self._build_task_graph(query, result)
+            
+            # Cache the plan only once it turned into a valid task graph
+            self.plan_cache.put(cache_key, copy.deepcopy(result))
 
             logger.info(
                 message="Successfully decomposed query into task graph",
                 component="decomposer_service",
                 extras={
                     "query": query,
-                    "task_count": len(task_nodes)
+                    "task_count": len(task_graph.tasks)
                 }
             )
 
@@ -183,3 +172,59 @@ Focus on accuracy and create logical task dependencies."""
             )
             raise
 
+    def _build_task_graph(self, query: str, plan: Dict[str, Any]) -> TaskGraph:
+        """
+        Turn a parsed decomposition plan into a task graph with fresh task ids.
+        
+        Args:
+            query: User query the plan was made for
+            plan: Parsed JSON returned by the model
+            
+        Returns:
+            Task graph ending with a conversation task that depends on every other task
+        """
+        parsed_tasks = plan.get("tasks", [])
+
+        # Create task nodes
+        task_nodes: List[TaskNode] = []
+        task_id_map = {}  # Map to store task IDs
+
+        # First pass: Create tasks with IDs
+        ids = []
+        for task_data in parsed_tasks:
+            task_id = str(uuid.uuid4())
+            task_id_map[task_data.get("task_id", task_data["task_type"])] = task_id
+            ids.append(task_id)
+            task_node = TaskNode(
+                id=task_id,
+                title=task_data["task_type"],
+                description=task_data["description"],
+                estimated_complexity=task_data.get("estimated_complexity", 1),
+                parameters=task_data.get("parameters", {}),
+                dependencies=task_data.get("depends_on", []),
+                subgraph_type=SubgraphType(task_data["task_type"]),
+                status=ExecutionStatus.PENDING
+            )
+            task_nodes.append(task_node)
+
+        # Second pass: Point dependencies at the new IDs, the scheduler ignores ones that match no task
+        for task_node in task_nodes:
+            task_node.dependencies = [task_id_map.get(dep, dep) for dep in task_node.dependencies]
+
+        task_nodes.append(TaskNode(
+            id=str(uuid.uuid4()),
+            title="conversation",
+            description="Respond to the user's query",
+            estimated_complexity=1,
+            parameters={},
+            dependencies=ids,
+            subgraph_type=SubgraphType.CONVERSATION,
+            status=ExecutionStatus.PENDING
+        ))
+
+        # Create and return task graph
+        return TaskGraph(
+            id=str(uuid.uuid4()),
+            query=query,
+            tasks=task_nodes
+        )
@@ -0,0 +1,145 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.logger import logger
+
+class DeltaLog:
+    """
+    Append-only, fsynced JSON-lines log of committed changes on top of a base file.
+    
+    The first line is a header describing the base file the entries apply to. Each following
+    line is one committed change with a monotonically increasing log sequence number (lsn).
+    Only the process that owns the base file writes the log, read-only handles never touch it.
+    """
+
+    def __init__(self, path: Path, read_only: bool = False):
+        """
+        Args:
+            path: Path of the log file
+            read_only: Only read the log, e.g. in processes that load a file another one writes
+        """
+        self.path = Path(path)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self.last_lsn = 0
+        self.entry_count = 0
+
+    def read(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Read the header and entries up to a torn trailing line.
+        
+        The owner truncates the torn line, it was left by a crash. Read-only handles only skip it,
+        it may be an append the owner is still writing.
+        
+        Returns:
+            Tuple of (header, entries), header is None if the log does not exist
+        """
+        with self._lock:
+            header, entries = self._read()
+            self.last_lsn = max([self.last_lsn] + [entry["lsn"] for entry in entries])
+            self.entry_count = len(entries)
+            return header, entries
+
+    def _read(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        if not self.path.exists():
+            return None, []
+        header = None
+        entries = []
+        good_offset = 0
+        torn = False
+        with open(self.path, "rb") as f:
+            for line_number, line in enumerate(f):
+                # A line without its newline was cut short, even if what made it to disk parses
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("missing newline")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(
+                        message="Skipping torn delta log line" if self.read_only else "Truncating torn delta log line",
+                        component="delta_log",
+                        extras={"path": str(self.path), "line": line_number, "offset": good_offset}
+                    )
+                    torn = True
+                    break
+                good_offset += len(line)
+                if line_number == 0:
+                    header = record
+                else:
+                    entries.append(record)
+        # Cut the torn bytes off, otherwise the next append would be glued onto them and lost
+        if torn and not self.read_only:
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+        return header, entries
+
+    def append(self, changes: Dict[str, Any]) -> int:
+        """
+        Durably append one committed change.
+        
+        Args:
+            changes: JSON-serializable description of the change
+            
+        Returns:
+            The lsn assigned to the entry
+            
+        Raises:
+            ValueError: If the log was opened read-only
+        """
+        self._check_writable()
+        with self._lock:
+            lsn = self.last_lsn + 1
+            line = json.dumps({"lsn": lsn, "changes": changes}, separators=(",", ":")) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.last_lsn = lsn
+            self.entry_count += 1
+            return lsn
+
+    def reset(
+        self,
+        base: Dict[str, Any],
+        keep_after: Optional[int] = None,
+        pending: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Atomically start the log over on a new base file.
+        
+        Args:
+            base: Description of the base file the remaining entries apply to
+            keep_after: Keep the entries with a greater lsn, they are not in the base yet
+            pending: Description of a base file about to replace `base`, with the "lsn" of the
+                last entry it already contains, so a crash mid-swap can be recovered from
+            
+        Raises:
+            ValueError: If the log was opened read-only
+        """
+        self._check_writable()
+        with self._lock:
+            _, entries = self._read()
+            kept = [entry for entry in entries if keep_after is not None and entry["lsn"] > keep_after]
+            
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                header = {"base": base} if pending is None else {"base": base, "pending": pending}
+                f.write(json.dumps(header, separators=(",", ":")) + "\n")
+                for entry in kept:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.entry_count = len(kept)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise ValueError(f"Delta log {self.path} is opened read-only")
+
+    def size_bytes(self) -> int:
+        """Current size of the log file."""
+        return self.path.stat().st_size if self.path.exists() else 0
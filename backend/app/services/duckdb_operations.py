@@ -0,0 +1,130 @@
+import duckdb
+import queue
+import pandas as pd
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Tuple
+from ..core.config import get_settings
+from ..core.logger import logger
+from ..core.tracing import traced
+
+class DuckDBOperations:
+    def __init__(self, db_path: str, pool_size: int = 4):
+        """
+        Open the DuckDB file read-only and create a pool of cursors over it.
+
+        Generated SQL runs on these cursors, so file and network access is switched off and the
+        configuration locked. Otherwise a SELECT could still read host files through table
+        functions such as read_csv, read_text or glob.
+        """
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self._connection = duckdb.connect(
+            str(self.db_path),
+            read_only=True,
+            config={"enable_external_access": False, "lock_configuration": True}
+        )
+        self._columns = None
+        
+        # Cursors share the database instance but can run queries concurrently
+        self._pool: "queue.Queue[duckdb.DuckDBPyConnection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connection.cursor())
+        
+        logger.info(
+            message="DuckDB connection pool opened",
+            component="duckdb_operations",
+            extras={"path": str(self.db_path), "pool_size": pool_size}
+        )
+
+    @contextmanager
+    def _acquire(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Borrow a cursor from the pool, blocking until one is free."""
+        cursor = self._pool.get()
+        try:
+            yield cursor
+        finally:
+            self._pool.put(cursor)
+
+    def _validate_sql(self, sql: str) -> None:
+        """
+        Validate generated SQL before running it.
+        
+        Args:
+            sql: Generated SQL query to validate
+            
+        Raises:
+            ValueError: If the SQL is not a single read-only SELECT statement
+        """
+        try:
+            statements = duckdb.extract_statements(sql)
+        except duckdb.Error as e:
+            raise ValueError(f"Syntax error in generated SQL: {str(e)}")
+        
+        if len(statements) != 1:
+            raise ValueError(f"Generated SQL must contain exactly one statement, got {len(statements)}")
+        if statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError(f"Only SELECT statements are allowed, got {statements[0].type.name}")
+
+    @traced("duckdb.search")
+    def search(self, sql: str) -> pd.DataFrame:
+        """
+        Execute a SQL query against the games table.
+        
+        Args:
+            sql: String containing the SQL query to execute
+            
+        Returns:
+            Query results as a DataFrame
+        """
+        try:
+            self._validate_sql(sql)
+            
+            with self._acquire() as cursor:
+                result = cursor.execute(sql).df()
+            
+            logger.info(
+                message="Search completed successfully",
+                component="duckdb_operations",
+                extras={
+                    "sql": sql,
+                    "rows": len(result)
+                }
+            )
+            
+            return result
+            
+        except Exception as e:
+            logger.error(
+                message="Error during search operation",
+                component="duckdb_operations",
+                extras={
+                    "error": str(e),
+                    "sql": sql
+                }
+            )
+            raise
+
+    def columns(self) -> List[Tuple[str, str]]:
+        """Column names and types of the games table, they cannot change while the file is open read-only."""
+        if self._columns is None:
+            with self._acquire() as cursor:
+                self._columns = [(row[0], row[1]) for row in cursor.execute("DESCRIBE games").fetchall()]
+        return self._columns
+
+    def close(self) -> None:
+        """Close every pooled cursor and the underlying connection."""
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._connection.close()
+
+def duckdb_available() -> bool:
+    """Check whether the configured DuckDB database file exists."""
+    return Path(get_settings().duckdb_path).exists()
+
+@lru_cache()
+def get_duckdb_operations() -> DuckDBOperations:
+    """Get the process-wide DuckDB connection pool."""
+    settings = get_settings()
+    return DuckDBOperations(settings.duckdb_path, pool_size=settings.duckdb_pool_size)
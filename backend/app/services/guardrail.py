@@ -1,3 +1,6 @@
+import asyncio
+import re
+from typing import Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
@@ -7,9 +10,71 @@ from app.schemas.state import AgentState
 from langchain_core.output_parsers import JsonOutputParser
 load_dotenv()
 from ..core.logger import logger
+from ..core.tracing import traced
+from ..core.llm import get_http_client
+from ..core.config import get_settings
+from .query_cache import TTLCache, fold_query
+
+# Queries matching any of these are rejected without asking the model
+BLOCKED_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\b(ignore|disregard|forget|override|bypass)\b.{0,40}\b(instructions?|rules|prompts?|guardrails?|safety)\b",
+    r"\b(system|initial|hidden)\s+(prompt|message|instructions?)\b",
+    r"\bfrom now on,?\s+you\b",
+    r"\b(jailbreak|developer mode|do anything now)\b",
+    r"\b(delete|drop|truncate|wipe|erase)\s+(all\s+|every\s+|the\s+)*(data|database|dataset|tables?|rows?|records?|games?)\b",
+    r"(__\w+__|\bimport\s+(os|sys|subprocess|shutil|socket|pandas|numpy)\b|\b(eval|exec|open|subprocess)\s*\()",
+)]
+
+# Words that make a query about the games dataset
+DOMAIN_PATTERN = re.compile(
+    r"\b(games?|gaming|consoles?|playstation|ps[1-5p]?|psv|vita|publishers?|developers?|sales|sold|selling|"
+    r"shipped|critic|user score|scores?|rating|rated|released?|titles?|vgchartz|sony|nintendo|capcom|"
+    r"ubisoft|square enix|electronic arts|ea|microsoft|konami|activision|bandai namco)\b",
+    re.IGNORECASE
+)
+
+# Words that hint at talking to the system rather than about the data, such queries go to the model
+META_PATTERN = re.compile(
+    r"\b(you|your|instructions?|prompts?|rules|pretend|act as|role|system|assistant|ignore|forget|"
+    r"override|reveal|bypass|translate|repeat|code|python|sql|script|update|change|set|modify|insert)\b",
+    re.IGNORECASE
+)
+
+# Plain questions: letters, digits and light punctuation only
+PLAIN_QUERY_PATTERN = re.compile(r"^[\w\s,.?!'&:/()%-]{3,160}$")
+
+def preclassify_query(query: str) -> Optional[bool]:
+    """
+    Settle obvious input queries without an LLM call.
+    
+    Args:
+        query: User query to check
+        
+    Returns:
+        False for queries matching a blocked pattern, True for short plain questions about the
+        games data, None when the model has to decide
+    """
+    if any(pattern.search(query) for pattern in BLOCKED_PATTERNS):
+        return False
+    if PLAIN_QUERY_PATTERN.match(query) and DOMAIN_PATTERN.search(query) and not META_PATTERN.search(query):
+        return True
+    return None
+
 class GuardrailService:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=os.getenv("OPENAI_API_KEY"))
+        # Async calls reuse the connection pool shared with the workflow nodes
+        self.llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()
+        )
+        # Verdicts of the model, by query with whitespace and case folded
+        settings = get_settings()
+        self.verdict_cache = TTLCache(
+            max_entries=settings.guardrail_cache_size,
+            ttl_seconds=settings.guardrail_cache_ttl_seconds
+        )
         self.validate_input_query = PromptTemplate(
             input_variables=["query"],
             template="""
@@ -85,23 +150,57 @@ class GuardrailService:
             
             """)
         
-    def check_input_query(self, query: str) -> str:
-        chain = self.validate_input_query | self.llm | StrOutputParser()
-        result = chain.invoke({"query": query})
-        logger.info(f"Input query result: {result}", "guardrail_service/check_input_query")
-        if result == "VALID":
-            chain = self.prompt_injection_detection | self.llm | StrOutputParser()
-            result = chain.invoke({"query": query})
-            logger.info(f"Prompt injection detection result: {result}", "guardrail_service/check_input_query")
-            if result == "SAFE":
-                return True
-            else:
-                return False
-        else:
-            return False
-    
-    def check_output_query(self, query: str, state: AgentState) -> str:
+    async def _passes(self, prompt: PromptTemplate, query: str, expected: str) -> bool:
+        """Run one input check and tell whether the model returned the expected verdict."""
+        chain = prompt | self.llm | StrOutputParser()
+        result = await chain.ainvoke({"query": query})
+        logger.info(f"{expected} check result: {result}", "guardrail_service/check_input_query")
+        return result.strip() == expected
+
+    @traced("guardrail.input")
+    async def check_input_query(self, query: str) -> bool:
+        """
+        Check that a query is relevant and free of prompt injection.
+        
+        Obvious cases are settled locally. Otherwise both checks run concurrently, and the first
+        rejection cancels the other check.
+        
+        Args:
+            query: User query to check
+            
+        Returns:
+            True if the query may be processed
+        """
+        verdict = preclassify_query(query)
+        if verdict is not None:
+            logger.info(f"Input query pre-classified: {verdict}", "guardrail_service/check_input_query")
+            return verdict
+        
+        key = fold_query(query)
+        found, verdict = self.verdict_cache.get(key)
+        if found:
+            logger.info(f"Input query verdict cached: {verdict}", "guardrail_service/check_input_query")
+            return verdict
+        
+        checks = [
+            asyncio.create_task(self._passes(self.validate_input_query, query, "VALID")),
+            asyncio.create_task(self._passes(self.prompt_injection_detection, query, "SAFE"))
+        ]
+        try:
+            verdict = True
+            for check in asyncio.as_completed(checks):
+                if not await check:
+                    verdict = False
+                    break
+        finally:
+            for check in checks:
+                check.cancel()
+            await asyncio.gather(*checks, return_exceptions=True)
+        
+        self.verdict_cache.put(key, verdict)
+        return verdict
+
+    @traced("guardrail.output")
+    async def check_output_query(self, query: str, state: AgentState) -> dict:
         chain = self.validate_output_query | self.llm | JsonOutputParser()
-        return chain.invoke({"query": query, "last_response": state.final_answer, "evidance": state.collected_evidence})
-    
-    
\ No newline at end of file
+        return await chain.ainvoke({"query": query, "last_response": state.final_answer, "evidance": state.collected_evidence})
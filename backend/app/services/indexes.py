@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+# Columns that generated filters almost always test for equality or membership
+INDEXED_COLUMNS = ["Console", "Publisher", "Developer", "Title"]
+# Columns searched with case-insensitive substring matching
+TEXT_INDEXED_COLUMNS = ["Title", "Publisher", "Developer"]
+
+def trigrams(text: str) -> Set[str]:
+    """Distinct three-character substrings of a case-folded string."""
+    folded = text.casefold()
+    return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+class ColumnIndex:
+    """Hash index over one column mapping each value to the sorted row positions holding it."""
+
+    def __init__(self, column: str, series: pd.Series):
+        self.column = column
+        self.size = len(series)
+        codes, uniques = pd.factorize(series, sort=False)
+        
+        # Row positions grouped by value: rows of code k are order[bounds[k]:bounds[k + 1]],
+        # a stable sort keeps each group in ascending row order
+        self._order = np.argsort(codes, kind="stable")
+        self._bounds = np.searchsorted(codes[self._order], np.arange(len(uniques) + 1))
+        self._codes: Dict[Any, int] = {value: code for code, value in enumerate(uniques)}
+        self._folded: Dict[str, List[int]] = {}
+        for value, code in self._codes.items():
+            if isinstance(value, str):
+                self._folded.setdefault(value.casefold(), []).append(code)
+
+    def _positions(self, code: int) -> np.ndarray:
+        return self._order[self._bounds[code]:self._bounds[code + 1]]
+
+    def _codes_for(self, value: Any, case: bool) -> List[int]:
+        """Codes of the distinct column values matching a value."""
+        if not case and isinstance(value, str):
+            return self._folded.get(value.casefold(), [])
+        code = self._codes.get(value)
+        return [] if code is None else [code]
+
+    def _rows(self, codes: Iterable[int]) -> np.ndarray:
+        """Sorted row positions of distinct codes, they never overlap."""
+        parts = [self._positions(code) for code in codes]
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts or [np.empty(0, dtype=np.intp)]))
+
+    def lookup(self, value: Any, case: bool = True) -> np.ndarray:
+        """
+        Row positions holding a value.
+        
+        Args:
+            value: Value to look up
+            case: Match strings case-sensitively, as with str.contains(case=...)
+            
+        Returns:
+            Sorted array of row positions, empty if the value is absent
+        """
+        return self._rows(self._codes_for(value, case))
+
+    def lookup_many(self, values: Iterable[Any], case: bool = True) -> np.ndarray:
+        """Row positions holding any of the values, like Series.isin."""
+        # Values are deduplicated by the codes they match, so "PS4" and "ps4" count once when folded
+        codes = {code for value in values for code in self._codes_for(value, case)}
+        return self._rows(sorted(codes))
+
+    def values(self) -> List[Any]:
+        """Distinct values present in the column."""
+        return list(self._codes)
+
+class TrigramIndex:
+    """Inverted trigram index over the distinct string values of a column."""
+
+    def __init__(self, column_index: ColumnIndex):
+        self.column_index = column_index
+        self._values = [value for value in column_index.values() if isinstance(value, str)]
+        self._folded = [value.casefold() for value in self._values]
+        self._postings: Dict[str, List[int]] = {}
+        for value_id, folded in enumerate(self._folded):
+            for gram in trigrams(folded):
+                self._postings.setdefault(gram, []).append(value_id)
+
+    def _candidates(self, needle: str) -> Iterable[int]:
+        """Ids of values that contain every trigram of the needle."""
+        grams = trigrams(needle)
+        if not grams:
+            # Needles shorter than a trigram are checked against every distinct value
+            return range(len(self._values))
+        postings = sorted((self._postings.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return candidates
+
+    def matching_values(self, needle: str, case: bool = False) -> List[str]:
+        """
+        Distinct values containing a substring, verified on the trigram candidates only.
+        
+        Args:
+            needle: Plain substring to search for, not a regular expression
+            case: Match case-sensitively, as with str.contains(case=...)
+        """
+        folded = needle.casefold()
+        matches = []
+        for value_id in self._candidates(needle):
+            if case:
+                if needle in self._values[value_id]:
+                    matches.append(self._values[value_id])
+            elif folded in self._folded[value_id]:
+                matches.append(self._values[value_id])
+        return matches
+
+    def positions(self, needle: str, case: bool = False) -> np.ndarray:
+        """Sorted row positions whose value contains the substring."""
+        return self.column_index.lookup_many(self.matching_values(needle, case))
+
+class DatasetIndexes:
+    """Secondary indexes over the frame held by CSVOperations."""
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[List[str]] = None, previous: Optional["DatasetIndexes"] = None):
+        """
+        Build indexes for the given columns, reusing the ones from a previous frame that did not change.
+        
+        Args:
+            df: Frame to index
+            columns: Columns to index, defaults to INDEXED_COLUMNS present in the frame
+            previous: Indexes of the frame this one was derived from
+        """
+        self.columns = [col for col in (columns or INDEXED_COLUMNS) if col in df.columns]
+        self._series = {col: df[col] for col in self.columns}
+        self._indexes: Dict[str, ColumnIndex] = {}
+        self._text: Dict[str, TrigramIndex] = {}
+        for col in self.columns:
+            reusable = previous is not None and previous.is_current(col, df[col])
+            self._indexes[col] = previous._indexes[col] if reusable else ColumnIndex(col, df[col])
+            if col in TEXT_INDEXED_COLUMNS:
+                self._text[col] = previous._text[col] if reusable else TrigramIndex(self._indexes[col])
+
+    def is_current(self, column: str, series: pd.Series) -> bool:
+        """Check whether the index of a column still matches the given data."""
+        indexed = self._series.get(column)
+        if indexed is None or len(indexed) != len(series):
+            return False
+        return indexed is series or indexed.equals(series)
+
+    def positions(self, column: str, values: Union[Any, Iterable[Any]], case: bool = True) -> np.ndarray:
+        """
+        Row positions where a column equals a value, or any of a list of values.
+        
+        Raises:
+            ValueError: If the column is not indexed
+        """
+        index = self._indexes.get(column)
+        if index is None:
+            raise ValueError(f"Column is not indexed: {column}. Indexed columns: {self.columns}")
+        if isinstance(values, (list, tuple, set, frozenset, pd.Series, np.ndarray)):
+            return index.lookup_many(values, case)
+        return index.lookup(values, case)
+
+    def rows(self, df: pd.DataFrame, column: str, values: Union[Any, Iterable[Any]], case: bool = True) -> pd.DataFrame:
+        """Rows of the indexed frame where a column equals a value or any of a list of values."""
+        return df.iloc[self.positions(column, values, case)]
+
+    def contains_positions(self, column: str, text: str, case: bool = False) -> np.ndarray:
+        """
+        Row positions where a text column contains a substring.
+        
+        Raises:
+            ValueError: If the column has no trigram index
+        """
+        index = self._text.get(column)
+        if index is None:
+            raise ValueError(f"Column has no text index: {column}. Text indexed columns: {list(self._text)}")
+        return index.positions(text, case)
+
+    def rows_containing(self, df: pd.DataFrame, column: str, text: str, case: bool = False) -> pd.DataFrame:
+        """Rows of the indexed frame where a text column contains a substring, like str.contains(regex=False)."""
+        return df.iloc[self.contains_positions(column, text, case)]
@@ -0,0 +1,240 @@
+import sys
+import hashlib
+import threading
+import time
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import CodeType
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+def fold_query(query: str) -> str:
+    """
+    Cache key of a user query with only whitespace and case folded.
+    
+    Anything more lossy, e.g. dropping punctuation, can make a comparison or an injection
+    payload look like another query and reuse what was cached for it.
+    """
+    return " ".join(query.split()).casefold()
+
+def normalize_code(code: str) -> str:
+    """Normalize generated code so snippets differing only in whitespace share a cache entry."""
+    lines = code.strip().replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+def code_hash(code: str) -> str:
+    """Hash of the normalized code, used as the cache key."""
+    return hashlib.sha256(normalize_code(code).encode()).hexdigest()
+
+@dataclass(frozen=True)
+class CompiledCode:
+    """Compiled form of a generated snippet and the verdicts reached while building it."""
+    code: Optional[CodeType]
+    syntax_error: Optional[str] = None
+    validation_error: Optional[str] = None
+
+class CompiledCodeCache:
+    """LRU cache of compiled generated code keyed by the normalized code hash."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CompiledCode]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, code: str) -> Optional[CompiledCode]:
+        """Look up a snippet, counting the hit or miss."""
+        key = code_hash(code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, code: str, entry: CompiledCode) -> None:
+        """Store a compiled snippet, evicting the least recently used ones."""
+        key = code_hash(code)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a query result in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+def detach(value: Any) -> Any:
+    """Hand out a cached result without letting the caller mutate the cached object."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # Copy-on-write makes this a cheap view, writes by the caller copy only what they touch
+        return value.copy(deep=False)
+    if isinstance(value, (list, dict, set, np.ndarray)):
+        return value.copy()
+    return value
+
+class ResultCache:
+    """LRU cache of query results bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, version: int, code: str) -> Tuple[bool, Any]:
+        """
+        Look up the result of a snippet on a dataset version.
+        
+        Returns:
+            Tuple of (found, result)
+        """
+        key = (version, code_hash(code))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return True, detach(entry[0])
+
+    def put(self, version: int, code: str, result: Any) -> None:
+        """Store a result, skipping results larger than the whole cache."""
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        key = (version, code_hash(code))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (detach(result), size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_before(self, version: int) -> None:
+        """Drop results computed on dataset versions older than the given one."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] < version]:
+                _, size = self._entries.pop(key)
+                self.total_bytes -= size
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+class TTLCache:
+    """LRU cache whose entries also expire a fixed time after they were stored."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key, counting the hit or miss.
+        
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Drop one entry if it is cached."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries
+            }
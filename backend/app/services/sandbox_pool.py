@@ -0,0 +1,301 @@
+import asyncio
+import multiprocessing
+import queue
+import signal
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.config import get_settings
+from ..core.logger import logger
+from ..core.tracing import traced
+from .csv_operations import CSVOperations, enable_copy_on_write
+from .dataset_registry import get_dataset_registry
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, only the wall-clock timeout applies there
+    resource = None
+
+# Workers are spawned rather than forked so they never inherit the server's threads or locks
+_context = multiprocessing.get_context("spawn")
+
+def _storage_fingerprint(csv_path: Path) -> Tuple[int, ...]:
+    """Describe the on-disk state of a dataset, it changes on every committed update."""
+    fingerprint = []
+    for path in (csv_path, csv_path.with_suffix(".wal")):
+        stat = path.stat() if path.exists() else None
+        fingerprint.extend((stat.st_mtime_ns, stat.st_size) if stat else (0, 0))
+    return tuple(fingerprint)
+
+def _limit_cpu(seconds: Optional[int]) -> None:
+    """Allow the process `seconds` more CPU time, the kernel kills it with SIGXCPU past that."""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _worker_main(conn: Any, data_dir: str, memory_bytes: Optional[int]) -> None:
+    """
+    Serve search requests from the parent until the pipe is closed.
+
+    Each worker keeps its own read-only copy of every dataset it was asked about, loaded from
+    the Parquet sidecar plus the delta log, and reloads it whenever the files change on disk.
+    """
+    # Ctrl+C is handled by the server, which then shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    # A spawned worker does not inherit the server's pandas options
+    enable_copy_on_write()
+
+    datasets: Dict[str, Tuple[Tuple[int, ...], CSVOperations]] = {}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        dataset, code, cpu_seconds = request
+        try:
+            csv_path = Path(data_dir) / f"{dataset}.csv"
+            fingerprint = _storage_fingerprint(csv_path)
+            loaded = datasets.get(dataset)
+            if loaded is None or loaded[0] != fingerprint:
+                datasets[dataset] = loaded = (fingerprint, CSVOperations(str(csv_path), read_only=True))
+
+            result = None
+            if code is not None:
+                _limit_cpu(cpu_seconds)
+                try:
+                    result = loaded[1].search(code)
+                finally:
+                    _limit_cpu(None)
+            conn.send(("ok", result))
+        except Exception as e:
+            # Also covers results that cannot be pickled, send() pickles before writing
+            conn.send(("error", str(e)))
+
+class _Worker:
+    """Handle on one sandbox process and the parent end of its pipe."""
+
+    def __init__(self, data_dir: str, memory_bytes: Optional[int]):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main,
+            args=(child_conn, data_dir, memory_bytes),
+            name="sandbox-worker",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class SandboxPool:
+    """
+    Pool of pre-warmed worker processes that execute generated pandas code.
+
+    A query runs in its own process with a wall-clock timeout, a CPU time limit and an address
+    space limit, so heavy queries spread across cores and a pathological one can only take down
+    its worker. Workers that time out or die are killed and replaced.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        workers: int,
+        timeout_seconds: float = 30.0,
+        cpu_seconds: Optional[int] = 20,
+        memory_mb: Optional[int] = 2048
+    ):
+        """Start the worker processes over the datasets in the data directory."""
+        self.data_dir = str(data_dir)
+        self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024 if memory_mb else None
+        self._workers: List[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(workers):
+            worker = self._spawn()
+            self._idle.put(worker)
+
+        logger.info(
+            message="Sandbox pool started",
+            component="sandbox_pool",
+            extras={
+                "workers": workers,
+                "timeout_seconds": timeout_seconds,
+                "cpu_seconds": cpu_seconds,
+                "memory_mb": memory_mb
+            }
+        )
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self.data_dir, self.memory_bytes)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Kill a worker and start a fresh one in its place."""
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+        return self._spawn()
+
+    def _call(self, worker: _Worker, dataset: str, code: Optional[str]) -> Tuple[_Worker, Any]:
+        """
+        Run one request on a worker, replacing the worker if it hangs or dies.
+
+        Returns:
+            Tuple of (worker to return to the pool, result or the exception to raise)
+        """
+        try:
+            worker.conn.send((dataset, code, self.cpu_seconds))
+        except OSError:
+            return self._replace(worker), RuntimeError("Sandbox worker is gone")
+        return self._receive(worker, dataset, code)
+
+    def _receive(self, worker: _Worker, dataset: str, code: Optional[str]) -> Tuple[_Worker, Any]:
+        """Wait for the answer to a request already sent to a worker."""
+        try:
+            if not worker.conn.poll(self.timeout_seconds):
+                logger.warning(
+                    message="Sandbox worker timed out, replacing it",
+                    component="sandbox_pool",
+                    extras={"dataset": dataset, "code": code, "timeout_seconds": self.timeout_seconds}
+                )
+                return self._replace(worker), TimeoutError(
+                    f"Code execution timed out after {self.timeout_seconds}s\nCode: {code}"
+                )
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            logger.warning(
+                message="Sandbox worker died, replacing it",
+                component="sandbox_pool",
+                extras={"dataset": dataset, "code": code, "exitcode": worker.process.exitcode}
+            )
+            return self._replace(worker), RuntimeError(
+                f"Code execution was killed, it exceeded the CPU or memory limit\nCode: {code}"
+            )
+
+        if status == "error":
+            return worker, ValueError(payload)
+        return worker, payload
+
+    @traced("sandbox.run")
+    def run(self, dataset: str, code: str) -> Any:
+        """
+        Execute search code against a dataset in one of the workers.
+
+        Args:
+            dataset: Dataset name, i.e. the CSV file name without extension
+            code: Generated pandas code assigning to `result`
+
+        Returns:
+            The value of `result`
+
+        Raises:
+            ValueError: If the dataset is unknown or the code fails
+            TimeoutError: If the code runs longer than the wall-clock timeout
+            RuntimeError: If the worker was killed for exceeding its CPU or memory limit
+        """
+        if not dataset or Path(dataset).name != dataset:
+            raise ValueError(f"Invalid dataset name: {dataset}")
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed")
+
+        worker = self._idle.get()
+        result = None
+        try:
+            worker, result = self._call(worker, dataset, code)
+        finally:
+            self._idle.put(worker)
+
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def warm_up(self, dataset: str) -> None:
+        """Load a dataset in every idle worker at once so the first queries do not pay for it."""
+        workers = [self._idle.get() for _ in range(self._idle.qsize())]
+        errors = []
+        try:
+            for worker in workers:
+                worker.conn.send((dataset, None, None))
+            for i, worker in enumerate(workers):
+                workers[i], result = self._receive(worker, dataset, None)
+                if isinstance(result, Exception):
+                    errors.append(result)
+        finally:
+            for worker in workers:
+                self._idle.put(worker)
+        if errors:
+            raise errors[0]
+
+        logger.info(
+            message="Sandbox workers warmed up",
+            component="sandbox_pool",
+            extras={"dataset": dataset, "workers": len(workers)}
+        )
+
+    def close(self) -> None:
+        """Stop every worker."""
+        self._closed = True
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+
+@lru_cache()
+def get_sandbox_pool() -> SandboxPool:
+    """Get the process-wide sandbox pool."""
+    settings = get_settings()
+    return SandboxPool(
+        settings.data_dir,
+        workers=settings.sandbox_workers,
+        timeout_seconds=settings.sandbox_timeout_seconds,
+        cpu_seconds=settings.sandbox_cpu_seconds,
+        memory_mb=settings.sandbox_memory_mb
+    )
+
+async def run_search(dataset: str, code: str) -> Any:
+    """
+    Execute search code without blocking the event loop.
+
+    Runs in the sandbox pool when `sandbox_workers` is set, otherwise on a thread against the
+    dataset shared through the registry.
+
+    Args:
+        dataset: Dataset name, i.e. the CSV file name without extension
+        code: Generated pandas code assigning to `result`
+
+    Returns:
+        The value of `result`
+    """
+    if get_settings().sandbox_workers > 0:
+        return await asyncio.to_thread(get_sandbox_pool().run, dataset, code)
+    return await asyncio.to_thread(get_dataset_registry().get(dataset).search, code)
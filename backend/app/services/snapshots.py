@@ -0,0 +1,70 @@
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import List
+import pandas as pd
+from .indexes import DatasetIndexes
+from .aggregates import AggregateCube
+
+@dataclass(frozen=True, eq=False)
+class DatasetSnapshot:
+    """
+    Immutable state of a dataset at one committed version.
+
+    The frame, its indexes and its rollups always belong together, so a reader holding a
+    snapshot never sees a half-applied update. Nothing mutates a snapshot once published,
+    generated code only ever receives copy-on-write views of its frame.
+    """
+    version: int
+    df: pd.DataFrame
+    indexes: DatasetIndexes
+    cube: AggregateCube
+    # Last delta log entry included in the frame
+    lsn: int = 0
+
+class SnapshotStore:
+    """
+    Holder of the current snapshot of a dataset.
+
+    Readers pin a version by taking a reference to the current snapshot, which is a single
+    attribute read and needs no lock. Writers publish a new snapshot with a single attribute
+    assignment. Old snapshots are freed as soon as the last reader drops its reference.
+    """
+
+    def __init__(self, snapshot: DatasetSnapshot):
+        self._current = snapshot
+        # Only used to report which versions readers still hold, never on the read path
+        self._live = weakref.WeakValueDictionary()
+        self._live_lock = threading.Lock()
+        self._track(snapshot)
+
+    @property
+    def current(self) -> DatasetSnapshot:
+        """The latest committed snapshot."""
+        return self._current
+
+    def publish(self, snapshot: DatasetSnapshot) -> None:
+        """
+        Make a new snapshot visible to readers.
+
+        Args:
+            snapshot: Snapshot with a version greater than the current one
+
+        Raises:
+            ValueError: If the version does not move forward
+        """
+        if snapshot.version <= self._current.version:
+            raise ValueError(
+                f"Snapshot version {snapshot.version} is not newer than {self._current.version}"
+            )
+        self._track(snapshot)
+        self._current = snapshot
+
+    def live_versions(self) -> List[int]:
+        """Versions still referenced by the store or by readers, oldest first."""
+        with self._live_lock:
+            return sorted(self._live.keys())
+
+    def _track(self, snapshot: DatasetSnapshot) -> None:
+        with self._live_lock:
+            self._live[snapshot.version] = snapshot
@@ -1,13 +1,32 @@
 from typing import Any, Dict, List
 from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from pydantic import BaseModel
 
 from app.schemas.state import AgentState, TaskExecutionState, ExecutionStatus
 from app.schemas.decomposer import TaskGraph
+from app.core.tracing import traced
+
+def emit_event(event: str, **data: Any) -> None:
+    """Send a progress event to streaming clients, a no-op unless the workflow is streamed."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:  # Called outside a running graph, e.g. a node under test
+        return
+    writer({"event": event, **data})
 
 class BaseNode:
     """Base class for all nodes in the workflow."""
     
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Time every node run as a span named after the node class."""
+        super().__init_subclass__(**kwargs)
+        process = cls.__dict__.get("process")
+        if isinstance(process, staticmethod):
+            cls.process = staticmethod(traced(f"node.{cls.__name__}")(process.__func__))
+        elif callable(process):
+            cls.process = traced(f"node.{cls.__name__}")(process)
+    
     @staticmethod
     async def validate_state(state: AgentState) -> bool:
         """Validate if the state is ready for this node."""
@@ -1,16 +1,23 @@
-from typing import Dict, Any
+import hashlib
+import json
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+from app.core.config import get_settings
 from app.core.logger import logger
 from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableConfig
 from app.schemas.state import AgentState
 from app.workflows.router import Router
 from app.workflows.retry import RetryNode
+from app.workflows.parallel import ParallelExecutor
 from app.schemas.helpers import SubgraphType, ExecutionStatus
 from app.workflows.subgraphs.db_search import create_db_search_graph
 from app.workflows.subgraphs.web_search import create_web_search_graph
 from app.workflows.subgraphs.db_update import create_db_update_graph
 from app.workflows.subgraphs.conversation import create_conversation_graph
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+# Nodes of the main graph that run a task
+SUBGRAPH_NODES = {subgraph.value for subgraph in SubgraphType}
 
 def end_node(state: AgentState) -> AgentState:
     """End node that returns the final state."""
@@ -19,7 +26,15 @@ def end_node(state: AgentState) -> AgentState:
 class AgentWorkflow:
     """Main agent workflow that orchestrates all subgraphs."""
     
-    def __init__(self):
+    # Times an interrupted run is resumed before its thread is started over
+    MAX_RESUMES = 2
+    
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
+        """
+        Args:
+            checkpointer: Saver for the state after every step, lets interrupted runs resume
+        """
+        self.checkpointer = checkpointer
         self.graph = self.create_agent_workflow_compiled()
     
     def create_agent_workflow_compiled(self) -> StateGraph:
@@ -52,6 +67,10 @@ class AgentWorkflow:
                 "router": "router",
                 "retry": "retry",
             })
+        # Independent tasks run side by side in one node
+        workflow.add_node("parallel", ParallelExecutor(subgraphs).process)
+        workflow.add_edge("parallel", "router")
+        
         # Add conditional edges from router to subgraphs
         workflow.add_conditional_edges(
             "router",
@@ -61,6 +80,7 @@ class AgentWorkflow:
                 SubgraphType.WEB_SEARCH.value: "web_search",
                 SubgraphType.DB_UPDATE.value: "db_update",
                 SubgraphType.CONVERSATION.value: "conversation",
+                "parallel": "parallel",
                 "end": "end",
             }
         )
@@ -75,9 +95,7 @@ class AgentWorkflow:
         
         # Set entry point
         workflow.set_entry_point("router")
-        # checkpoint = MemorySaver()
-        # graph = workflow.compile(checkpointer=checkpoint)
-        graph = workflow.compile()
+        graph = workflow.compile(checkpointer=self.checkpointer)
         image = graph.get_graph().draw_ascii()
         print(image)
         return graph
@@ -90,6 +108,9 @@ class AgentWorkflow:
         return "end"
     def router_to_subgraph(self, state: AgentState):
         
+        if state.parallel_tasks:
+            return "parallel"
+        
         if not state.current_task:
             return "end"
         
@@ -107,6 +128,73 @@ class AgentWorkflow:
         
         return "end"
 
+    def thread_config(self, task_input: Dict[str, Any], config: RunnableConfig) -> RunnableConfig:
+        """Make sure a checkpointed run has a thread ID, falling back to the task graph ID."""
+        if self.checkpointer is None or config.get("configurable", {}).get("thread_id"):
+            return config
+        return {**config, "configurable": {**config.get("configurable", {}), "thread_id": task_input["task_graph_id"]}}
+
+    @staticmethod
+    def input_hash(state: AgentState) -> str:
+        """
+        Fingerprint of a run's input: the query, engine and dataset.
+        
+        The task graph and task IDs are left out, every request gets fresh ones even for a
+        cached plan, so including them would never let a retried request resume its thread.
+        """
+        payload = json.dumps([state.task_graph.query, state.query_engine, get_settings().default_dataset])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def initial_state(
+        self,
+        task_input: Dict[str, Any],
+        config: RunnableConfig
+    ) -> Tuple[Optional[AgentState], RunnableConfig]:
+        """
+        Get the input to run the graph with for a thread.
+        
+        A thread is only resumed if its unfinished run was started with the same input, and at
+        most `MAX_RESUMES` times. Anything else deletes the thread and starts over, so a reused
+        thread ID never answers a new message with an old run.
+        
+        Returns:
+            Tuple of (None to resume the thread's interrupted run, otherwise a fresh state,
+            config to run with, carrying the input hash into the checkpoint metadata)
+        """
+        state = AgentState(**task_input)
+        if self.checkpointer is None:
+            return state, config
+        
+        thread_id = config["configurable"]["thread_id"]
+        input_hash = self.input_hash(state)
+        snapshot = await self.graph.aget_state(config)
+        metadata = snapshot.metadata or {}
+        resumes = metadata.get("resumes", 0)
+        if snapshot.next and metadata.get("input_hash") == input_hash and resumes < self.MAX_RESUMES:
+            logger.info(
+                message="Resuming interrupted workflow",
+                component="workflow",
+                extras={"thread_id": thread_id, "next": list(snapshot.next), "resumes": resumes + 1}
+            )
+            # Count the attempt on the checkpoint itself, a step that fails again writes no new one
+            latest = await self.checkpointer.aget_tuple(config)
+            await self.checkpointer.aput(
+                latest.parent_config or {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}},
+                latest.checkpoint,
+                {**latest.metadata, "resumes": resumes + 1},
+                {}
+            )
+            return None, self.with_metadata(config, input_hash=input_hash, resumes=resumes + 1)
+        if snapshot.values:
+            # A finished run, another input or too many resumes, start over instead of building on it
+            await self.checkpointer.adelete_thread(thread_id)
+        return state, self.with_metadata(config, input_hash=input_hash, resumes=0)
+
+    @staticmethod
+    def with_metadata(config: RunnableConfig, **metadata: Any) -> RunnableConfig:
+        """Copy of the config whose metadata, and so every checkpoint it writes, holds the given values."""
+        return {**config, "metadata": {**config.get("metadata", {}), **metadata}}
+
     async def run_agent(
         self,
         task_input: Dict[str, Any],
@@ -123,9 +211,50 @@ class AgentWorkflow:
             Final state after workflow completion
         """
         # Create initial state
-        initial_state = AgentState(**task_input)
+        config = self.thread_config(task_input, config)
+        initial_state, config = await self.initial_state(task_input, config)
         
-        # Run workflow
+        # Run workflow, the graph returns the channel values of the final state
         final_state = await self.graph.ainvoke(initial_state, config)
         
-        return final_state
\ No newline at end of file
+        return AgentState.model_validate(final_state)
+
+    async def stream_agent(
+        self,
+        task_input: Dict[str, Any],
+        config: RunnableConfig
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs the agent workflow, yielding progress events as it goes.
+        
+        Args:
+            task_input: Dictionary containing task graph and other inputs
+            config: Configuration for the runnable
+            
+        Yields:
+            Events emitted by the nodes ("task_started", "token", ...), a "task_finished" event
+            whenever a subgraph returns, and last a "final_state" event holding the AgentState
+        """
+        config = self.thread_config(task_input, config)
+        initial_state, config = await self.initial_state(task_input, config)
+        final_state = None
+        
+        # Custom events are emitted inside subgraphs, so subgraph output has to be streamed too
+        async for namespace, mode, data in self.graph.astream(
+            initial_state,
+            config,
+            stream_mode=["custom", "updates", "values"],
+            subgraphs=True
+        ):
+            if mode == "custom":
+                yield data
+            elif namespace:
+                continue
+            elif mode == "values":
+                final_state = data
+            elif mode == "updates":
+                for node in data:
+                    if node in SUBGRAPH_NODES:
+                        yield {"event": "task_finished", "task_type": node}
+        
+        yield {"event": "final_state", "state": AgentState.model_validate(final_state)}
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Dict, List, Union
+from langchain_core.runnables import RunnableConfig
+
+from app.schemas.state import AgentState, TaskExecutionState
+from app.schemas.helpers import ExecutionStatus
+from app.workflows.base import BaseNode, emit_event
+from app.core.logger import logger
+
+class ParallelExecutor(BaseNode):
+    """
+    Runs the independent tasks scheduled by the router concurrently.
+
+    Every task runs its subgraph on its own copy of the state, so the subgraphs keep working on
+    a single `current_task`. The copies are merged back in task graph order once all of them are
+    done, which keeps the evidence order independent of which task finished first.
+    """
+
+    def __init__(self, subgraphs: Dict[str, Any]):
+        """
+        Args:
+            subgraphs: Compiled subgraph for each subgraph type value
+        """
+        self.subgraphs = subgraphs
+
+    async def run_task(self, state: AgentState, task: TaskExecutionState, config: RunnableConfig) -> AgentState:
+        """Run one task's subgraph on a copy of the state."""
+        branch = state.model_copy(deep=True)
+        branch.current_task = task
+        subgraph_type = task.task_node.subgraph_type.value
+        result = await self.subgraphs[subgraph_type].ainvoke(branch, config)
+        emit_event("task_finished", task_id=task.task_node.id, task_type=subgraph_type)
+        return AgentState.model_validate(result)
+
+    @staticmethod
+    def merge(state: AgentState, branch: AgentState, evidence_start: int) -> None:
+        """
+        Fold what one task added to its copy of the state back into the shared state.
+
+        Args:
+            state: Shared state, as it was when the tasks started
+            branch: Copy of the state the task's subgraph returned
+            evidence_start: Length of the evidence list when the tasks started
+        """
+        state.collected_evidence.extend(branch.collected_evidence[evidence_start:])
+        for task_id, finished in branch.completed_tasks.items():
+            state.completed_tasks.setdefault(task_id, finished)
+        state.db_result.update(branch.db_result)
+        state.web_result.update(branch.web_result)
+        state.db_update_result.update(branch.db_update_result)
+        state.db_search_used = state.db_search_used or branch.db_search_used
+        state.web_search_used = state.web_search_used or branch.web_search_used
+        state.db_update_used = state.db_update_used or branch.db_update_used
+        if branch.final_answer:
+            state.final_answer = branch.final_answer
+
+        # Subgraphs that could not finish leave the task behind, retry it like the router would
+        leftover = branch.current_task
+        if leftover is None or leftover.status in (ExecutionStatus.COMPLETED, ExecutionStatus.SUCCESS):
+            return
+        if leftover.retry_count < state.max_retries:
+            leftover.retry_count += 1
+            leftover.status = ExecutionStatus.PENDING
+            state.task_graph.tasks.append(leftover.task_node)
+        else:
+            leftover.status = ExecutionStatus.FAILED
+            state.completed_tasks[leftover.task_node.id] = leftover
+
+    async def process(self, state: AgentState, config: RunnableConfig) -> AgentState:
+        """Run every scheduled task at once and merge the results."""
+        tasks, state.parallel_tasks = state.parallel_tasks, []
+        logger.info(
+            message="Running tasks concurrently",
+            component="parallel/process",
+            extras={"tasks": [task.task_node.id for task in tasks]}
+        )
+
+        branches: List[Union[AgentState, BaseException]] = await asyncio.gather(
+            *(self.run_task(state, task, config) for task in tasks),
+            return_exceptions=True
+        )
+
+        evidence_start = len(state.collected_evidence)
+        for task, branch in zip(tasks, branches):
+            if isinstance(branch, BaseException):
+                if isinstance(branch, asyncio.CancelledError):
+                    raise branch
+                logger.error(
+                    message="Concurrent task failed",
+                    component="parallel/process",
+                    extras={"task_id": task.task_node.id, "error": str(branch)}
+                )
+                task.status = ExecutionStatus.FAILED
+                task.error = str(branch)
+                state.completed_tasks[task.task_node.id] = task
+                continue
+            ParallelExecutor.merge(state, branch, evidence_start)
+        return state
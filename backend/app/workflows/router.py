@@ -3,13 +3,57 @@ from langchain_core.runnables import RunnableConfig
 
 from app.schemas.state import AgentState, TaskExecutionState
 from app.schemas.helpers import SubgraphType, ExecutionStatus
-from app.workflows.base import BaseNode
+from app.workflows.base import BaseNode, emit_event
 from app.schemas.decomposer import TaskNode
 from app.core.logger import logger
 
+# Read-only tasks that may run side by side once their dependencies are met
+CONCURRENT_SUBGRAPHS = {SubgraphType.DB_SEARCH, SubgraphType.WEB_SEARCH}
+
 class Router(BaseNode):
     """Routes tasks to appropriate subgraphs based on task parameters."""
     
+    @staticmethod
+    def ready_tasks(state: AgentState) -> List[TaskNode]:
+        """
+        Get the pending tasks whose dependencies are all met, in task graph order.
+        
+        A dependency is met once the task is no longer pending, dependencies on IDs that match no
+        task are ignored. Updates and the conversation task act as barriers: they wait for every
+        task listed before them, and tasks listed after them only start before the barrier is done
+        if the barrier depends on them, e.g. a search re-queued for a retry.
+        
+        Args:
+            state: Current workflow state
+            
+        Returns:
+            Tasks that can start now, empty if the task graph is exhausted
+        """
+        if state.task_graph is None or not state.task_graph.tasks:
+            return []
+        pending = {task.id for task in state.task_graph.tasks}
+        
+        ready = []
+        barriers: List[TaskNode] = []
+        for position, task in enumerate(state.task_graph.tasks):
+            dependencies_met = not any(dep in pending for dep in task.dependencies)
+            if task.subgraph_type not in CONCURRENT_SUBGRAPHS:
+                if position == 0 and dependencies_met:
+                    ready.append(task)
+                barriers.append(task)
+            elif dependencies_met and all(task.id in barrier.dependencies for barrier in barriers):
+                ready.append(task)
+        
+        if not ready:
+            # Only a dependency cycle gets here, fall back to task graph order
+            logger.warning(
+                message="No task has its dependencies met, running tasks in order",
+                component="router/ready_tasks",
+                extras={"pending": sorted(pending)}
+            )
+            ready.append(state.task_graph.tasks[0])
+        return ready
+    
     @staticmethod
     async def get_next_task(state: AgentState) -> Union[str, None]:
         """Get next executable task based on dependencies."""
@@ -17,8 +61,12 @@ class Router(BaseNode):
             return None
         if not state.task_graph.tasks:  # No more tasks
             return None
-        logger.info(f"Getting next task: {state.task_graph}","router/get_next_task")
-        next_task_id = state.task_graph.tasks[0].id
+        logger.debug(
+            "Getting next task",
+            "router/get_next_task",
+            extras=lambda: {"pending": [task.id for task in state.task_graph.tasks]}
+        )
+        next_task_id = Router.ready_tasks(state)[0].id
         return next_task_id
     
     @staticmethod
@@ -45,10 +93,43 @@ class Router(BaseNode):
             
         return False
     
+    @staticmethod
+    def start_task(task: TaskNode) -> TaskExecutionState:
+        """Create the execution state of a task that is about to run."""
+        logger.info(
+            "Routing to subgraph",
+            "router/process",
+            extras={"task_id": task.id, "subgraph": task.subgraph_type.value}
+        )
+        emit_event(
+            "task_started",
+            task_id=task.id,
+            task_type=task.subgraph_type.value,
+            description=task.description
+        )
+        return TaskExecutionState(
+            task_node=task,
+            status=ExecutionStatus.RUNNING,
+            retry_count=0,
+            result=None,
+            error=None
+        )
+    
     @staticmethod
     async def process(state: AgentState, config: RunnableConfig) -> AgentState:
         """Process current state and route to next node."""
-        logger.info(f"Router processing state: {state}", "router/process")
+        logger.info(
+            "Router processing state",
+            "router/process",
+            extras=lambda: {
+                "task_graph_id": state.task_graph_id,
+                "current_task": state.current_task.task_node.id if state.current_task else None,
+                "current_status": state.current_task.status.value if state.current_task else None,
+                "pending": len(state.task_graph.tasks) if state.task_graph else 0,
+                "completed": len(state.completed_tasks),
+                "evidence": len(state.collected_evidence)
+            }
+        )
         
         proceed = await Router.check_completed_tasks(state)
         if proceed:
@@ -58,19 +139,18 @@ class Router(BaseNode):
                 logger.info("No more tasks, ending workflow", "router/process")
                 return state
                 
-            task = state.task_graph.tasks.pop(0)
+            ready = Router.ready_tasks(state)
+            ready_ids = {task.id for task in ready}
+            state.task_graph.tasks = [task for task in state.task_graph.tasks if task.id not in ready_ids]
             if state.current_task is not None:
                 state.completed_tasks[state.current_task.task_node.id] = state.current_task
-                
-            state.current_task = TaskExecutionState(
-                task_node=task,
-                status=ExecutionStatus.RUNNING,
-                retry_count=0,
-                result=None,
-                error=None
-            )
+                state.current_task = None
             
-            logger.info(f"Routing to subgraph: {task.subgraph_type}", "router/process")
+            # Independent tasks go to the parallel node together, a single one runs as before
+            if len(ready) > 1:
+                state.parallel_tasks = [Router.start_task(task) for task in ready]
+            else:
+                state.current_task = Router.start_task(ready[0])
             return state
             
-        return state
\ No newline at end of file
+        return state
@@ -1,11 +1,42 @@
+import re
 from langchain_core.runnables import RunnableConfig
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, END
 
 from app.schemas.state import AgentState, ExecutionStatus
-from app.workflows.base import BaseNode
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
+from app.workflows.base import BaseNode, emit_event
+from app.core.llm import get_openai_client
+from app.core.config import get_settings
+
+# Links in the evidence are the only thing CitationAdder can cite
+SOURCE_PATTERN = re.compile(r"https?://|\bwww\.\w", re.IGNORECASE)
+
+def has_citable_sources(state: AgentState) -> bool:
+    """Check whether a web search ran or any collected evidence carries a source worth citing."""
+    return state.web_search_used or any(
+        SOURCE_PATTERN.search(str(value))
+        for evidence in state.collected_evidence
+        for value in evidence.values()
+    )
+
+def needs_citation_pass(state: AgentState) -> bool:
+    """Check whether the draft still has to go through CitationAdder."""
+    return has_citable_sources(state) and not get_settings().conversation_single_pass
+
+def complete_conversation(state: AgentState) -> AgentState:
+    """Mark the conversation task as done once its final answer is set."""
+    if state.current_task:
+        state.current_task.status = ExecutionStatus.SUCCESS
+        state.completed_tasks[state.current_task.task_node.id] = state.current_task
+        state.current_task = None
+    return state
+
+# How answers cite their sources, the same whether the draft or CitationAdder adds them
+CITATION_FORMAT = """
+    Cite the links in the evidence in this format:
+    Put a marker like [1] right after each sentence that uses a link, numbering links in the order they are first cited.
+    End the answer with a line "Sources:" followed by one line per link, "[1] <link>", with the link exactly as it appears in the evidence.
+    Only cite links from the evidence, and leave out the Sources section if nothing is cited.
+    """
 
 class DraftAnswer(BaseNode):
     system_prompt_general = """
@@ -19,27 +50,41 @@ class DraftAnswer(BaseNode):
     If it is a general question, answer in a sentence and add you are here to help with game queries.
     """
 
+    # Answer and citations in one call, used instead of a CitationAdder pass when configured
+    system_prompt_cited = system_prompt_general + CITATION_FORMAT
+
     @staticmethod
     async def process(state: AgentState, config: RunnableConfig) -> AgentState:
-        load_dotenv()
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         evidance = ""
         for x in state.collected_evidence:
             for key, value in x.items():
                 evidance += f"{key}: {value}\n"
-        prompt = DraftAnswer.system_prompt_general.format(question=state.task_graph.query,
-                                                   evidence=evidance)
+        template = DraftAnswer.system_prompt_general
+        if has_citable_sources(state) and get_settings().conversation_single_pass:
+            template = DraftAnswer.system_prompt_cited
+        prompt = template.format(question=state.task_graph.query, evidence=evidance)
 
-        response = client.chat.completions.create(
+        # Stream the answer so /stream clients see it while it is generated
+        stream = await get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": state.task_graph.query}
-            ]
+            ],
+            stream=True
         )
-        state.current_task.result = response.choices[0].message.content
-        state.final_answer = response.choices[0].message.content
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                emit_event("token", text=chunk.choices[0].delta.content)
+        state.current_task.result = "".join(parts)
+        state.final_answer = "".join(parts)
         state.current_task.status = ExecutionStatus.SUCCESS
+        
+        # Without a citation pass the draft is the final answer
+        if not needs_citation_pass(state):
+            complete_conversation(state)
         return state
 
 class CitationAdder(BaseNode):
@@ -56,19 +101,17 @@ class CitationAdder(BaseNode):
     Only give your answer in string format.
     If it is a general question, answer in a sentence and add you are here to help with game queries.
     
-    """
+    """ + CITATION_FORMAT
     @staticmethod
     async def process(state: AgentState, config: RunnableConfig) -> AgentState:
-        load_dotenv()
         evidance = ""
         for x in state.collected_evidence:
             for key, value in x.items():
                 evidance += f"{key}: {value}\n"
 
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         prompt = CitationAdder.system_prompt_citation.format(question=state.task_graph.query,
                                                    evidence=evidance, answer=state.current_task.result)
-        response = client.chat.completions.create(
+        response = await get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": prompt},
@@ -77,16 +120,12 @@ class CitationAdder(BaseNode):
         )
         state.current_task.result = response.choices[0].message.content
         state.final_answer = response.choices[0].message.content
-        if state.current_task:
-            state.current_task.status = ExecutionStatus.SUCCESS
-        
-        # For now just doing this 
-        state.completed_tasks[state.current_task.task_node.id] = state.current_task
-        state.current_task = None
-        
-        return state
+        return complete_conversation(state)
 
     
+def route_after_draft(state: AgentState) -> str:
+    return "cite" if needs_citation_pass(state) else "end"
+
 def create_conversation_graph() -> StateGraph:
     """Creates the conversation subgraph."""
     workflow = StateGraph(AgentState)
@@ -95,8 +134,9 @@ def create_conversation_graph() -> StateGraph:
     workflow.add_node("draft", DraftAnswer.process)
     workflow.add_node("cite", CitationAdder.process)
     
-    # Add edges
-    workflow.add_edge("draft", "cite")
+    # Add edges, the citation pass only runs when the evidence has sources to cite
+    workflow.add_conditional_edges("draft", route_after_draft, {"cite": "cite", "end": END})
+    workflow.add_edge("cite", END)
     
     # Set entry point
     workflow.set_entry_point("draft")
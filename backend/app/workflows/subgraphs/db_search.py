@@ -1,36 +1,43 @@
 # New Implementation
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional, Set
 from app.core.logger import logger
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 
 from app.schemas.state import AgentState, ExecutionStatus
+from app.schemas.helpers import QueryEngine
 from app.workflows.base import BaseNode
-from app.services.csv_operations import CSVOperations
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
+from app.services.sandbox_pool import run_search
+from app.services.dataset_registry import get_dataset_registry
+from app.services.codegen_cache import CodegenCache, codegen_fingerprint, get_codegen_cache
+from app.services.csv_operations import SCHEMA_VERSION
+from app.services.duckdb_operations import get_duckdb_operations, duckdb_available
+from app.core.config import get_settings
+from app.core.llm import get_openai_client
 import json
+import asyncio
 from pathlib import Path
-load_dotenv()
-
-class LLM:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    def get_llm_response(self, prompt: str) -> str:
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.1,
-            messages=[
-                {"role": "system", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
 
-class QueryGenerator(BaseNode):
-    csv_ops = CSVOperations(str(Path("data") / "sales_and_rating_cleaned.csv"))
-    llm = LLM()
+def resolve_query_engine(state: AgentState) -> QueryEngine:
+    """Pick the engine for the current task: task parameters, then the request, then config."""
+    requested = (
+        state.current_task.task_node.parameters.get("engine")
+        or state.query_engine
+        or get_settings().query_engine
+    )
+    try:
+        engine = QueryEngine(requested)
+    except ValueError:
+        logger.warning(f"Unknown query engine {requested}, using pandas", "db_search/engine")
+        return QueryEngine.PANDAS
     
+    # CSVOperations stays the fallback when the DuckDB database is not there
+    if engine == QueryEngine.DUCKDB and not duckdb_available():
+        logger.warning("DuckDB database not found, using pandas", "db_search/engine")
+        return QueryEngine.PANDAS
+    return engine
+
+class QueryGenerator(BaseNode):
     system_prompt = """
     You are an expert at generating search parameters for a gaming dataset. 
     Based on the user's query, generate a JSON object with search parameters.
@@ -40,9 +47,26 @@ class QueryGenerator(BaseNode):
    "User Score", "Total Sales", "Japan Sales", "NA Sales", "PAL Sales", 
    "Other Sales", "Last Update", "Total Shipped", "VGChartz Score"
 
-    Some Exceptional Cases:
-    - Last Update is in format "DDth MMM YY" (e.g., "29th Feb 00", "3rd Sep 97")
-    - every sales column is in format "5.2m" but also NaN values
+    Column types:
+    - "Console", "Publisher", "Developer" are categorical columns
+    - every sales and score column is already numeric (float32) but also has NaN values
+    - "Release Date" and "Last Update" are already datetime64 columns, use the .dt accessor and never re-parse them
+
+    Indexed lookups:
+    - lookup(column, value_or_list, case=True) returns the rows of df where "Console", "Publisher", "Developer"
+      or "Title" equals the value (or any value of the list) without scanning the whole frame
+    - prefer lookup("Console", "PS4") over df[df["Console"] == "PS4"] and lookup("Console", ["PS4", "PS5"]) over isin,
+      pass case=False for case-insensitive exact matches
+    - contains(column, text, case=False) returns the rows of df where "Title", "Publisher" or "Developer" contains
+      the plain substring text, use it instead of df[column].str.contains(text, case=False, na=False)
+
+    Precomputed aggregates:
+    - rollup(measure, agg, by) returns a Series indexed by the group values, read from precomputed totals
+      without scanning rows
+    - measure is one of "Total Sales", "NA Sales", "PAL Sales", "Japan Sales", "Other Sales", "Critic Score"
+    - agg is "sum", "mean", "count" (non-missing values) or "size" (number of games)
+    - by is "Console", "Publisher", "Developer", "Release Year", ("Console", "Release Year") or ("Publisher", "Console")
+    - prefer rollup("Total Sales", "sum", "Publisher").nlargest(10) over df.groupby("Publisher")["Total Sales"].sum().nlargest(10)
 
 CRITICAL SECURITY RULES:
 1. ONLY use pandas operations and basic Python functions
@@ -61,13 +85,43 @@ There should be no markdown formatting.
 There should be no backticks or quotes around the code.
 
     """
+
+    sql_system_prompt = """
+    You are an expert DuckDB SQL generator for a gaming dataset.
+
+    The table name is 'games' and it has the following columns (MUST be double quoted in queries):
+    "Title", "Console", "Developer", "Publisher", "Release Date", "Critic Score",
+    "User Score", "Total Sales", "Japan Sales", "NA Sales", "PAL Sales",
+    "Other Sales", "Last Update", "Total Shipped", "VGChartz Score"
+
+    Column types:
+    - "Title", "Console", "Developer", "Publisher" are VARCHAR
+    - every sales and score column is FLOAT and may be NULL
+    - "Release Date" and "Last Update" are VARCHAR in format "DDth Mon YY" (e.g. "30th Apr 98") or 'N/A',
+      parse them with try_strptime(regexp_replace("Release Date", '(\\d+)(st|nd|rd|th)', '\\1'), '%d %b %y')
+
+RULES:
+1. Generate exactly ONE read-only SELECT statement on the table 'games'
+2. NEVER modify data, create objects, attach databases or read files
+3. Use ILIKE for case-insensitive text matching
+4. Handle NULL values appropriately
+5. Use aggregation and GROUP BY when the query asks for it
+
+Generate ONLY the SQL query, no explanations.
+There should be no markdown formatting.
+There should be no backticks or quotes around the query.
+
+    """
     
-    @staticmethod
-    async def process(state: AgentState, config: RunnableConfig) -> AgentState:
-        """Generate search parameters based on the query."""
-        prompt = f"""
-        Generate pandas code to search/filter the DataFrame 'df' based on this query: "{state.task_graph.query}"
-Additional parameters: {state.current_task.task_node.parameters}
+    sql_prompt = """
+        Generate a DuckDB SQL query on the table 'games' for this query: "{query}"
+Additional parameters: {parameters}
+Genrate only the SQL query, no explanations.
+        """
+    
+    pandas_prompt = """
+        Generate pandas code to search/filter the DataFrame 'df' based on this query: "{query}"
+Additional parameters: {parameters}
 Requirements:
 1. Use pandas operations to filter the DataFrame
 2. Handle text searches with case-insensitive matching where appropriate
@@ -80,13 +134,39 @@ Requirements:
 7. Handle exceptional cases accordingly
 Genrate only the pandas code, no explanations.
         """
+    
+    model = "gpt-4o-mini"
+    
+    @staticmethod
+    def prompts(engine: QueryEngine) -> Tuple[str, str]:
+        """System prompt and user prompt template for an engine."""
+        if engine == QueryEngine.DUCKDB:
+            return QueryGenerator.sql_system_prompt, QueryGenerator.sql_prompt
+        return QueryGenerator.system_prompt, QueryGenerator.pandas_prompt
+    
+    @staticmethod
+    async def process(state: AgentState, config: RunnableConfig) -> AgentState:
+        """Generate search parameters based on the query."""
+        engine = resolve_query_engine(state)
+        parameters = state.current_task.task_node.parameters
+        
+        # Questions asked before are answered with the code that already worked for them
+        cache, fingerprint = codegen_cache_for(engine)
+        if cache is not None:
+            code = cache.get(engine.value, fingerprint, state.task_graph.query, parameters)
+            if code is not None:
+                logger.info("Reusing generated code", "db_search/generate", extras={"code": code})
+                state.current_task.result = code
+                return state
+        
+        system_prompt, template = QueryGenerator.prompts(engine)
+        prompt = template.format(query=state.task_graph.query, parameters=parameters)
         
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = await get_openai_client().chat.completions.create(
+            model=QueryGenerator.model,
             temperature=0.1,
             messages=[
-                {"role": "system", "content": QueryGenerator.system_prompt},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
         )
@@ -99,6 +179,8 @@ Genrate only the pandas code, no explanations.
             code = code[8:]
         elif code.startswith('```python'):
             code = code[10:]
+        elif code.startswith('```sql'):
+            code = code[6:]
         elif code.startswith('```'):
             code = code[3:]
         if code.endswith('```'):
@@ -107,28 +189,64 @@ Genrate only the pandas code, no explanations.
         # Clean up any extra whitespace or newlines
         code = code.strip()
         
-        logger.info(f"Generated code: {code}", "db_search/generate")
+        logger.info("Generated code", "db_search/generate", extras={"code": code})
         state.current_task.result = code
         return state
 
-class Executor(BaseNode):
-    csv_ops = CSVOperations(str(Path("data") / "sales_and_rating_cleaned.csv"))
+_purged_fingerprints: Set[Tuple[str, str]] = set()
+
+def codegen_cache_for(engine: QueryEngine) -> Tuple[Optional[CodegenCache], Optional[str]]:
+    """
+    Get the code generation cache and the current fingerprint of the prompts and schema for an engine.
+    
+    Entries generated under another fingerprint are purged the first time a fingerprint is seen.
+    """
+    settings = get_settings()
+    if not settings.codegen_cache_enabled:
+        return None, None
     
+    system_prompt, template = QueryGenerator.prompts(engine)
+    if engine == QueryEngine.DUCKDB:
+        schema = get_duckdb_operations().columns()
+    else:
+        schema = [SCHEMA_VERSION, get_dataset_registry().columns(settings.default_dataset)]
+    fingerprint = codegen_fingerprint(system_prompt, template, QueryGenerator.model, engine.value, schema)
+    
+    cache = get_codegen_cache()
+    if (engine.value, fingerprint) not in _purged_fingerprints:
+        cache.purge_stale(engine.value, fingerprint)
+        _purged_fingerprints.add((engine.value, fingerprint))
+    return cache, fingerprint
+
+class Executor(BaseNode):
     @staticmethod
     async def process(state: AgentState, config: RunnableConfig) -> AgentState:
-        """Execute the search using CSVOperations."""
+        """Execute the search using CSVOperations or DuckDB."""
+        cache = None
+        code = state.current_task.result
         try:
+            engine = resolve_query_engine(state)
+            cache, fingerprint = codegen_cache_for(engine)
             logger.info(
-                f"Executing search with parameters: {state.current_task.result}",
-                "db_search/executor"
+                f"Executing search on {engine.value}",
+                "db_search/executor",
+                extras={"code": state.current_task.result}
             )
             
-            # Execute the pandas code directly
-            result = Executor.csv_ops.search(state.current_task.result)
+            # Generated code never runs on the event loop thread
+            if engine == QueryEngine.DUCKDB:
+                result = await asyncio.to_thread(get_duckdb_operations().search, state.current_task.result)
+            else:
+                result = await run_search(get_settings().default_dataset, state.current_task.result)
+            
+            # Only code that ran successfully is worth reusing
+            if cache is not None:
+                cache.put(engine.value, fingerprint, state.task_graph.query, state.current_task.task_node.parameters, code)
             
             logger.info(
-                f"Search executed successfully: {result}",
-                "db_search/executor"
+                "Search executed successfully",
+                "db_search/executor",
+                extras={"result": result}
             )
             
             if state.current_task:
@@ -143,6 +261,8 @@ class Executor(BaseNode):
             
         except Exception as e:
             logger.error(f"Error executing search: {e}", "db_search/executor")
+            if cache is not None:
+                cache.invalidate(engine.value, fingerprint, state.task_graph.query, state.current_task.task_node.parameters)
             state.current_task.status = ExecutionStatus.FAILED
             state.current_task.error = str(e)
             state.current_task = None
@@ -4,17 +4,13 @@ from langgraph.graph import StateGraph
 
 from app.schemas.state import AgentState, ExecutionStatus
 from app.workflows.base import BaseNode
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
-load_dotenv()
+from app.core.llm import get_openai_client
 class WebSearchNode(BaseNode):
     @staticmethod
     async def process(state: AgentState, config: RunnableConfig) -> AgentState:
         """Perform web search and process results."""
         # TODO: Implement web search logic
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        response = client.responses.create(
+        response = await get_openai_client().responses.create(
             model="gpt-4o",
             tools=[{"type":"web_search_preview"}],
             input=[
@@ -1,8 +1,14 @@
 import pytest
+from types import SimpleNamespace
 from typing import Dict, Any
 from unittest.mock import patch
 from app.core.config import Settings, get_settings
+from app.schemas.decomposer import TaskGraph, TaskNode
+from app.schemas.helpers import SubgraphType, ExecutionStatus
+from app.schemas.state import AgentState
+from app.services.csv_operations import enable_copy_on_write
 from app.services.decomposer import DecomposerService
+from app.workflows.subgraphs import conversation
 
 class MockSettings(Settings):
     openai_api_key: str = "test-key"
@@ -11,6 +17,11 @@ class MockSettings(Settings):
     class Config:
         env_file = None
 
+@pytest.fixture(scope="session", autouse=True)
+def copy_on_write():
+    """Run every test with the pandas options the server sets at startup"""
+    enable_copy_on_write()
+
 @pytest.fixture(autouse=True)
 def mock_settings():
     """Automatically mock settings for all tests"""
@@ -61,4 +72,75 @@ def mock_decomposer_service(mocker, mock_openai_response):
     mock_client.chat.completions.create = mock_completion
     
     service.client = mock_client
-    return service
\ No newline at end of file
+    return service
+
+@pytest.fixture
+def csv_content() -> str:
+    """Small copy of the games dataset, with missing values in most columns"""
+    return """Console,Critic Score,Developer,Title,Japan Sales,Last Update,NA Sales,Other Sales,PAL Sales,Publisher,Release Date,Total Sales,Total Shipped,User Score,VGChartz Score
+PS,9.5,Polyphony Digital,Gran Turismo,,,,,,Sony Computer Entertainment,30-04-1998,,10.85,,
+PS,9.6,SquareSoft,Final Fantasy VII,,23-03-2019,,,,Sony Computer Entertainment,03-09-1997,,9.9,9.5,
+PS4,8.1,Naughty Dog,The Last of Us Remastered,0.1,05-08-2023,3.2,0.9,2.5,Sony Computer Entertainment,29-07-2014,6.7,,8.8,
+PS4,7.5,EA Vancouver,FIFA 18,0.2,,1.3,1.1,5.8,Electronic Arts,29-09-2017,8.4,,,
+"""
+
+@pytest.fixture
+def csv_path(tmp_path, csv_content):
+    """Write the games dataset to games.csv in a temporary data directory"""
+    path = tmp_path / "games.csv"
+    path.write_text(csv_content)
+    return path
+
+class FakeCompletions:
+    """Streams the draft word by word, echoes it back for the citation pass and records every call"""
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    async def create(self, stream=False, **kwargs):
+        self.calls.append((stream, kwargs["messages"][0]["content"]))
+        if not stream:
+            message = SimpleNamespace(content=self.answer)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        async def chunks():
+            for i, word in enumerate(self.answer.split(" ")):
+                delta = SimpleNamespace(content=word if i == 0 else " " + word)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        return chunks()
+
+@pytest.fixture
+def fake_llm(mocker):
+    """Answer conversation tasks with a fixed draft, returning the fake completions"""
+    completions = FakeCompletions("Gran Turismo sold best")
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    mocker.patch.object(conversation, "get_openai_client", return_value=client)
+    return completions
+
+@pytest.fixture
+def make_conversation_graph():
+    """Builder of task graphs with a single conversation task for a query"""
+    def conversation_graph(query):
+        task = TaskNode(
+            id="c1", title="conversation", description="Respond to the user's query",
+            estimated_complexity=1, subgraph_type=SubgraphType.CONVERSATION, status=ExecutionStatus.PENDING
+        )
+        return TaskGraph(id="g1", query=query, tasks=[task])
+    return conversation_graph
+
+@pytest.fixture
+def make_task():
+    """Builder of task nodes: make_task(id, subgraph_type, dependencies=())"""
+    def task(task_id, subgraph_type, dependencies=()):
+        return TaskNode(
+            id=task_id, title=subgraph_type.value, description=f"{subgraph_type.value} task",
+            estimated_complexity=1, subgraph_type=subgraph_type, dependencies=list(dependencies)
+        )
+    return task
+
+@pytest.fixture
+def make_state():
+    """Builder of workflow states running the given task nodes under task graph g1"""
+    def state_with(*tasks):
+        return AgentState(task_graph_id="g1", task_graph=TaskGraph(id="g1", query="q", tasks=list(tasks)))
+    return state_with
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services import aggregates
+from app.services.aggregates import AggregateCube
+
+@pytest.fixture
+def games():
+    """Small frame with the cube dimensions and measures"""
+    return pd.DataFrame({
+        "Console": pd.Categorical(["PS4", "PS", "PS4", "PS5", "PS4", "PS"]),
+        "Publisher": pd.Categorical(["EA", "Sony", "Ubisoft", "EA", "Sony", "Sony"]),
+        "Developer": pd.Categorical(["EA Vancouver", "Polyphony", "Ubisoft Montreal", "EA Vancouver", "Naughty Dog", "SquareSoft"]),
+        "Release Date": pd.to_datetime(["2017-09-29", "1998-04-30", "2018-03-27", "2021-10-01", "2014-07-29", None]),
+        "Total Sales": np.array([8.4, np.nan, 3.1, 2.0, 6.7, 1.2], dtype="float32"),
+        "NA Sales": np.array([1.3, np.nan, 1.0, 0.5, 3.2, 0.4], dtype="float32"),
+        "Critic Score": np.array([7.5, 9.5, np.nan, 8.0, 9.1, 9.6], dtype="float32"),
+    })
+
+def assert_rollups_equal(actual: AggregateCube, expected: AggregateCube):
+    for keys, rollup in expected._rollups.items():
+        other = actual._rollups[keys]
+        pd.testing.assert_frame_equal(other.sums, rollup.sums)
+        pd.testing.assert_frame_equal(other.counts, rollup.counts)
+        pd.testing.assert_series_equal(other.rows, rollup.rows)
+
+@pytest.mark.parametrize("agg", ["sum", "mean", "count", "size"])
+@pytest.mark.parametrize("by", ["Console", "Publisher", "Developer"])
+def test_rollup_matches_groupby(games, agg, by):
+    """Test that rollups give the same numbers as a groupby over the rows"""
+    cube = AggregateCube.build(games)
+    expected = games.groupby(by, observed=True)["Total Sales"].agg(agg)
+
+    result = cube.rollup("Total Sales", agg, by)
+
+    assert list(result.index) == list(expected.index)
+    assert np.allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float), equal_nan=True)
+
+def test_rollup_by_release_year(games):
+    """Test grouping by the year of the release date"""
+    cube = AggregateCube.build(games)
+
+    result = cube.rollup("Critic Score", "mean", ("Console", "Release Year"))
+
+    assert result.loc[("PS4", 2014)] == pytest.approx(9.1)
+    assert ("PS", 1998) in result.index
+    assert len(result) == 5
+
+def test_unknown_rollup_rejected(games):
+    """Test that questions the cube cannot answer are rejected"""
+    cube = AggregateCube.build(games)
+
+    with pytest.raises(ValueError):
+        cube.rollup("User Score", "sum", "Console")
+    with pytest.raises(ValueError):
+        cube.rollup("Total Sales", "sum", "Title")
+    with pytest.raises(ValueError):
+        cube.rollup("Total Sales", "median", "Console")
+
+def test_incremental_refresh_matches_rebuild(games, monkeypatch):
+    """Test that applying the changed rows gives the same cube as a rebuild"""
+    monkeypatch.setattr(aggregates, "INCREMENTAL_REFRESH_MIN_ROWS", 0)
+    monkeypatch.setattr(aggregates, "INCREMENTAL_REFRESH_LIMIT", 1.0)
+    cube = AggregateCube.build(games)
+    updated = games.copy()
+    updated.loc[1, "Total Sales"] = 10.8
+    updated["Console"] = updated["Console"].cat.add_categories(["PS3"])
+    updated.loc[5, "Console"] = "PS3"
+    updated.loc[3, "Release Date"] = pd.Timestamp("2022-01-01")
+
+    refreshed = cube.refreshed(games, updated)
+
+    assert refreshed is not cube
+    assert_rollups_equal(refreshed, AggregateCube.build(updated))
+
+def test_refresh_without_changes_keeps_cube(games):
+    """Test that updates not touching the cube columns reuse the cube"""
+    cube = AggregateCube.build(games)
+    updated = games.copy()
+    updated["Title"] = "renamed"
+
+    assert cube.refreshed(games, updated) is cube
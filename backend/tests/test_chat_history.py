@@ -0,0 +1,99 @@
+import httpx
+import pytest
+from app.main import app
+from app.routers import chat
+from app.schemas.chat import ChatMessageResponse
+from app.services.chat_history import ChatHistoryStore
+
+def message(i):
+    return ChatMessageResponse(id=f"m{i}", message=f"question {i}", response=f"answer {i}")
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "chat_history.sqlite3")
+
+@pytest.fixture
+def store(store_path):
+    store = ChatHistoryStore(store_path, recent_size=4)
+    yield store
+    store.close()
+
+def test_pages_walk_back_from_newest(store):
+    """Test that cursors page through every message once, oldest first within a page"""
+    for i in range(10):
+        store.append("t1", message(i))
+
+    pages, cursor = [], None
+    while True:
+        messages, cursor = store.page(limit=3, cursor=cursor)
+        pages.append([m.id for m in messages])
+        if cursor is None:
+            break
+
+    assert pages == [["m7", "m8", "m9"], ["m4", "m5", "m6"], ["m1", "m2", "m3"], ["m0"]]
+
+def test_recent_page_is_served_from_memory(store):
+    """Test that the newest page comes from the ring buffer and older ones from SQLite"""
+    for i in range(10):
+        store.append("t1", message(i))
+
+    messages, cursor = store.page(limit=2)
+    assert store.stats()["memory_reads"] == 1
+
+    store.page(limit=2, cursor=cursor - 2)
+    assert store.stats()["database_reads"] == 1
+    assert store.stats()["recent"] == 4
+
+def test_thread_filter(store):
+    """Test that only the requested conversation is returned"""
+    for i in range(6):
+        store.append("even" if i % 2 == 0 else "odd", message(i))
+
+    messages, cursor = store.page(limit=10, thread_id="odd")
+
+    assert [m.id for m in messages] == ["m1", "m3", "m5"]
+    assert cursor is None
+
+def test_history_survives_restart(store_path):
+    """Test that a reopened store still has its messages"""
+    first = ChatHistoryStore(store_path, recent_size=2)
+    for i in range(3):
+        first.append("t1", message(i))
+    first.close()
+
+    reopened = ChatHistoryStore(store_path, recent_size=2)
+    messages, _ = reopened.page(limit=10)
+    reopened.close()
+
+    assert [m.id for m in messages] == ["m0", "m1", "m2"]
+
+def test_old_messages_are_dropped(store_path):
+    """Test that only the newest max_messages are kept"""
+    store = ChatHistoryStore(store_path, recent_size=2, max_messages=3)
+    for i in range(5):
+        store.append("t1", message(i))
+
+    messages, cursor = store.page(limit=10)
+    store.close()
+
+    assert [m.id for m in messages] == ["m2", "m3", "m4"]
+    assert cursor is None
+
+async def test_history_endpoint_paginates(store, mocker, monkeypatch):
+    """Test that /history returns a page and the cursor of the next one"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    mocker.patch.object(chat, "get_chat_history_store", return_value=store)
+    for i in range(5):
+        store.append("t1" if i < 3 else "t2", message(i))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = (await client.get("/api/chat/history", params={"limit": 2})).json()
+        second = (await client.get("/api/chat/history", params={"limit": 2, "cursor": first["next_cursor"]})).json()
+        thread = (await client.get("/api/chat/history", params={"thread_id": "t2"})).json()
+        invalid = await client.get("/api/chat/history", params={"limit": 0})
+
+    assert [m["id"] for m in first["messages"]] == ["m3", "m4"]
+    assert [m["id"] for m in second["messages"]] == ["m1", "m2"]
+    assert [m["id"] for m in thread["messages"]] == ["m3", "m4"]
+    assert thread["next_cursor"] is None
+    assert invalid.status_code == 422
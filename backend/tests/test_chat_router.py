@@ -0,0 +1,48 @@
+import asyncio
+import pytest
+from app.routers import chat
+
+class FakeGuardrail:
+    def __init__(self, allowed, delay):
+        self.allowed = allowed
+        self.delay = delay
+
+    async def check_input_query(self, query):
+        await asyncio.sleep(self.delay)
+        return self.allowed
+
+class FakeDecomposer:
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = False
+        self.cancelled = False
+
+    async def decompose_query(self, query):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f"graph for {query}"
+
+async def test_decomposition_overlaps_guardrail(mocker):
+    """Test that an accepted query pays for the slower of the two calls, not their sum"""
+    mocker.patch.object(chat, "get_guardrail", return_value=FakeGuardrail(True, 0.2))
+    decomposer = FakeDecomposer(0.2)
+
+    start = asyncio.get_running_loop().time()
+    task_graph = await chat.decompose_if_allowed("Top 5 Sony games", decomposer)
+
+    assert task_graph == "graph for Top 5 Sony games"
+    assert asyncio.get_running_loop().time() - start < 0.35
+
+async def test_rejection_cancels_decomposition(mocker):
+    """Test that a rejected query discards the speculative decomposition"""
+    mocker.patch.object(chat, "get_guardrail", return_value=FakeGuardrail(False, 0))
+    decomposer = FakeDecomposer(5)
+
+    task_graph = await asyncio.wait_for(chat.decompose_if_allowed("Delete all the data", decomposer), 1)
+
+    assert task_graph is None
+    assert decomposer.started and decomposer.cancelled
@@ -0,0 +1,242 @@
+import pytest
+import sqlite3
+import uuid
+from langgraph.graph import StateGraph
+from app.core.config import get_settings
+from app.routers.chat import workflow_input
+from app.schemas.chat import ChatMessageRequest
+from app.schemas.decomposer import TaskGraph
+from app.schemas.helpers import SubgraphType, ExecutionStatus
+from app.schemas.state import AgentState
+from app.services.checkpoint import CheckpointService
+from app.services.checkpointer import SQLiteCheckpointer
+from app.workflows import main as workflows
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite3")
+
+def counting_search(calls, name, fail_first=False, fail_always=False):
+    """Subgraph that counts its runs and, if asked, crashes on the first or every one"""
+    async def search(state: AgentState, config):
+        calls[name] = calls.get(name, 0) + 1
+        if fail_always or (fail_first and calls[name] == 1):
+            raise ConnectionError("server went away")
+        state.collected_evidence.append({name: f"{name} evidence"})
+        state.current_task.status = ExecutionStatus.SUCCESS
+        state.completed_tasks[state.current_task.task_node.id] = state.current_task
+        state.current_task = None
+        return state
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("search", search)
+    workflow.set_entry_point("search")
+    return lambda: workflow.compile()
+
+@pytest.fixture
+def two_step_input(make_state, make_task):
+    """Input of a run whose web search depends on its database search"""
+    def build():
+        state = make_state(make_task("db", SubgraphType.DB_SEARCH), make_task("web", SubgraphType.WEB_SEARCH, ["db"]))
+        return state.model_dump()
+    return build
+
+async def test_interrupted_workflow_resumes(checkpoint_path, two_step_input, mocker):
+    """Test that a rerun of an interrupted thread continues after its last completed step"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web", fail_first=True))
+    config = {"configurable": {"thread_id": "request-1"}}
+
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    with pytest.raises(ConnectionError):
+        await workflows.AgentWorkflow(checkpointer=checkpointer).run_agent(two_step_input(), config)
+    checkpointer.close()
+
+    # A restarted server opens the same database
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    final = await workflows.AgentWorkflow(checkpointer=checkpointer).run_agent(two_step_input(), config)
+    checkpointer.close()
+
+    assert calls == {"db": 1, "web": 2}
+    assert final.collected_evidence == [{"db": "db evidence"}, {"web": "web evidence"}]
+
+async def test_finished_thread_starts_over(checkpoint_path, two_step_input, mocker):
+    """Test that reusing the thread of a finished run does not build on its state"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web"))
+    config = {"configurable": {"thread_id": "request-1"}}
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    workflow = workflows.AgentWorkflow(checkpointer=checkpointer)
+
+    await workflow.run_agent(two_step_input(), config)
+    final = await workflow.run_agent(two_step_input(), config)
+    checkpointer.close()
+
+    assert calls == {"db": 2, "web": 2}
+    assert len(final.collected_evidence) == 2
+
+async def test_new_input_does_not_resume(checkpoint_path, two_step_input, mocker):
+    """Test that a failed thread reused for another input starts that input over"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web", fail_first=True))
+    config = {"configurable": {"thread_id": "request-1"}}
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    workflow = workflows.AgentWorkflow(checkpointer=checkpointer)
+
+    with pytest.raises(ConnectionError):
+        await workflow.run_agent(two_step_input(), config)
+    new_input = two_step_input()
+    new_input["task_graph_id"] = new_input["task_graph"]["id"] = "g2"
+    new_input["task_graph"]["query"] = "another question"
+    final = await workflow.run_agent(new_input, config)
+    checkpointer.close()
+
+    assert final.task_graph_id == "g2"
+    assert calls == {"db": 2, "web": 2}
+
+async def test_retried_request_resumes(checkpoint_path, make_task, mocker):
+    """Test that a request retried with the same message resumes, though its task graph has fresh IDs"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web", fail_first=True))
+    config = {"configurable": {"thread_id": "request-1"}}
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    workflow = workflows.AgentWorkflow(checkpointer=checkpointer)
+    chat_message = ChatMessageRequest(message="Top Sony games and their reviews?")
+
+    def decomposed():
+        """Task graph as the decomposer builds it, with new IDs on every call"""
+        db, web = str(uuid.uuid4()), str(uuid.uuid4())
+        return TaskGraph(id=str(uuid.uuid4()), query=chat_message.message, tasks=[
+            make_task(db, SubgraphType.DB_SEARCH), make_task(web, SubgraphType.WEB_SEARCH, [db])
+        ])
+
+    with pytest.raises(ConnectionError):
+        await workflow.run_agent(workflow_input(chat_message, decomposed()), config)
+    final = await workflow.run_agent(workflow_input(chat_message, decomposed()), config)
+    checkpointer.close()
+
+    assert calls == {"db": 1, "web": 2}
+    assert len(final.collected_evidence) == 2
+
+async def test_failing_run_is_not_resumed_forever(checkpoint_path, two_step_input, mocker):
+    """Test that a run which keeps failing is started over after MAX_RESUMES resumes"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web", fail_always=True))
+    mocker.patch.object(workflows.AgentWorkflow, "MAX_RESUMES", 1)
+    config = {"configurable": {"thread_id": "request-1"}}
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    workflow = workflows.AgentWorkflow(checkpointer=checkpointer)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await workflow.run_agent(two_step_input(), config)
+    checkpointer.close()
+
+    # The second run resumed after the database search, the third started over
+    assert calls == {"db": 2, "web": 3}
+
+async def test_concurrent_tasks_are_checkpointed(checkpoint_path, make_state, make_task, mocker):
+    """Test that the parallel node runs its subgraphs under a checkpointer"""
+    calls = {}
+    mocker.patch.object(workflows, "create_db_search_graph", counting_search(calls, "db"))
+    mocker.patch.object(workflows, "create_web_search_graph", counting_search(calls, "web"))
+    checkpointer = SQLiteCheckpointer(checkpoint_path)
+    state = make_state(make_task("db", SubgraphType.DB_SEARCH), make_task("web", SubgraphType.WEB_SEARCH))
+
+    final = await workflows.AgentWorkflow(checkpointer=checkpointer).run_agent(state.model_dump(), {})
+
+    assert final.collected_evidence == [{"db": "db evidence"}, {"web": "web evidence"}]
+    assert checkpointer.stats()["checkpoints"] > 0
+    checkpointer.close()
+
+def test_writes_are_batched(checkpoint_path):
+    """Test that checkpoints stay buffered until the batch is full, and reads see them anyway"""
+    checkpointer = SQLiteCheckpointer(checkpoint_path, batch_size=3, flush_interval_seconds=60)
+    config = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+    for i in range(2):
+        checkpoint = {"v": 1, "id": f"0000{i}", "ts": "", "channel_values": {"x": i},
+                      "channel_versions": {}, "versions_seen": {}}
+        config = checkpointer.put(config, checkpoint, {"step": i}, {})
+
+    assert checkpointer.stats()["pending"] == 2
+    latest = checkpointer.get_tuple({"configurable": {"thread_id": "t1"}})
+    assert latest.checkpoint["channel_values"] == {"x": 1}
+    assert latest.parent_config["configurable"]["checkpoint_id"] == "00000"
+    assert checkpointer.stats()["pending"] == 0
+    assert [c.metadata["step"] for c in checkpointer.list(None)] == [1, 0]
+    checkpointer.close()
+
+class FailingConnection:
+    """Connection whose next transaction fails, everything else goes to the real one"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.fail = True
+
+    def executemany(self, *args):
+        if self.fail:
+            self.fail = False
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.executemany(*args)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.conn.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def test_failed_flush_keeps_buffer(checkpoint_path):
+    """Test that checkpoints survive a flush whose transaction fails"""
+    checkpointer = SQLiteCheckpointer(checkpoint_path, flush_interval_seconds=60)
+    checkpoint = {"v": 1, "id": "00001", "ts": "", "channel_values": {}, "channel_versions": {}, "versions_seen": {}}
+    checkpointer.put({"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}, checkpoint, {}, {})
+    conn = checkpointer._conn
+    checkpointer._conn = FailingConnection(conn)
+
+    with pytest.raises(sqlite3.OperationalError):
+        checkpointer.flush()
+    assert checkpointer.stats()["pending"] == 1
+
+    checkpointer._conn = conn
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "t1"}}).checkpoint["id"] == "00001"
+    checkpointer.close()
+
+def test_expired_threads_are_evicted(checkpoint_path):
+    """Test that threads past the TTL are deleted"""
+    checkpointer = SQLiteCheckpointer(checkpoint_path, ttl_seconds=0, flush_interval_seconds=60)
+    checkpoint = {"v": 1, "id": "00001", "ts": "", "channel_values": {}, "channel_versions": {}, "versions_seen": {}}
+    checkpointer.put({"configurable": {"thread_id": "old", "checkpoint_ns": ""}}, checkpoint, {}, {})
+    checkpointer.flush()
+
+    assert checkpointer.evict_expired() == 1
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "old"}}) is None
+    checkpointer.close()
+
+def test_checkpoint_service_is_bounded():
+    """Test that cleared and least recently used entries are dropped"""
+    service = CheckpointService(max_entries=2, ttl_seconds=60)
+    for i in range(3):
+        service.save_state({"task_graph_id": str(i)})
+    service.save_message("m", {"text": "hi"})
+    service.save_message("m", {"text": "again"})
+    service.clear_state("2")
+
+    assert service.get_state("0") is None
+    assert service.get_state("2") is None
+    assert service.state_checkpoint.stats()["size"] == 1
+    assert service.get_message("m") == [{"text": "hi"}, {"text": "again"}]
@@ -0,0 +1,102 @@
+import pytest
+from app.services.codegen_cache import CodegenCache, normalize_query, query_signature
+
+CODE = 'result = lookup("Publisher", "Sony Computer Entertainment").nlargest(5, "Total Sales")'
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an empty cache"""
+    cache = CodegenCache(str(tmp_path / "codegen.sqlite3"))
+    yield cache
+    cache.close()
+
+def test_normalization_ignores_case_and_punctuation():
+    """Test that questions differing only in case, spacing and punctuation normalize alike"""
+    assert normalize_query("  Top 5 Sony games?! ") == normalize_query("top 5 sony GAMES")
+    assert normalize_query("Average score above 8.5.") == "average score above 8.5"
+
+def test_exact_hit(cache):
+    """Test that the same question with the same parameters hits"""
+    cache.put("pandas", "fp", "Top 5 Sony games", {"limit": 5}, CODE)
+
+    assert cache.get("pandas", "fp", "top 5 sony games?", {"limit": 5}) == CODE
+    assert cache.get("pandas", "fp", "top 5 sony games", {"limit": 10}) is None
+    assert cache.stats()["hits"] == 1
+
+def test_near_duplicate_hit(cache):
+    """Test that rephrasings with filler words or plurals reuse the code"""
+    cache.put("pandas", "fp", "Top 5 Sony games by total sales", {}, CODE)
+
+    assert cache.get("pandas", "fp", "Show me the top 5 Sony games by total sales please", {}) == CODE
+    assert cache.get("pandas", "fp", "top 5 sony game total sales", {}) == CODE
+    assert cache.stats()["near_hits"] == 2
+
+@pytest.mark.parametrize("question", [
+    "Top 10 Sony games by total sales",
+    "Top 5 Nintendo games by total sales",
+    "Top 5 Sony games by total sales not on PS4",
+])
+def test_different_questions_miss(cache, question):
+    """Test that a different number, entity or condition never reuses the code"""
+    cache.put("pandas", "fp", "Top 5 Sony games by total sales", {}, CODE)
+
+    assert cache.get("pandas", "fp", question, {}) is None
+
+def test_word_order_matters(cache):
+    """Test that swapping entities is not a near-duplicate"""
+    cache.put("pandas", "fp", "Did Sony outsell Nintendo", {}, CODE)
+
+    assert query_signature("did sony outsell nintendo") == query_signature("did nintendo outsell sony")
+    assert cache.get("pandas", "fp", "Did Nintendo outsell Sony", {}) is None
+
+def test_comparison_operators_kept(cache):
+    """Test that questions differing only in a comparison operator never share code"""
+    assert normalize_query("Critic score ≥ 8!") == "critic score >= 8"
+    cache.put("pandas", "fp", "PS4 games with critic score > 8", {}, CODE)
+
+    assert cache.get("pandas", "fp", "PS4 games with critic score < 8", {}) is None
+    assert cache.get("pandas", "fp", "PS4 games with critic score >= 8", {}) is None
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Games selling more than 5 million in NA and less than 2 million in Japan",
+     "Games selling more than 2 million in NA and less than 5 million in Japan"),
+    ("Games released after 2010 and before 2015", "Games released before 2010 and after 2015"),
+])
+def test_swapped_numbers_miss(cache, stored, asked):
+    """Test that the same numbers and comparisons in another order are not near-duplicates"""
+    cache.put("pandas", "fp", stored, {}, CODE)
+
+    assert cache.get("pandas", "fp", asked, {}) is None
+
+def test_entries_persist(tmp_path):
+    """Test that entries survive a restart"""
+    path = str(tmp_path / "codegen.sqlite3")
+    CodegenCache(path).put("pandas", "fp", "Top 5 Sony games", {}, CODE)
+
+    assert CodegenCache(path).get("pandas", "fp", "Top 5 Sony games", {}) == CODE
+
+def test_stale_fingerprint_purged(cache):
+    """Test that a prompt or schema change drops only that namespace's entries"""
+    cache.put("pandas", "old", "Top 5 Sony games", {}, CODE)
+    cache.put("duckdb", "sql", "Top 5 Sony games", {}, "SELECT 1")
+
+    assert cache.get("pandas", "new", "Top 5 Sony games", {}) is None
+    assert cache.purge_stale("pandas", "new") == 1
+    assert cache.get("duckdb", "sql", "Top 5 Sony games", {}) == "SELECT 1"
+
+def test_invalidate_drops_near_duplicates(cache):
+    """Test that code that failed is never served again for the question"""
+    cache.put("pandas", "fp", "Top 5 Sony games", {}, CODE)
+
+    cache.invalidate("pandas", "fp", "show the top 5 sony games", {})
+
+    assert cache.get("pandas", "fp", "Top 5 Sony games", {}) is None
+
+def test_least_recently_used_evicted(tmp_path):
+    """Test that the cache stays within its size bound"""
+    cache = CodegenCache(str(tmp_path / "codegen.sqlite3"), max_entries=2)
+    for n in range(3):
+        cache.put("pandas", "fp", f"Top {n} Sony games", {}, CODE)
+
+    assert cache.get("pandas", "fp", "Top 0 Sony games", {}) is None
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,76 @@
+import pytest
+from types import SimpleNamespace
+from app.core.config import get_settings
+from app.schemas.helpers import ExecutionStatus
+from app.workflows import main as workflows
+from app.workflows.subgraphs import conversation
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+@pytest.fixture
+def single_pass(monkeypatch):
+    monkeypatch.setenv("CONVERSATION_SINGLE_PASS", "true")
+    get_settings.cache_clear()
+
+@pytest.fixture
+def run_conversation(make_conversation_graph):
+    async def run(evidence):
+        task_input = {
+            "task_graph_id": "g1",
+            "task_graph": make_conversation_graph("Best selling game?"),
+            "collected_evidence": evidence
+        }
+        return await workflows.AgentWorkflow().run_agent(task_input, {})
+    return run
+
+async def test_no_sources_skips_citation_pass(fake_llm, run_conversation):
+    """Test that evidence without links is answered by the draft alone"""
+    state = await run_conversation([{"db_search": "Gran Turismo, 10.95M sales"}])
+
+    assert [stream for stream, _ in fake_llm.calls] == [True]
+    assert state.final_answer == "Gran Turismo sold best"
+    assert state.completed_tasks["c1"].status == ExecutionStatus.SUCCESS
+    assert state.current_task is None
+
+async def test_sources_run_citation_pass(fake_llm, run_conversation):
+    """Test that evidence with links still goes through CitationAdder"""
+    state = await run_conversation([{"web_search": "Sales figures from https://vgchartz.com"}])
+
+    assert [stream for stream, _ in fake_llm.calls] == [True, False]
+    assert state.final_answer == "Gran Turismo sold best"
+    assert "c1" in state.completed_tasks
+
+async def test_single_pass_cites_in_draft(fake_llm, run_conversation, single_pass):
+    """Test that single-pass mode asks the draft for citations and makes one call"""
+    state = await run_conversation([{"web_search": "Sales figures from https://vgchartz.com"}])
+
+    assert len(fake_llm.calls) == 1
+    assert fake_llm.calls[0][1].endswith(conversation.CITATION_FORMAT)
+    assert state.completed_tasks["c1"].status == ExecutionStatus.SUCCESS
+
+async def test_single_pass_uses_citation_pass_format(fake_llm, run_conversation, monkeypatch):
+    """Test that the cited draft prompt is the general prompt plus the format CitationAdder is given"""
+    evidence = [{"web_search": "Sales figures from https://vgchartz.com"}]
+    await run_conversation(evidence)
+    monkeypatch.setenv("CONVERSATION_SINGLE_PASS", "true")
+    get_settings.cache_clear()
+    await run_conversation(evidence)
+    draft_prompt, citation_prompt, single_pass_prompt = [prompt for _, prompt in fake_llm.calls]
+
+    assert single_pass_prompt == draft_prompt + conversation.CITATION_FORMAT
+    assert citation_prompt.endswith(conversation.CITATION_FORMAT)
+    assert '"Sources:"' in conversation.CITATION_FORMAT and "[1] <link>" in conversation.CITATION_FORMAT
+
+def test_has_citable_sources():
+    """Test detection of links in collected evidence"""
+    def state(evidence, web_search_used=False):
+        return SimpleNamespace(collected_evidence=evidence, web_search_used=web_search_used)
+
+    assert conversation.has_citable_sources(state([{"a": "plain text"}, {"b": ["see www.example.com"]}]))
+    assert conversation.has_citable_sources(state([{"a": "plain"}], web_search_used=True))
+    assert not conversation.has_citable_sources(state([{"a": "plain"}]))
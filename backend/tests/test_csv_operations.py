@@ -0,0 +1,221 @@
+import os
+import ast
+import threading
+import pytest
+import numpy as np
+import pandas as pd
+from app.services.csv_operations import CSVOperations
+
+def test_load_applies_declared_schema(csv_path):
+    """Test that the declared column types are applied at load time"""
+    ops = CSVOperations(str(csv_path))
+
+    assert isinstance(ops.df["Console"].dtype, pd.CategoricalDtype)
+    assert isinstance(ops.df["Publisher"].dtype, pd.CategoricalDtype)
+    assert ops.df["Total Sales"].dtype == "float32"
+    assert ops.df["Critic Score"].dtype == "float32"
+    assert pd.api.types.is_datetime64_any_dtype(ops.df["Release Date"])
+    assert ops.df["Release Date"].iloc[1] == pd.Timestamp(1997, 9, 3)
+
+def test_sidecar_reused_while_csv_unchanged(csv_path, mocker):
+    """Test that a second load reads the sidecar instead of parsing the CSV"""
+    CSVOperations(str(csv_path))
+    assert csv_path.with_suffix(".parquet").exists()
+
+    parse = mocker.patch.object(CSVOperations, "_read_typed_csv")
+    ops = CSVOperations(str(csv_path))
+
+    parse.assert_not_called()
+    assert len(ops.df) == 4
+    assert isinstance(ops.df["Developer"].dtype, pd.CategoricalDtype)
+
+def test_sidecar_reused_when_only_mtime_changes(csv_path, mocker):
+    """Test that touching the CSV without changing it keeps the sidecar valid"""
+    CSVOperations(str(csv_path))
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    parse = mocker.patch.object(CSVOperations, "_read_typed_csv")
+    CSVOperations(str(csv_path))
+
+    parse.assert_not_called()
+
+def test_sidecar_rebuilt_when_csv_changes(csv_path, csv_content):
+    """Test that editing the CSV invalidates the sidecar"""
+    CSVOperations(str(csv_path))
+    csv_path.write_text(csv_content.replace("Gran Turismo,", "Gran Turismo 3,"))
+
+    ops = CSVOperations(str(csv_path))
+
+    assert "Gran Turismo 3" in set(ops.df["Title"])
+
+def test_update_preserves_date_format(csv_path):
+    """Test that updates write dates back in the original format"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 8.0\nresult = df')
+
+    assert "29-09-2017" in csv_path.read_text()
+    reloaded = CSVOperations(str(csv_path))
+    assert reloaded.df.loc[reloaded.df["Title"] == "FIFA 18", "Critic Score"].iloc[0] == 8.0
+    assert reloaded.df["Release Date"].iloc[3] == pd.Timestamp(2017, 9, 29)
+
+def test_search_does_not_copy_frame(csv_path):
+    """Test that read-only searches share the loaded data"""
+    ops = CSVOperations(str(csv_path))
+    result = ops.search('result = df')
+
+    assert result is not ops.df
+    assert np.shares_memory(result["Total Sales"].to_numpy(), ops.df["Total Sales"].to_numpy())
+
+def test_search_mutations_are_isolated(csv_path):
+    """Test that writes made by search code never reach the loaded frame"""
+    ops = CSVOperations(str(csv_path))
+    ops.search(
+        'df.loc[df["Console"] == "PS4", "Total Sales"] = 0.0\n'
+        'df["Extra"] = 1\n'
+        'df.drop(index=0, inplace=True)\n'
+        'result = df'
+    )
+
+    assert len(ops.df) == 4
+    assert "Extra" not in ops.df.columns
+    assert ops.df.loc[ops.df["Title"] == "FIFA 18", "Total Sales"].iloc[0] == pytest.approx(8.4)
+
+def test_repeated_snippets_reuse_compiled_code(csv_path, mocker):
+    """Test that repeated snippets skip parsing and compilation"""
+    ops = CSVOperations(str(csv_path))
+    parse = mocker.spy(ast, "parse")
+
+    first = ops.search('result = df[df["Console"] == "PS4"]')
+    ops.result_cache.clear()
+    second = ops.search('  result = df[df["Console"] == "PS4"]   \n')
+
+    assert parse.call_count == 1
+    assert ops.code_cache.stats()["hits"] == 1
+    assert ops.code_cache.stats()["misses"] == 1
+    assert first.equals(second)
+
+def test_validation_verdict_is_cached(csv_path):
+    """Test that rejected update code stays rejected on a cache hit"""
+    ops = CSVOperations(str(csv_path))
+    code = 'result = eval("df")'
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Dangerous function call"):
+            ops.update(code)
+
+    assert ops.code_cache.stats()["hits"] == 1
+
+def test_repeated_search_served_from_result_cache(csv_path, mocker):
+    """Test that identical searches on an unchanged dataset are not recomputed"""
+    ops = CSVOperations(str(csv_path))
+    code = 'result = df.groupby("Console", observed=True)["Total Sales"].sum()'
+    first = ops.search(code)
+
+    execute = mocker.spy(ops, "_execute_pandas_code")
+    second = ops.search(code)
+    second.iloc[0] = -1.0
+
+    execute.assert_not_called()
+    assert ops.result_cache.stats()["hits"] == 1
+    assert ops.search(code).equals(first)
+
+def test_update_invalidates_cached_results(csv_path):
+    """Test that results cached before an update are never served after it"""
+    ops = CSVOperations(str(csv_path))
+    code = 'result = float(df["Critic Score"].max())'
+    assert ops.search(code) == pytest.approx(9.6)
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 9.9\nresult = df')
+
+    assert ops.search(code) == pytest.approx(9.9)
+    assert ops.result_cache.stats()["size"] == 1
+
+def test_generated_code_can_use_index_lookup(csv_path):
+    """Test that the lookup helper is available to generated code and kept current"""
+    ops = CSVOperations(str(csv_path))
+    assert len(ops.search('result = lookup("Console", "PS4")')) == 2
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Console"] = "PS"\nresult = df')
+
+    assert len(ops.search('result = lookup("Console", "PS4")')) == 1
+    assert list(ops.search('result = lookup("Console", ["ps"], case=False)')["Title"]) == ["Gran Turismo", "Final Fantasy VII", "FIFA 18"]
+
+def test_generated_code_can_use_substring_search(csv_path):
+    """Test that the contains helper is available to generated code"""
+    ops = CSVOperations(str(csv_path))
+
+    result = ops.search('result = contains("Title", "gran turismo")')
+
+    assert list(result["Title"]) == ["Gran Turismo"]
+
+def test_generated_code_can_use_rollups(csv_path):
+    """Test that the rollup helper is available to generated code and refreshed on update"""
+    ops = CSVOperations(str(csv_path))
+    code = 'result = rollup("Total Sales", "sum", "Console")'
+    assert ops.search(code)["PS4"] == pytest.approx(15.1)
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Total Sales"] = 1.0\nresult = df')
+
+    assert ops.search(code)["PS4"] == pytest.approx(7.7)
+
+def test_pinned_snapshot_unaffected_by_update(csv_path):
+    """Test that a reader keeps seeing the version it pinned while updates commit"""
+    ops = CSVOperations(str(csv_path))
+    pinned = ops.snapshot()
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Total Sales"] = 1.0\nresult = df')
+
+    assert pinned.version == 0 and ops.version == 1
+    assert pinned.df.loc[pinned.df["Title"] == "FIFA 18", "Total Sales"].iloc[0] == pytest.approx(8.4)
+    assert pinned.cube.rollup("Total Sales", "sum", "Console")["PS4"] == pytest.approx(15.1)
+    assert ops.search('result = float(df["Total Sales"].max())') == pytest.approx(6.7)
+
+def test_old_snapshots_released_once_unpinned(csv_path):
+    """Test that superseded versions are freed when no reader holds them"""
+    ops = CSVOperations(str(csv_path))
+    pinned = ops.snapshot()
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Total Sales"] = 1.0\nresult = df')
+    assert ops.snapshots.live_versions() == [0, 1]
+
+    del pinned
+    assert ops.snapshots.live_versions() == [1]
+
+def test_concurrent_searches_and_updates(csv_path):
+    """Test that searches running alongside updates only ever see committed versions"""
+    ops = CSVOperations(str(csv_path))
+    code = 'result = (float(df["Critic Score"].iloc[0]), float(df["User Score"].iloc[1]))'
+    results = []
+
+    def read():
+        for _ in range(50):
+            ops.result_cache.clear()
+            results.append(ops.search(code))
+
+    def write():
+        for i in range(20):
+            ops.update(
+                f'df["Critic Score"] = df["Critic Score"] + 1\n'
+                f'df["User Score"] = df["User Score"] + 1\n'
+                'result = df'
+            )
+
+    threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Both columns move together in every committed version
+    assert all(critic == pytest.approx(user) for critic, user in results)
+    assert ops.version == 20
+
+def test_read_only_dataset_never_writes(csv_path):
+    """Test that a read-only handle refuses updates and leaves the files alone"""
+    ops = CSVOperations(str(csv_path), read_only=True)
+
+    with pytest.raises(ValueError, match="read-only"):
+        ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 8.0\nresult = df')
+    assert not csv_path.with_suffix(".parquet").exists()
+    assert not csv_path.with_suffix(".wal").exists()
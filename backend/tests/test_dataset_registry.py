@@ -0,0 +1,31 @@
+import pytest
+from app.services.dataset_registry import DatasetRegistry
+
+@pytest.fixture
+def registry(csv_path):
+    """Create a registry over a data directory with one dataset"""
+    return DatasetRegistry(str(csv_path.parent))
+
+def test_datasets_are_loaded_lazily(registry):
+    """Test that nothing is loaded until a dataset is requested"""
+    assert registry.available() == ["games"]
+    assert registry.loaded() == []
+
+    registry.get("games")
+    assert registry.loaded() == ["games"]
+
+def test_callers_share_one_handle(registry):
+    """Test that updates through one handle are visible to every caller"""
+    writer = registry.get("games")
+    writer.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 9.0\nresult = df')
+
+    reader = registry.get("games")
+    assert reader is writer
+    assert reader.version == 1
+    assert reader.df.loc[reader.df["Title"] == "FIFA 18", "Critic Score"].iloc[0] == 9.0
+
+@pytest.mark.parametrize("name", ["missing", "../games", ""])
+def test_unknown_dataset_rejected(registry, name):
+    """Test that unknown names and paths outside the data directory are rejected"""
+    with pytest.raises(ValueError):
+        registry.get(name)
@@ -0,0 +1,137 @@
+import pytest
+import pandas as pd
+from app.services import csv_operations
+from app.services.csv_operations import CSVOperations
+
+def test_cell_update_appends_to_log_without_rewriting_csv(csv_path):
+    """Test that a cell update is logged instead of rewriting the CSV"""
+    ops = CSVOperations(str(csv_path))
+    mtime = csv_path.stat().st_mtime_ns
+
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 8.0\nresult = df')
+
+    assert csv_path.stat().st_mtime_ns == mtime
+    _, entries = ops.delta_log.read()
+    assert entries == [{"lsn": 1, "changes": {"Critic Score": [[3], [8.0]]}}]
+
+def test_log_replayed_on_startup(csv_path):
+    """Test that logged changes are applied when the dataset is loaded again"""
+    ops = CSVOperations(str(csv_path))
+    ops.update(
+        'df.loc[df["Title"] == "Gran Turismo", "Total Sales"] = 10.8\n'
+        'df.loc[df["Title"] == "FIFA 18", "Release Date"] = pd.Timestamp(2017, 9, 30)\n'
+        'result = df'
+    )
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Publisher"] = "EA Sports"\nresult = df')
+
+    reloaded = CSVOperations(str(csv_path))
+
+    pd.testing.assert_frame_equal(reloaded.df, ops.df)
+    assert reloaded.df["Publisher"].iloc[3] == "EA Sports"
+
+def test_compaction_folds_log_into_csv(csv_path):
+    """Test that compaction writes the CSV and empties the log"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 8.0\nresult = df')
+
+    ops.compact()
+
+    assert ops.delta_log.read()[1] == []
+    assert "PS4,8.0,EA Vancouver,FIFA 18" in csv_path.read_text()
+    assert CSVOperations(str(csv_path)).df["Critic Score"].iloc[3] == 8.0
+
+def test_crash_during_compaction_keeps_later_entries(csv_path, monkeypatch):
+    """Test that entries newer than a compaction survive a crash right after the CSV swap"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 8.0\nresult = df')
+    compacted = ops.snapshot()
+    ops.update('df.loc[df["Title"] == "FIFA 18", "Critic Score"] = 1.0\nresult = df')
+
+    # Compact the first update only, and crash once the new CSV is in place
+    monkeypatch.setattr(ops, "snapshot", lambda: compacted)
+    def crash(*args):
+        raise RuntimeError("crash")
+    monkeypatch.setattr(ops, "_write_sidecar", crash)
+    with pytest.raises(RuntimeError):
+        ops.compact()
+
+    assert "PS4,8.0,EA Vancouver,FIFA 18" in csv_path.read_text()
+    assert CSVOperations(str(csv_path), read_only=True).df["Critic Score"].iloc[3] == 1.0
+    reloaded = CSVOperations(str(csv_path))
+    assert reloaded.df["Critic Score"].iloc[3] == 1.0
+    assert [entry["lsn"] for entry in reloaded.delta_log.read()[1]] == [2]
+
+def test_compaction_starts_in_background(csv_path, monkeypatch):
+    """Test that a large enough log is compacted without blocking the update"""
+    monkeypatch.setattr(csv_operations, "COMPACT_AFTER_ENTRIES", 2)
+    ops = CSVOperations(str(csv_path))
+    compact = []
+    monkeypatch.setattr(ops, "compact", lambda: compact.append(True))
+
+    ops.update('df.loc[0, "Critic Score"] = 9.0\nresult = df')
+    ops.update('df.loc[0, "Critic Score"] = 9.1\nresult = df')
+
+    for thread in __import__("threading").enumerate():
+        if thread.name == "csv-compaction":
+            thread.join()
+    assert compact == [True]
+
+def test_structural_update_rewrites_csv(csv_path):
+    """Test that changes to the rows rewrite the CSV and reset the log"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[0, "Critic Score"] = 9.0\nresult = df')
+
+    ops.update('result = df[df["Console"] == "PS4"]')
+
+    assert ops.delta_log.read()[1] == []
+    assert "Gran Turismo" not in csv_path.read_text()
+    assert len(CSVOperations(str(csv_path)).df) == 2
+
+def test_torn_trailing_entry_ignored(csv_path):
+    """Test that a partially written last entry from a crash is skipped"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[0, "Critic Score"] = 9.0\nresult = df')
+    with open(ops.delta_log.path, "a") as f:
+        f.write('{"lsn": 2, "changes": {"Critic Sc')
+
+    reloaded = CSVOperations(str(csv_path))
+
+    assert reloaded.df["Critic Score"].iloc[0] == 9.0
+
+def test_update_after_torn_entry_survives_restart(csv_path):
+    """Test that an update committed after a crash is not lost behind the torn line"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[1, "Critic Score"] = 9.0\nresult = df')
+    with open(ops.delta_log.path, "a") as f:
+        f.write('{"lsn": 2, "changes": {"Critic Sc')
+
+    restarted = CSVOperations(str(csv_path))
+    restarted.update('df.loc[1, "Critic Score"] = 1.0\nresult = df')
+    reloaded = CSVOperations(str(csv_path))
+
+    assert reloaded.df["Critic Score"].iloc[1] == 1.0
+    assert [entry["lsn"] for entry in reloaded.delta_log.read()[1]] == [1, 2]
+
+def test_read_only_load_leaves_torn_entry(csv_path):
+    """Test that a reader skips an append still being written instead of truncating it"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[0, "Critic Score"] = 9.0\nresult = df')
+    with open(ops.delta_log.path, "a") as f:
+        f.write('{"lsn": 2, "changes": {"Critic Sc')
+    before = ops.delta_log.path.read_bytes()
+
+    reader = CSVOperations(str(csv_path), read_only=True)
+
+    assert reader.df["Critic Score"].iloc[0] == 9.0
+    assert ops.delta_log.path.read_bytes() == before
+
+def test_log_for_replaced_csv_discarded(csv_path, csv_content):
+    """Test that entries written against another version of the CSV are not replayed"""
+    ops = CSVOperations(str(csv_path))
+    ops.update('df.loc[0, "Critic Score"] = 1.0\nresult = df')
+    csv_path.write_text(csv_content.replace("Gran Turismo,", "Gran Turismo 2,"))
+
+    reloaded = CSVOperations(str(csv_path))
+
+    assert reloaded.df["Critic Score"].iloc[0] == pytest.approx(9.5)
+    assert reloaded.delta_log.read()[1] == []
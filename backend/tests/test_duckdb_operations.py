@@ -0,0 +1,56 @@
+import duckdb
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.services.duckdb_operations import DuckDBOperations
+
+@pytest.fixture
+def duckdb_ops(tmp_path):
+    """Create a small games database and open a pool over it"""
+    db_path = tmp_path / "gaming.duckdb"
+    with duckdb.connect(str(db_path)) as con:
+        con.execute('CREATE TABLE games ("Title" VARCHAR, "Console" VARCHAR, "Total Sales" FLOAT)')
+        con.execute("INSERT INTO games VALUES ('Gran Turismo', 'PS', 10.8), ('FIFA 18', 'PS4', 8.4), ('Uncharted 4', 'PS4', 5.4)")
+    ops = DuckDBOperations(str(db_path), pool_size=2)
+    yield ops
+    ops.close()
+
+def test_search_returns_dataframe(duckdb_ops):
+    """Test that SELECT queries run and return a DataFrame"""
+    result = duckdb_ops.search('SELECT "Console", SUM("Total Sales") AS sales FROM games GROUP BY "Console" ORDER BY "Console"')
+
+    assert list(result["Console"]) == ["PS", "PS4"]
+    assert result["sales"].iloc[1] == pytest.approx(13.8)
+
+def test_concurrent_searches_share_pool(duckdb_ops):
+    """Test that more concurrent queries than pooled cursors all complete"""
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: duckdb_ops.search("SELECT COUNT(*) AS n FROM games"), range(12)))
+
+    assert all(result["n"].iloc[0] == 3 for result in results)
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM games",
+    "SELECT 1; DROP TABLE games",
+    "COPY games TO 'out.csv'",
+    "SELEC nonsense",
+])
+def test_non_select_statements_rejected(duckdb_ops, sql):
+    """Test that anything other than a single SELECT is rejected"""
+    with pytest.raises(ValueError):
+        duckdb_ops.search(sql)
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM read_csv('/etc/passwd', header=false)",
+    "SELECT * FROM read_text('/etc/passwd')",
+    "SELECT * FROM glob('/etc/*')",
+])
+def test_file_access_rejected(duckdb_ops, sql):
+    """Test that a SELECT cannot read files from the host"""
+    with pytest.raises((duckdb.Error, ValueError)):
+        duckdb_ops.search(sql)
+
+def test_configuration_locked(duckdb_ops):
+    """Test that file access cannot be switched back on through a pooled cursor"""
+    with duckdb_ops._acquire() as cursor:
+        with pytest.raises(duckdb.Error):
+            cursor.execute("SET enable_external_access = true")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.indexes import ColumnIndex, DatasetIndexes
+
+@pytest.fixture
+def games():
+    """Small frame with categorical and string columns"""
+    return pd.DataFrame({
+        "Console": pd.Categorical(["PS4", "PS", "PS4", "PS5", None, "PS4"]),
+        "Publisher": pd.Categorical(["EA", "Sony", "Ubisoft", "EA", "Sony", "ea"]),
+        "Title": ["FIFA 18", "Gran Turismo", "Far Cry 5", "FIFA 22", "Wipeout", "NHL 18"],
+        "Total Sales": [8.4, 10.8, 3.1, 2.0, 1.2, 0.5],
+    })
+
+def test_lookup_matches_boolean_mask(games):
+    """Test that index lookups return the same rows as a full scan"""
+    indexes = DatasetIndexes(games)
+
+    assert indexes.rows(games, "Console", "PS4").equals(games[games["Console"] == "PS4"])
+    assert indexes.rows(games, "Console", ["PS4", "PS5"]).equals(games[games["Console"].isin(["PS4", "PS5"])])
+    assert indexes.rows(games, "Title", "Wipeout").equals(games[games["Title"] == "Wipeout"])
+
+def test_case_insensitive_lookup(games):
+    """Test that case=False matches every casing of a value"""
+    index = ColumnIndex("Publisher", games["Publisher"])
+
+    assert list(index.lookup("EA")) == [0, 3]
+    assert list(index.lookup("ea", case=False)) == [0, 3, 5]
+
+def test_lookup_many_counts_each_row_once(games):
+    """Test that values equal after case folding do not return their rows twice"""
+    index = ColumnIndex("Publisher", games["Publisher"])
+
+    assert list(index.lookup_many(["EA", "ea", "Sony"], case=False)) == [0, 1, 3, 4, 5]
+    assert list(index.lookup_many(["EA", "EA", "ea"])) == [0, 3, 5]
+
+def test_missing_value_returns_no_rows(games):
+    """Test that absent values give an empty result"""
+    indexes = DatasetIndexes(games)
+
+    assert len(indexes.positions("Console", "PS3")) == 0
+    assert indexes.rows(games, "Console", []).empty
+
+def test_unindexed_column_rejected(games):
+    """Test that lookups on columns without an index are rejected"""
+    with pytest.raises(ValueError):
+        DatasetIndexes(games).positions("Total Sales", 8.4)
+
+def test_only_changed_columns_are_rebuilt(games):
+    """Test that refreshing after an update reuses indexes of unchanged columns"""
+    indexes = DatasetIndexes(games)
+    updated = games.copy()
+    updated.loc[1, "Title"] = "Gran Turismo 2"
+
+    refreshed = DatasetIndexes(updated, previous=indexes)
+
+    assert refreshed._indexes["Console"] is indexes._indexes["Console"]
+    assert refreshed._indexes["Title"] is not indexes._indexes["Title"]
+    assert list(refreshed.positions("Title", "Gran Turismo 2")) == [1]
+    assert len(refreshed.positions("Title", "Gran Turismo")) == 0
+
+@pytest.mark.parametrize("needle,case", [("fifa", False), ("FIFA", True), ("fifa", True), ("18", False), ("a", False), ("zzz", False)])
+def test_substring_search_matches_str_contains(games, needle, case):
+    """Test that trigram substring search returns the same rows as str.contains"""
+    indexes = DatasetIndexes(games)
+    expected = games[games["Title"].str.contains(needle, case=case, na=False, regex=False)]
+
+    assert indexes.rows_containing(games, "Title", needle, case).equals(expected)
+
+def test_substring_search_on_categorical_column(games):
+    """Test that substring search works on categorical company columns"""
+    indexes = DatasetIndexes(games)
+
+    assert list(indexes.contains_positions("Publisher", "ea")) == [0, 3, 5]
+    with pytest.raises(ValueError):
+        indexes.contains_positions("Console", "PS")
+
+def test_text_index_follows_updates(games):
+    """Test that the trigram index is rebuilt when its column changes"""
+    indexes = DatasetIndexes(games)
+    updated = games.copy()
+    updated.loc[2, "Title"] = "Far Cry 6"
+
+    refreshed = DatasetIndexes(updated, previous=indexes)
+
+    assert list(refreshed.contains_positions("Title", "cry 6")) == [2]
+    assert len(refreshed.contains_positions("Title", "cry 5")) == 0
+    assert refreshed._text["Publisher"] is indexes._text["Publisher"]
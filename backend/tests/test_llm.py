@@ -0,0 +1,58 @@
+import pytest
+from app.core import llm
+from app.core.config import get_settings
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Give each test its own shared clients"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("CODEGEN_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    llm.get_http_client.cache_clear()
+    llm.get_openai_client.cache_clear()
+    yield
+    llm.get_http_client.cache_clear()
+    llm.get_openai_client.cache_clear()
+    get_settings.cache_clear()
+
+def test_openai_client_is_shared(clients):
+    """Test that every caller gets the same client over the same connection pool"""
+    client = llm.get_openai_client()
+
+    assert llm.get_openai_client() is client
+    assert client._client is llm.get_http_client()
+
+def test_http_client_pool_is_tuned(clients):
+    """Test that the connection pool follows the settings"""
+    settings = get_settings()
+    pool = llm.get_http_client()._transport._pool
+
+    assert pool._max_connections == settings.openai_max_connections
+    assert pool._max_keepalive_connections == settings.openai_max_keepalive_connections
+    assert pool._http2 == llm.HTTP2_AVAILABLE
+
+async def test_query_generator_awaits_shared_client(clients, mocker):
+    """Test that workflow nodes await the shared async client instead of building their own"""
+    from app.schemas.decomposer import TaskGraph, TaskNode
+    from app.schemas.helpers import SubgraphType, ExecutionStatus
+    from app.schemas.state import AgentState, TaskExecutionState
+    from app.workflows.subgraphs.db_search import QueryGenerator
+
+    create = mocker.patch.object(
+        llm.get_openai_client().chat.completions, "create", new_callable=mocker.AsyncMock
+    )
+    create.return_value.choices[0].message.content = "```python\nresult = df\n```"
+    task = TaskNode(
+        id="1", title="db_search", description="All games", estimated_complexity=1,
+        subgraph_type=SubgraphType.DB_SEARCH, status=ExecutionStatus.PENDING
+    )
+    state = AgentState(
+        task_graph_id="g",
+        task_graph=TaskGraph(id="g", query="All games", tasks=[task]),
+        current_task=TaskExecutionState(task_node=task, status=ExecutionStatus.RUNNING)
+    )
+
+    state = await QueryGenerator.process(state, {})
+
+    create.assert_awaited_once()
+    assert state.current_task.result == "result = df"
@@ -0,0 +1,144 @@
+import gzip
+import json
+import threading
+import pytest
+from app.core.logger import CustomLogger
+
+@pytest.fixture
+def make_logger(tmp_path):
+    """Create loggers writing to a temporary directory, each under its own name"""
+    loggers = []
+
+    def make(**kwargs):
+        custom = CustomLogger(name=f"test-{len(loggers)}-{tmp_path.name}", log_dir=tmp_path, **kwargs)
+        loggers.append(custom)
+        return custom
+
+    yield make
+    for custom in loggers:
+        custom.shutdown()
+
+def read_lines(path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+def test_records_are_written_by_listener(make_logger, tmp_path, mocker):
+    """Test that the caller only enqueues and the listener thread writes JSON lines"""
+    custom = make_logger()
+    writers = []
+    emit = custom.file_handler.emit
+    mocker.patch.object(custom.file_handler, "emit", side_effect=lambda r: (writers.append(threading.current_thread()), emit(r)))
+
+    custom.info("Routing", "router/process", extras={"task": 1}, correlation_id="c1")
+    custom.shutdown()
+
+    assert writers and threading.current_thread() not in writers
+    [record] = read_lines(tmp_path / "app.log")
+    assert record["message"] == "Routing"
+    assert record["component"] == "router/process"
+    assert record["extras"] == {"task": 1}
+    assert record["correlation_id"] == "c1"
+
+def test_rotated_files_are_compressed(make_logger, tmp_path):
+    """Test that the log rotates by size and keeps gzipped backups"""
+    custom = make_logger(max_bytes=2000, backup_count=2)
+    for i in range(100):
+        custom.info(f"message {i}", "test")
+    custom.shutdown()
+
+    backups = sorted(tmp_path.glob("app.log.*.gz"))
+    assert [p.name for p in backups] == ["app.log.1.gz", "app.log.2.gz"]
+    assert read_lines(backups[0])[-1]["message"] != "message 99"
+    assert read_lines(tmp_path / "app.log")[-1]["message"] == "message 99"
+
+def test_full_queue_drops_records(make_logger):
+    """Test that logging never blocks when the writer falls behind"""
+    custom = make_logger(queue_size=1)
+    custom.listener.stop()
+
+    for i in range(5):
+        custom.info(f"message {i}", "test")
+
+    assert custom.queue_handler.dropped == 4
+    custom._stopped = True
+    custom.file_handler.close()
+
+def test_dropped_count_reported_and_warnings_kept(make_logger, tmp_path):
+    """Test that a full queue drops info records first, keeps room for warnings and reports the drops"""
+    custom = make_logger(queue_size=2, warning_reserve=1)
+    custom.listener.stop()
+
+    for i in range(4):
+        custom.info(f"message {i}", "test")
+    assert custom.queue_handler.dropped == 2
+
+    # The warning takes the reserved slot, once that is used up warnings are dropped as well
+    custom.warning("slow disk", "test")
+    assert custom.queue_handler.dropped == 0
+    custom.warning("slower disk", "test")
+    assert custom.queue_handler.dropped == 1
+    custom.listener.start()
+    custom.shutdown()
+
+    records = read_lines(tmp_path / "app.log")
+    assert [r["message"] for r in records] == ["message 0", "message 1", "slow disk"]
+    assert records[-1]["extras"]["dropped"] == 2
+
+def test_unserializable_extras_fall_back_to_str(make_logger, tmp_path):
+    """Test that objects the encoder does not know are logged as strings"""
+    custom = make_logger()
+    custom.info("Result", "test", extras={"result": object(), 1: "non-string key"})
+    custom.shutdown()
+
+    [record] = read_lines(tmp_path / "app.log")
+    assert record["extras"]["result"].startswith("<object object")
+    assert record["extras"]["1"] == "non-string key"
+
+def test_large_extras_are_summarized(make_logger, tmp_path):
+    """Test that frames become shape summaries and long strings are cut with their hash"""
+    import pandas as pd
+    custom = make_logger()
+    custom.configure(max_field_chars=10, max_message_chars=20)
+    frame = pd.DataFrame({"Name": ["a"] * 1000, "Sales": range(1000)})
+
+    custom.info("x" * 50, "db_search/executor", extras={"result": frame, "code": "y" * 30, "rows": list(range(100))})
+    custom.shutdown()
+
+    [record] = read_lines(tmp_path / "app.log")
+    extras = record["extras"]
+    assert record["message"] == "x" * 20 + "... (50 chars)"
+    assert extras["result"] == {"type": "DataFrame", "shape": [1000, 2], "columns": ["Name", "Sales"]}
+    assert extras["code"]["truncated"] == "y" * 10 and extras["code"]["length"] == 30
+    assert extras["rows"]["length"] == 100 and extras["rows"]["head"] == [0, 1, 2, 3, 4]
+
+def test_lazy_payloads_skip_filtered_records(make_logger, tmp_path):
+    """Test that callables are only evaluated for records that are written"""
+    custom = make_logger()
+    custom.configure(component_levels={"router": "warning"})
+    calls = []
+
+    custom.info(lambda: calls.append("message") or "routed", "router/process", extras=lambda: calls.append("extras") or {})
+    custom.warning(lambda: "slow step", "router/process", extras=lambda: {"step": 1})
+    custom.info("kept", "db_search/executor")
+    custom.shutdown()
+
+    assert calls == []
+    assert [r["message"] for r in read_lines(tmp_path / "app.log")] == ["slow step", "kept"]
+
+def test_rate_limit_samples_info_records(make_logger, tmp_path, mocker):
+    """Test that a component over its rate keeps only part of its records and reports the rest"""
+    custom = make_logger()
+    custom.configure(rate_limits={"router": 2})
+    clock = mocker.patch("app.core.logger.time.monotonic", return_value=100.0)
+
+    for i in range(5):
+        custom.info(f"step {i}", "router/process")
+    custom.error("failure", "router/process")
+    clock.return_value = 101.0
+    custom.info("next second", "router/get_next_task")
+    custom.shutdown()
+
+    records = read_lines(tmp_path / "app.log")
+    assert [r["message"] for r in records] == ["step 0", "step 1", "failure", "next second"]
+    assert records[-1]["extras"]["suppressed"] == 3
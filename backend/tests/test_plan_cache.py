@@ -0,0 +1,107 @@
+import json
+import pytest
+from app.services.decomposer import DecomposerService
+from app.services.query_cache import TTLCache
+
+PLAN = {
+    "query_intent": "db_only_simple",
+    "tasks": [
+        {
+            "task_id": "t1",
+            "task_type": "db_search",
+            "description": "Top 5 Sony games",
+            "parameters": {"query": "top 5 sony games", "limit": 5},
+            "depends_on": []
+        }
+    ]
+}
+
+@pytest.fixture
+def decomposer(mocker, monkeypatch):
+    """Create a DecomposerService whose model always returns the same plan"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = mocker.MagicMock()
+    client.chat.completions.create = mocker.AsyncMock()
+    client.chat.completions.create.return_value.choices[0].message.content = json.dumps(PLAN)
+    return DecomposerService(client=client)
+
+async def test_repeated_query_skips_model(decomposer):
+    """Test that a query with a cached plan is not sent to the model again"""
+    first = await decomposer.decompose_query("Top 5 Sony games?")
+    second = await decomposer.decompose_query("top 5   SONY games?")
+
+    decomposer.client.chat.completions.create.assert_awaited_once()
+    assert decomposer.plan_cache.stats()["hits"] == 1
+    assert second.query == "top 5   SONY games?"
+    assert [t.subgraph_type for t in second.tasks] == [t.subgraph_type for t in first.tasks]
+    assert second.tasks[0].parameters == {"query": "top 5 sony games", "limit": 5}
+
+async def test_comparison_queries_get_their_own_plan(decomposer):
+    """Test that queries differing only in punctuation or an operator never share a plan"""
+    await decomposer.decompose_query("PS4 games with critic score > 8")
+    await decomposer.decompose_query("PS4 games with critic score < 8")
+
+    assert decomposer.client.chat.completions.create.await_count == 2
+    assert decomposer.plan_cache.stats()["hits"] == 0
+
+async def test_cached_plan_gets_fresh_ids(decomposer):
+    """Test that task graphs built from a cached plan never share ids"""
+    first = await decomposer.decompose_query("Top 5 Sony games")
+    second = await decomposer.decompose_query("Top 5 Sony games")
+
+    assert second.id != first.id
+    assert not {t.id for t in first.tasks} & {t.id for t in second.tasks}
+    assert second.tasks[-1].dependencies == [second.tasks[0].id]
+
+async def test_cached_plan_not_shared_between_graphs(decomposer):
+    """Test that changing one task graph never leaks into the cached plan"""
+    first = await decomposer.decompose_query("Top 5 Sony games")
+    first.tasks[0].parameters["limit"] = 50
+
+    second = await decomposer.decompose_query("Top 5 Sony games")
+
+    assert second.tasks[0].parameters["limit"] == 5
+
+async def test_context_is_part_of_the_key(decomposer):
+    """Test that the same query with another context is decomposed again"""
+    await decomposer.decompose_query("Top 5 Sony games")
+    await decomposer.decompose_query("Top 5 Sony games", {"previous": "ps4"})
+
+    assert decomposer.client.chat.completions.create.await_count == 2
+
+def test_ttl_cache_expires_entries(mocker):
+    """Test that entries are dropped once their time to live has passed"""
+    clock = mocker.patch("app.services.query_cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    cache.put("a", 1)
+
+    assert cache.get("a") == (True, 1)
+    clock.return_value = 111.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that the cache stays within its size bound"""
+    cache = TTLCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["hit_rate"] == pytest.approx(2 / 3)
+
+async def test_plan_dependencies_point_at_new_ids(decomposer):
+    """Test that depends_on entries from the model are mapped to the generated task ids"""
+    plan = {"tasks": PLAN["tasks"] + [{
+        "task_id": "t2",
+        "task_type": "web_search",
+        "description": "Reviews of the top game",
+        "depends_on": ["t1", "t9"]
+    }]}
+    decomposer.client.chat.completions.create.return_value.choices[0].message.content = json.dumps(plan)
+
+    graph = await decomposer.decompose_query("Top Sony game and its reviews")
+
+    assert graph.tasks[1].dependencies == [graph.tasks[0].id, "t9"]
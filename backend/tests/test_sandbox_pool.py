@@ -0,0 +1,77 @@
+import pytest
+from app.services.csv_operations import CSVOperations
+from app.services.sandbox_pool import SandboxPool
+
+@pytest.fixture
+def data_dir(csv_path):
+    """Create a data directory with one dataset"""
+    return csv_path.parent
+
+@pytest.fixture
+def pool(data_dir):
+    """Start a single-worker pool with tight limits"""
+    pool = SandboxPool(str(data_dir), workers=1, timeout_seconds=5, cpu_seconds=2, memory_mb=2048)
+    pool.warm_up("games")
+    yield pool
+    pool.close()
+
+def test_search_runs_in_worker(pool):
+    """Test that generated code runs in a worker and its result comes back"""
+    result = pool.run("games", 'result = df[df["Total Sales"] > 7]')
+
+    assert list(result["Title"]) == ["FIFA 18"]
+
+def test_worker_sees_committed_updates(pool, data_dir):
+    """Test that a worker reloads the dataset after another process updates it"""
+    writer = CSVOperations(str(data_dir / "games.csv"))
+    writer.update('df.loc[df["Title"] == "FIFA 18", "Total Sales"] = 1.0\nresult = df')
+
+    assert pool.run("games", 'result = float(df["Total Sales"].sum())') == pytest.approx(7.7)
+
+def test_worker_reload_leaves_log_unchanged(pool, data_dir):
+    """Test that a worker reloading while an append is half written never changes the log"""
+    writer = CSVOperations(str(data_dir / "games.csv"))
+    writer.update('df.loc[df["Title"] == "FIFA 18", "Total Sales"] = 1.0\nresult = df')
+    with open(writer.delta_log.path, "a") as f:
+        f.write('{"lsn": 2, "changes": {"Total Sa')
+    before = writer.delta_log.path.read_bytes()
+
+    assert pool.run("games", 'result = float(df["Total Sales"].sum())') == pytest.approx(7.7)
+    assert writer.delta_log.path.read_bytes() == before
+
+def test_code_errors_are_reported(pool):
+    """Test that failing code raises in the caller and keeps the worker"""
+    with pytest.raises(ValueError, match="Code execution failed"):
+        pool.run("games", 'result = df["Missing"]')
+
+    assert pool.run("games", 'result = len(df)') == 4
+
+def test_unknown_dataset_rejected(pool):
+    """Test that dataset names cannot escape the data directory"""
+    with pytest.raises(ValueError, match="Invalid dataset name"):
+        pool.run("../games", 'result = df')
+
+def test_cpu_limit_kills_and_replaces_worker(pool):
+    """Test that a query exceeding its CPU time is killed and the pool recovers"""
+    with pytest.raises(RuntimeError, match="CPU or memory limit"):
+        pool.run("games", 'x = 0\nwhile True:\n    x += 1')
+
+    assert pool.run("games", 'result = len(df)') == 4
+
+def test_wall_clock_timeout_replaces_worker(data_dir):
+    """Test that a query exceeding the wall-clock timeout is killed and the pool recovers"""
+    pool = SandboxPool(str(data_dir), workers=1, timeout_seconds=1, cpu_seconds=None, memory_mb=None)
+    try:
+        with pytest.raises(TimeoutError):
+            pool.run("games", 'x = 0\nwhile True:\n    x += 1')
+
+        assert pool.run("games", 'result = len(df)') == 4
+    finally:
+        pool.close()
+
+def test_memory_limit_stops_allocation(pool):
+    """Test that a query cannot allocate past the address space limit"""
+    with pytest.raises((ValueError, RuntimeError)):
+        pool.run("games", 'result = np.ones(1 << 32)')
+
+    assert pool.run("games", 'result = len(df)') == 4
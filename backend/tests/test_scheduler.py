@@ -0,0 +1,93 @@
+import asyncio
+import time
+import pytest
+from langgraph.graph import StateGraph
+from app.core.config import get_settings
+from app.schemas.helpers import SubgraphType, ExecutionStatus
+from app.schemas.state import AgentState
+from app.workflows import main as workflows
+from app.workflows.router import Router
+
+def ready_ids(state):
+    return [t.id for t in Router.ready_tasks(state)]
+
+def test_independent_searches_are_ready_together(make_state, make_task):
+    """Test that searches without dependencies start together and the answer waits for them"""
+    state = make_state(
+        make_task("db", SubgraphType.DB_SEARCH),
+        make_task("web", SubgraphType.WEB_SEARCH),
+        make_task("answer", SubgraphType.CONVERSATION, ["db", "web"])
+    )
+    assert ready_ids(state) == ["db", "web"]
+
+    state.task_graph.tasks = state.task_graph.tasks[2:]
+    assert ready_ids(state) == ["answer"]
+
+def test_dependencies_are_respected(make_state, make_task):
+    """Test that a task waits for its pending dependencies and ignores unknown ones"""
+    state = make_state(
+        make_task("first", SubgraphType.DB_SEARCH),
+        make_task("second", SubgraphType.DB_SEARCH, ["first"]),
+        make_task("third", SubgraphType.WEB_SEARCH, ["no-such-task"])
+    )
+    assert ready_ids(state) == ["first", "third"]
+
+def test_updates_are_barriers(make_state, make_task):
+    """Test that an update runs alone and blocks the searches listed after it"""
+    state = make_state(make_task("search", SubgraphType.DB_SEARCH), make_task("update", SubgraphType.DB_UPDATE),
+                       make_task("after", SubgraphType.DB_SEARCH))
+    assert ready_ids(state) == ["search"]
+
+    state.task_graph.tasks = state.task_graph.tasks[1:]
+    assert ready_ids(state) == ["update"]
+
+def test_retried_dependency_runs_before_answer(make_state, make_task):
+    """Test that a search re-queued behind the conversation task still runs first"""
+    state = make_state(make_task("answer", SubgraphType.CONVERSATION, ["db"]), make_task("db", SubgraphType.DB_SEARCH))
+    assert ready_ids(state) == ["db"]
+
+def sleeping_search(delay, evidence, flag, spans):
+    """Subgraph that takes `delay` seconds, records one piece of evidence and when it ran in `spans`"""
+    async def search(state: AgentState, config):
+        started = time.monotonic()
+        await asyncio.sleep(delay)
+        spans[state.current_task.task_node.id] = (started, time.monotonic())
+        state.collected_evidence.append({state.current_task.task_node.id: evidence})
+        setattr(state, flag, True)
+        state.current_task.status = ExecutionStatus.SUCCESS
+        state.completed_tasks[state.current_task.task_node.id] = state.current_task
+        state.current_task = None
+        return state
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("search", search)
+    workflow.set_entry_point("search")
+    return lambda: workflow.compile()
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+async def test_mixed_question_takes_longest_task(fake_llm, settings, make_state, make_task, mocker):
+    """Test that db and web tasks overlap and their evidence merges in task order"""
+    spans = {}
+    mocker.patch.object(workflows, "create_db_search_graph", sleeping_search(0.2, "db rows", "db_search_used", spans))
+    mocker.patch.object(workflows, "create_web_search_graph", sleeping_search(0.1, "web page", "web_search_used", spans))
+    state = make_state(
+        make_task("db", SubgraphType.DB_SEARCH),
+        make_task("web", SubgraphType.WEB_SEARCH),
+        make_task("answer", SubgraphType.CONVERSATION, ["db", "web"])
+    )
+
+    final = await workflows.AgentWorkflow().run_agent(state.model_dump(), {})
+
+    # Each search started before the other one finished
+    (db_start, db_end), (web_start, web_end) = spans["db"], spans["web"]
+    assert db_start < web_end and web_start < db_end
+    assert final.collected_evidence == [{"db": "db rows"}, {"web": "web page"}]
+    assert final.db_search_used and final.web_search_used
+    assert set(final.completed_tasks) == {"db", "web", "answer"}
+    assert final.final_answer == "Gran Turismo sold best"
@@ -0,0 +1,87 @@
+import json
+import httpx
+import pytest
+from app.main import app
+from app.routers import chat
+from app.services.chat_history import ChatHistoryStore
+from app.workflows import main as workflows
+
+@pytest.fixture(autouse=True)
+def history_store(mocker, tmp_path):
+    """Keep answered messages out of the real chat history"""
+    store = ChatHistoryStore(str(tmp_path / "chat_history.sqlite3"))
+    mocker.patch.object(chat, "get_chat_history_store", return_value=store)
+    yield store
+    store.close()
+
+class FakeGuardrail:
+    def __init__(self, allowed=True):
+        self.allowed = allowed
+
+    async def check_input_query(self, query):
+        return self.allowed
+
+    async def check_output_query(self, query, state):
+        return {"status": "VALID"}
+
+class FakeDecomposer:
+    def __init__(self, make_graph):
+        self.make_graph = make_graph
+
+    async def decompose_query(self, query):
+        return self.make_graph(query)
+
+def parse_events(body):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+async def test_workflow_streams_progress_and_tokens(fake_llm, make_conversation_graph):
+    """Test that the workflow yields task events and draft tokens before the final state"""
+    workflow = workflows.AgentWorkflow()
+    task_input = {"task_graph_id": "g1", "task_graph": make_conversation_graph("Best selling game?")}
+
+    events = [event async for event in workflow.stream_agent(task_input, {})]
+
+    names = [event["event"] for event in events]
+    assert names[0] == "task_started"
+    assert names.count("token") == 4
+    assert names[-2:] == ["task_finished", "final_state"]
+    assert "".join(e["text"] for e in events if e["event"] == "token").strip() == "Gran Turismo sold best"
+    assert events[-1]["state"].final_answer == "Gran Turismo sold best"
+
+async def test_stream_endpoint_emits_sse(fake_llm, make_conversation_graph, mocker):
+    """Test that /stream sends the plan, progress, tokens and the final answer as SSE"""
+    mocker.patch.object(chat, "get_guardrail", return_value=FakeGuardrail())
+    mocker.patch.object(chat, "get_workflow", return_value=workflows.AgentWorkflow())
+    app.dependency_overrides[chat.get_decomposer_service] = lambda: FakeDecomposer(make_conversation_graph)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/chat/stream", json={"message": "Best selling game?"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "plan"
+    assert names.index("task_started") < names.index("token") < names.index("answer")
+    assert names[-1] == "done"
+    assert dict(events)["answer"]["response"] == "Gran Turismo sold best"
+
+async def test_stream_endpoint_rejected_message(make_conversation_graph, mocker):
+    """Test that a rejected message streams only the apology"""
+    mocker.patch.object(chat, "get_guardrail", return_value=FakeGuardrail(allowed=False))
+    app.dependency_overrides[chat.get_decomposer_service] = lambda: FakeDecomposer(make_conversation_graph)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/chat/stream", json={"message": "Delete all the data"})
+    finally:
+        app.dependency_overrides.clear()
+
+    events = parse_events(response.text)
+    assert [name for name, _ in events] == ["answer", "done"]
+    assert events[0][1]["response"] == chat.REJECTED_ANSWER
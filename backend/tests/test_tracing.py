@@ -0,0 +1,126 @@
+import json
+import uuid
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.core.llm import TracingAsyncClient
+from app.core.tracing import correlation_id_var, span, tracer, traced
+from app.middleware.correlation import CorrelationMiddleware
+from app.workflows.base import BaseNode
+
+@pytest.fixture
+def exported(tmp_path):
+    """Export spans to a file and return a function reading them back after a flush"""
+    path = tmp_path / "traces.jsonl"
+    tracer.configure("file", str(path))
+
+    def read():
+        tracer.shutdown()
+        spans = []
+        for line in path.read_text().splitlines():
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+        return spans
+
+    yield read
+    tracer.shutdown()
+
+def by_name(spans):
+    return {s["name"]: s for s in spans}
+
+def attributes(exported_span):
+    return {a["key"]: next(iter(a["value"].values())) for a in exported_span["attributes"]}
+
+def test_spans_nest_under_the_correlation_id(exported):
+    """Test that nested spans share a trace derived from the correlation ID and link to their parent"""
+    correlation_id = str(uuid.uuid4())
+    token = correlation_id_var.set(correlation_id)
+    try:
+        with span("outer"):
+            with span("inner", rows=3):
+                pass
+            with pytest.raises(ValueError):
+                with span("failing"):
+                    raise ValueError("bad code")
+    finally:
+        correlation_id_var.reset(token)
+
+    spans = by_name(exported())
+    assert spans["outer"]["traceId"] == uuid.UUID(correlation_id).hex
+    assert spans["inner"]["traceId"] == spans["outer"]["traceId"]
+    assert spans["inner"]["parentSpanId"] == spans["outer"]["spanId"]
+    assert "parentSpanId" not in spans["outer"]
+    assert attributes(spans["inner"]) == {"rows": "3", "correlation_id": correlation_id}
+    assert spans["failing"]["status"] == {"code": 2, "message": "ValueError: bad code"}
+    assert int(spans["outer"]["endTimeUnixNano"]) >= int(spans["inner"]["endTimeUnixNano"])
+
+async def test_node_process_is_traced(exported):
+    """Test that subclasses of BaseNode get a span per run without decorating process"""
+    class SampleNode(BaseNode):
+        @staticmethod
+        async def process(state, config):
+            with span("work"):
+                return state
+
+    @traced()
+    def helper():
+        return 1
+
+    assert await SampleNode.process("state", {}) == "state"
+    assert helper() == 1
+
+    spans = by_name(exported())
+    assert spans["work"]["parentSpanId"] == spans["node.SampleNode"]["spanId"]
+    assert "test_node_process_is_traced.<locals>.helper" in spans
+
+async def test_llm_requests_are_traced_until_the_body_is_read(exported):
+    """Test that plain and streamed responses are timed with their status code"""
+    def handler(request):
+        return httpx.Response(200, content=b"data: token\n\n" * 3)
+
+    async with TracingAsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with span("plain"):
+            await client.post("https://api.openai.com/v1/chat/completions?x=1", json={})
+        with span("streamed"):
+            async with client.stream("POST", "https://api.openai.com/v1/chat/completions") as response:
+                assert [chunk async for chunk in response.aiter_bytes()]
+
+    spans = exported()
+    parents = {s["spanId"]: s["name"] for s in spans}
+    requests = [s for s in spans if s["name"] == "llm.request"]
+    assert [parents[s["parentSpanId"]] for s in requests] == ["plain", "streamed"]
+    assert all(attributes(s)["http.status_code"] == "200" for s in requests)
+    assert attributes(requests[0])["http.url"] == "https://api.openai.com/v1/chat/completions"
+
+async def test_middleware_opens_request_span(exported):
+    """Test that a request's spans carry the correlation ID sent by the client"""
+    app = FastAPI()
+    app.add_middleware(CorrelationMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        with span("handler"):
+            return {"ok": True}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/ping", headers={"X-Correlation-ID": "req-42"})
+
+    spans = by_name(exported())
+    assert response.headers["X-Correlation-ID"] == "req-42"
+    assert spans["handler"]["parentSpanId"] == spans["GET /ping"]["spanId"]
+    assert attributes(spans["handler"])["correlation_id"] == "req-42"
+    assert attributes(spans["GET /ping"])["http.status_code"] == "200"
+
+def test_trace_file_is_rotated(tmp_path):
+    """Test that the file exporter rotates the trace file by size"""
+    path = tmp_path / "traces.jsonl"
+    tracer.configure("file", str(path), max_bytes=2000, backup_count=2)
+    for i in range(50):
+        with span(f"span-{i}"):
+            pass
+    tracer.shutdown()
+
+    assert path.stat().st_size <= 2000
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert not (tmp_path / "traces.jsonl.3").exists()